@@ -0,0 +1,53 @@
+"""Status change deltas versus full status documents for a dashboard: the
+time to diff two successive snapshots and the JSON bytes sent per
+snapshot, for a HERO7-shaped reply with `--changed` values changing
+between snapshots.
+
+    python benchmarks/bench_changes.py --changed 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam.changes import StatusDelta, changes  # noqa: E402
+from goprocam.schema import CapabilitySchema  # noqa: E402
+from goprocam.status import layout_for  # noqa: E402
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--changed', type=int, default=3, help='status values changing per snapshot')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    schema = CapabilitySchema.from_file(HD7_SCHEMA)
+    layout = layout_for(schema)
+    reply = {'status': {str(ident): 0 for ident in schema.status_names},
+             'settings': {str(ident): min(values) for ident, values in schema.settings.items()}}
+    reply['status']['30'] = 'GP24500456'
+    first = layout.decode(reply)
+    for key in random.Random(1).sample(sorted(reply['status']), args.changed):
+        if key != '30':
+            reply['status'][key] = 1
+    second = layout.decode(reply)
+
+    def delta():
+        return StatusDelta(second.timestamp, changes(first.status, second.status),
+                           changes(first.settings, second.settings))
+    same = min(timeit.repeat(lambda: changes(first.status, first.status), number=args.number, repeat=3))
+    changed = min(timeit.repeat(delta, number=args.number, repeat=3))
+    print("diff unchanged   {0:8.2f}us".format(same / args.number * 1e6))
+    print("diff changed     {0:8.2f}us".format(changed / args.number * 1e6))
+    result = delta()
+    print("full document    {0:8d} bytes".format(len(json.dumps(second.as_dict()))))
+    print("delta            {0:8d} bytes".format(len(json.dumps([result.status, result.settings]))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Decoding gpMediaList payloads, the old path (decode bytes to str, then
+json.loads) versus goprocam.jsoncodec.loads on the raw bytes, and the
+gpControlCommand backslash repair on str versus bytes.
+
+The payload is shaped like the media list of a HERO7 with `--files` files,
+or read from `--payload`, a recorded /gp/gpMediaList body.
+
+    python benchmarks/bench_json.py --files 2000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam import jsoncodec  # noqa: E402
+
+
+def media_list(files):
+    media = []
+    for folder in range(100, 100 + (files + 998) // 999):
+        fs = []
+        for i in range(min(999, files - len(media) * 999)):
+            fs.append({'n': 'GOPR{0:04d}.MP4'.format(i + 1), 'cre': '1490468532', 'mod': '1490468532',
+                       'glrv': '1134282', 'ls': '-1', 's': '61532672'})
+        media.append({'d': '{0}GOPRO'.format(folder), 'fs': fs})
+    return json.dumps({'id': '2814640736734236688', 'media': media}).encode('utf-8')
+
+
+def old(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def old_repair(data):
+    return json.loads(data.decode('utf-8').replace("\\", "/"))
+
+
+def new_repair(data):
+    return jsoncodec.loads(jsoncodec.repair_backslashes(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000, help='files in the generated media list')
+    parser.add_argument('--payload', help='recorded gpMediaList body to decode instead')
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, 'rb') as fd:
+            data = fd.read()
+    else:
+        data = media_list(args.files)
+    print("payload {0} bytes, backend {1}".format(len(data), jsoncodec.BACKEND))
+    for name, func in (('str + json.loads', old), ('jsoncodec.loads', jsoncodec.loads),
+                       ('repair str', old_repair), ('repair bytes', new_repair)):
+        elapsed = min(timeit.repeat(lambda: func(data), number=args.number, repeat=3)) / args.number
+        print("{0:18s} {1:8.1f}us".format(name, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Labelling status values, the if-chains Parsers used before (copied
+here) versus the LabelTables of goprocam.labels, per value and for a
+whole snapshot. With NumPy installed LabelTable.batch is also timed on an
+array of codes.
+
+    python benchmarks/bench_labels.py
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam.labels import labels_for  # noqa: E402
+from goprocam.schema import CapabilitySchema  # noqa: E402
+from goprocam.status import layout_for  # noqa: E402
+from goprocam.utils import Parsers  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+
+def video_res(value):
+    """Parsers.video_res before the tables"""
+    if value == 1:
+        return "4k"
+    elif value == 2:
+        return "4kSV"
+    elif value == 4:
+        return "2k"
+    elif value == 5:
+        return "2kSV"
+    elif value == 6:
+        return "2k4by3"
+    elif value == 7:
+        return "1440p"
+    elif value == 8:
+        return "1080pSV"
+    elif value == 9:
+        return "1080p"
+    elif value == 10:
+        return "960p"
+    elif value == 11:
+        return "720pSV"
+    elif value == 12:
+        return "720p"
+    elif value == 13:
+        return "480p"
+    elif value == 14:
+        return "5.2K"
+    elif value == 15:
+        return "3K"
+    else:
+        return "out of scope"
+
+
+def sub_mode(modevalue, value):
+    """Parsers.sub_mode before the tables"""
+    if modevalue == 0:
+        if value == 0:
+            return "Video"
+        if value == 1:
+            return "TimeLapse Video"
+        if value == 2:
+            return "Video+Photo"
+        if value == 3:
+            return "Looping"
+    if modevalue == 1:
+        if value == 0:
+            return "Single Pic"
+        if value == 1:
+            return "Burst"
+        if value == 2:
+            return "NightPhoto"
+    if modevalue == 2:
+        if value == 0:
+            return "Burst"
+        if value == 1:
+            return "TimeLapse"
+        if value == 2:
+            return "Night lapse"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=10000)
+    parser.add_argument('--size', type=int, default=10000, help='codes per batch')
+    args = parser.parse_args()
+
+    schema = CapabilitySchema.from_file(HD7_SCHEMA)
+    labels = labels_for(schema)
+    rng = random.Random(1)
+    codes = [rng.randrange(20) for _ in range(args.size)]
+    modes = [rng.randrange(3) for _ in range(args.size)]
+    sub_modes = [rng.randrange(4) for _ in range(args.size)]
+    snapshot = layout_for(schema).decode({'status': {'43': 0, '44': 3, '2': 3, '8': 0, '13': 3600, '54': 1000000},
+                                          'settings': {'2': 9, '3': 8}})
+
+    def timed(name, func, number):
+        elapsed = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print("{0:28s} {1:10.2f}us".format(name, elapsed * 1e6))
+
+    number = max(1, args.number // args.size)
+    timed('if-chain video_res', lambda: [video_res(code) for code in codes], number)
+    timed('Parsers.video_res', lambda: [Parsers.video_res(code) for code in codes], number)
+    timed('LabelTable video_res', lambda: [labels.video_res(code) for code in codes], number)
+    timed('LabelTable video_res batch', lambda: labels.video_res.batch(codes), number)
+    timed('if-chain sub_mode', lambda: [sub_mode(mode, sub) for mode, sub in zip(modes, sub_modes)], number)
+    timed('SubModeTable batch', lambda: labels.sub_mode.batch(modes, sub_modes), number)
+    if numpy is not None:
+        array_codes = numpy.array(codes)
+        array_modes, array_sub_modes = numpy.array(modes), numpy.array(sub_modes)
+        timed('numpy video_res batch', lambda: labels.video_res.batch(array_codes), number)
+        timed('numpy sub_mode batch', lambda: labels.sub_mode.batch(array_modes, array_sub_modes), number)
+    else:
+        print("numpy not installed, array batches skipped")
+    print("per snapshot:")
+    timed('StatusLabels.decode', lambda: labels.decode(snapshot, 'HERO7 Black'), args.number)
+
+
+if __name__ == '__main__':
+    main()
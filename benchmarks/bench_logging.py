@@ -0,0 +1,52 @@
+"""Per command cost of logging with no handler and logging disabled: the
+old eager str.format + _handle_log call versus CameraLog, which checks the
+level before formatting anything. The downloadMedia message also used to
+run parse_value("media_size") for every download.
+
+    python benchmarks/bench_logging.py
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam.GoProCamera import MediaInfo  # noqa: E402
+from goprocam.logs import CameraLog  # noqa: E402
+from goprocam.utils import media_size  # noqa: E402
+
+
+class Eager:
+    """The removed GoPro._handle_log"""
+    def __init__(self):
+        self._log_handler = None
+
+    def _handle_log(self, message, **kwargs):
+        if self._log_handler is not None:
+            self._log_handler(message, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200000)
+    args = parser.parse_args()
+
+    eager = Eager()
+    log = CameraLog('goprocam.bench', {'ip_address': '10.5.5.9'})
+    resp = {'status': 0}
+    media = MediaInfo('100GOPRO', 'GOPR0001.MP4', '61532672')
+    cases = (
+        ('gpControlSet eager', lambda: eager._handle_log("gpControlSet({0},{1}) > {2}".format(2, 1, resp))),
+        ('gpControlSet lazy', lambda: log.debug("gpControlSet({0},{1}) > {2}", 2, 1, resp)),
+        ('downloadMedia eager', lambda: eager._handle_log("downloadMedia - Downloading {3} bytes {0}/{1} to {2}".format(
+            media.folder, media.name, 'x.MP4', media_size(media.size)))),
+        ('downloadMedia lazy', lambda: log.info("downloadMedia - Downloading {0.size_readable} {0.folder}/{0.name} to {1}",
+                                                media, 'x.MP4')),
+    )
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3)) / args.number
+        print("{0:20s} {1:8.3f}us".format(name, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
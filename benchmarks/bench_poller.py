@@ -0,0 +1,65 @@
+"""Status requests a camera gets while it is busy for `--busy` seconds and
+waited on, the IsBusy loop of take_photo before the poller (copied here)
+versus GoPro.wait_for, on its own (exponential backoff) and woken by a
+StatusPoller, against a local fake camera.
+
+    python benchmarks/bench_poller.py --busy 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam import GoProCamera, constants  # noqa: E402
+from goprocam.poller import is_idle  # noqa: E402
+from goprocam.schema import SchemaCache  # noqa: E402
+from tests.fakecamera import FakeCamera  # noqa: E402
+
+
+async def busy_loop(gopro, deadline=None):
+    """take_photo before the poller"""
+    ready = int(await gopro.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy, deadline))
+    while ready == 1:
+        ready = int(await gopro.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy, deadline))
+
+
+async def polled(gopro, deadline=None):
+    gopro.start_status_poller()
+    await gopro.wait_for(is_idle, deadline)
+    await gopro.stop_status_poller()
+
+
+async def backoff(gopro, deadline=None):
+    await gopro.wait_for(is_idle, deadline)
+
+
+async def measure(wait, busy):
+    camera = FakeCamera()
+    await camera.start()
+    camera.status = {'status': {'8': 1}, 'settings': {}}
+    gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(camera.port), schema_cache=SchemaCache())
+    await gopro.whichCam()
+    asyncio.get_event_loop().call_later(busy, camera.status.update, {'status': {'8': 0}})
+    started = time.monotonic()
+    try:
+        await wait(gopro)
+        return camera.requests.count('/gp/gpControl/status'), time.monotonic() - started - busy
+    finally:
+        await gopro.quit()
+        await camera.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--busy', type=float, default=2.0, help='seconds the camera is busy')
+    args = parser.parse_args()
+    loop = asyncio.get_event_loop()
+    for name, wait in (('busy loop', busy_loop), ('wait_for', backoff), ('wait_for+poller', polled)):
+        requests, late = loop.run_until_complete(measure(wait, args.busy))
+        print("{0:16s} {1:6d} status requests, done {2:6.3f}s after the camera".format(name, requests, late))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Checking a setting value and its blacklist filters, a linear scan of the
+decoded capability schema versus the CapabilitySchema indexes, and getting
+the indexes by decoding and indexing the schema versus loading the compiled
+form SchemaCache keeps on disk.
+
+The schema is doc/HD7_01_01_51_00.json or `--schema`, a recorded
+/gp/gpControl body.
+
+    python benchmarks/bench_schema.py
+"""
+import argparse
+import json
+import marshal
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam import jsoncodec  # noqa: E402
+from goprocam.schema import CapabilitySchema  # noqa: E402
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+# 240 fps while 1080p in NTSC, which passes both checks
+SETTING, VALUE, CURRENT = 3, 0, {2: 9, 57: 0}
+
+
+def scan(schema, setting, value, current):
+    allowed = None
+    for mode in schema['modes']:
+        for entry in mode['settings']:
+            if entry['id'] == setting:
+                allowed = [option['value'] for option in entry['options']]
+    if allowed is None or value not in allowed:
+        return False
+    for rule in schema['filters']:
+        if rule['blacklist']['setting_id'] != setting or value not in rule['blacklist']['values']:
+            continue
+        for condition in rule['activated_by']:
+            values = condition['values'] if 'values' in condition else [condition['setting_value']]
+            if current.get(condition.get('setting_id')) not in values:
+                break
+        else:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schema', default=HD7_SCHEMA)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(args.schema, 'rb') as fd:
+        raw = fd.read()
+    schema = json.loads(raw.decode('utf-8'))
+    indexed = CapabilitySchema(schema)
+    compiled = marshal.dumps(indexed.compiled())
+    print("{0} settings, {1} filters, {2} bytes, compiled {3} bytes".format(
+        len(indexed.settings), len(indexed.rules), len(raw), len(compiled)))
+    for name, func in (('decode + index', lambda: CapabilitySchema(jsoncodec.loads(raw))),
+                       ('index', lambda: CapabilitySchema(schema)),
+                       ('load compiled', lambda: CapabilitySchema.from_compiled(marshal.loads(compiled)))):
+        elapsed = min(timeit.repeat(func, number=20, repeat=3)) / 20
+        print("{0:14s} {1:8.1f}us".format(name, elapsed * 1e6))
+    for name, func in (('linear scan', lambda: scan(schema, SETTING, VALUE, CURRENT)),
+                       ('indexed', lambda: indexed.validate_setting(SETTING, VALUE, CURRENT))):
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3)) / args.number
+        print("{0:14s} {1:8.2f}us".format(name, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
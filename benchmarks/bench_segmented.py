@@ -0,0 +1,79 @@
+"""Compare single stream and segmented downloads against a local stand-in
+for the camera media server that limits the throughput of every connection,
+like the camera's WiFi link does for a single TCP stream.
+
+    python benchmarks/bench_segmented.py --size 64 --rate 8 --segments 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam.clients import AsyncClient  # noqa: E402
+
+
+def make_app(data, rate):
+    chunk = 64 * 1024
+
+    async def handle(request):
+        start, end = 0, len(data) - 1
+        status = 200
+        headers = {'Accept-Ranges': 'bytes'}
+        range_header = request.headers.get('Range')
+        if range_header:
+            first, _, last = range_header[6:].partition('-')
+            start = int(first)
+            end = int(last) if last else end
+            status = 206
+            headers['Content-Range'] = 'bytes {0}-{1}/{2}'.format(start, end, len(data))
+        resp = web.StreamResponse(status=status, headers=headers)
+        resp.content_length = end + 1 - start
+        await resp.prepare(request)
+        for offset in range(start, end + 1, chunk):
+            await resp.write(data[offset:min(offset + chunk, end + 1)])
+            await asyncio.sleep(chunk / rate)
+        return resp
+
+    app = web.Application()
+    app.router.add_get('/videos/DCIM/100GOPRO/GOPR0001.MP4', handle)
+    return app
+
+
+async def run(args):
+    data = os.urandom(args.size * 1024 * 1024)
+    runner = web.AppRunner(make_app(data, args.rate * 1024 * 1024))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = 'http://127.0.0.1:{0}/videos/DCIM/100GOPRO/GOPR0001.MP4'.format(port)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for segments in (1, args.segments):
+            client = AsyncClient(working_path=tmp, min_segment_size=args.min_segment * 1024 * 1024,
+                                 media_limit_per_host=args.segments, digest=None)
+            started = time.monotonic()
+            await client.download(url, 'out.MP4', size=len(data), segments=segments)
+            elapsed = time.monotonic() - started
+            await client.quit()
+            print("segments={0}: {1:.2f}s, {2:.1f} MB/s".format(
+                segments, elapsed, args.size / elapsed))
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=64, help='file size in MB')
+    parser.add_argument('--rate', type=float, default=8, help='per connection rate in MB/s')
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--min-segment', type=int, default=8, help='minimum segment size in MB')
+    asyncio.get_event_loop().run_until_complete(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
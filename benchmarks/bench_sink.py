@@ -0,0 +1,87 @@
+"""Event loop stall while downloading to a slow disk, inline writes as before
+versus goprocam.sinks.FileSink. The disk is simulated by sleeping `--latency`
+milliseconds in every write.
+
+    python benchmarks/bench_sink.py --size 32 --latency 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam.sinks import FileSink  # noqa: E402
+from goprocam.utils import LoopStallMonitor  # noqa: E402
+
+
+class SlowSink(FileSink):
+    latency = 0.0
+
+    def _write(self, fd, buf, filled, offset):
+        time.sleep(self.latency)
+        return super()._write(fd, buf, filled, offset)
+
+
+async def inline(resp, filename, latency):
+    with open(filename, 'wb') as fd:
+        while True:
+            chunk = await resp.content.read(64 * 1024)
+            if not chunk:
+                break
+            time.sleep(latency)
+            fd.write(chunk)
+
+
+async def sink(resp, filename, latency):
+    SlowSink.latency = latency
+    async with SlowSink(filename, truncate=True) as out:
+        while True:
+            chunk = await resp.content.read(64 * 1024)
+            if not chunk:
+                break
+            await out.write(chunk)
+
+
+async def run(args):
+    data = os.urandom(args.size * 1024 * 1024)
+
+    async def handle(request):
+        return web.Response(body=data)
+
+    app = web.Application()
+    app.router.add_get('/file', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = 'http://127.0.0.1:{0}/file'.format(site._server.sockets[0].getsockname()[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with aiohttp.ClientSession() as session:
+            for name, writer in (('inline', inline), ('sink', sink)):
+                monitor = LoopStallMonitor()
+                monitor.start()
+                started = time.monotonic()
+                async with session.get(url) as resp:
+                    await writer(resp, os.path.join(tmp, name), args.latency / 1000.0)
+                elapsed = time.monotonic() - started
+                await monitor.stop()
+                print("{0:7s} {1:.2f}s, loop stall total {2:.3f}s max {3:.1f}ms".format(
+                    name, elapsed, monitor.total_stall, monitor.max_stall * 1000))
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=32, help='file size in MB')
+    parser.add_argument('--latency', type=float, default=5, help='simulated ms per disk write')
+    asyncio.get_event_loop().run_until_complete(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
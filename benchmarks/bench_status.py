@@ -0,0 +1,81 @@
+"""Decoding a /gp/gpControl/status reply, the removed reconstruct_status
+(remapped dict into a Struct, two settings kept) versus StatusLayout.decode
+(every value, into two int arrays), time and bytes allocated per snapshot.
+
+The reply is shaped like a HERO7 one with every status and setting of its
+schema, or read from `--reply`, a recorded /gp/gpControl/status body.
+
+    python benchmarks/bench_status.py
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from goprocam import constants  # noqa: E402
+from goprocam.schema import CapabilitySchema  # noqa: E402
+from goprocam.status import layout_for  # noqa: E402
+from goprocam.utils import Struct  # noqa: E402
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+STATUS_MAP = {value: key for key, value in vars(constants.Status.STATUS).items()}
+
+
+def reconstruct_status(data):
+    """utils.reconstruct_status before StatusSnapshot"""
+    status = data['status']
+    settings = data['settings']
+    status_mapped = {}
+    settings_mapped = {}
+    if status:
+        for key, value in status.items():
+            try:
+                status_mapped[STATUS_MAP[key]] = value
+            except KeyError:
+                pass
+    if settings:
+        settings_mapped['Framerate'] = settings[constants.Video.FRAME_RATE]
+        settings_mapped['Resolution'] = settings[constants.Video.RESOLUTION]
+    return Struct(**{'status': Struct(**status_mapped), 'settings': Struct(**settings_mapped)})
+
+
+def allocated(func, number=1000):
+    """Bytes still allocated by number results of func, per result
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [func() for _ in range(number)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reply', help='recorded /gp/gpControl/status body')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    schema = CapabilitySchema.from_file(HD7_SCHEMA)
+    if args.reply:
+        with open(args.reply) as fd:
+            reply = json.load(fd)
+    else:
+        reply = {'status': {str(ident): 0 for ident in schema.status_names},
+                 'settings': {str(ident): min(values) for ident, values in schema.settings.items()}}
+        reply['status']['30'] = 'GP24500456'
+    layout = layout_for(schema)
+    print("{0} status, {1} settings".format(len(reply['status']), len(reply['settings'])))
+    for name, func in (('reconstruct_status', lambda: reconstruct_status(reply)),
+                       ('StatusLayout.decode', lambda: layout.decode(reply))):
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3)) / args.number
+        print("{0:20s} {1:8.2f}us {2:8.0f} bytes".format(name, elapsed * 1e6, allocated(func)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import asyncio
+import hashlib
+from goprocam import GoProCamera
+
+gpCam = GoProCamera.GoPro()
+
+
+async def run():
+    await gpCam.connect()
+    files = await gpCam.listMedia()
+
+    # stream every file through a hasher without writing it to disk
+    for media in files:
+        sha = hashlib.sha256()
+        async with gpCam.open_media(media) as chunks:
+            async for chunk in chunks:
+                sha.update(chunk)
+        print(media.folder, media.name, sha.hexdigest())
+
+    # small files can be fetched straight into memory
+    photos = [media for media in files if media.name.endswith("JPG")]
+    if photos:
+        data = await gpCam.fetch_media_bytes(photos[-1])
+        print("last photo is {0} bytes".format(len(data)))
+
+    await gpCam.quit()
+
+asyncio.get_event_loop().run_until_complete(run())
@@ -11,15 +11,28 @@ import subprocess
 from socket import timeout
 from urllib.error import HTTPError
 from urllib.error import URLError
-import math
 import base64
 import sys
 import ssl
 
 import asyncio
+import logging
 from goprocam.clients import AsyncClient
-from goprocam.utils import media_size, deprecated, Struct, reconstruct_status, Parsers
-from goprocam.errors import CameraIdentificationError, GoProError, UnsupportedCameraError
+from goprocam.hedging import HedgeGroup
+from goprocam.manifest import Manifest
+from goprocam.timeouts import Deadline
+from goprocam.logs import CameraLog
+from goprocam.schema import SchemaCache, default_cache
+from goprocam.status import layout_for
+from goprocam.labels import labels_for
+from goprocam.poller import StatusPoller, is_idle
+from goprocam.changes import ChangeFeed
+from goprocam.utils import media_size, deprecated, Parsers
+from goprocam.errors import CameraIdentificationError, DeadlineExceeded, GoProConnectionError, \
+    GoProError, HttpError, InvalidSettingError, UnsupportedCameraError
+
+# replies of the legacy /camera and /bacpac paths to a wrong password
+AUTH_REJECTED = (401, 403)
 
 
 class CameraInfo:
@@ -31,6 +44,7 @@ class CameraInfo:
         self.apitype = apitype
         self.model_type = model_type
         info = kwargs.pop('info', None)
+        self.info = dict(info or {})
         if info:
             for key in info:
                 setattr(self, key, info[key])
@@ -38,6 +52,14 @@ class CameraInfo:
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    @property
+    def is_fusion(self):
+        return "FS" in (self.firmware_version or "")
+
+    @property
+    def is_hero4(self):
+        return "HERO4" in (self.model or "")
+
     def __str__(self):
         msg = "{0}".format(self.model)
         if self.apitype:
@@ -48,10 +70,11 @@ class CameraInfo:
 
 
 class MediaInfo:
-    def __init__(self, folder, name, size):
+    def __init__(self, folder, name, size, mod=None):
         self.folder = folder
         self.name = name
         self.size = size
+        self.mod = mod
 
     @property
     def size_readable(self):
@@ -62,35 +85,49 @@ class MediaInfo:
 
 
 class GoPro:
-    async def prepare_gpcontrol(self):
-        try:
-            jsondata = await self._client.getJSON('http://' + self.ip_addr + '/gp/gpControl', timeout=5)
-            response = jsondata["info"]["firmware_version"]
-            if "HX" in response:  # Only session cameras.
-                connectedStatus = False
-                while connectedStatus is False:
-                    json_data = await self._client.getJSON("http://" + self.ip_addr + "/gp/gpControl/status")
-                    # print(json_data["status"]["31"])
-                    if json_data["status"]["31"] >= 1:
-                        connectedStatus = True
-        except (HTTPError, URLError) as error:
-            await self.prepare_gpcontrol()
-        except timeout:
-            await self.prepare_gpcontrol()
+    async def prepare_gpcontrol(self, info=None):
+        """Make sure gpControl answers, session cameras also need a client connected (status 31).
+        Failed requests are retried by the client's retry policy, `info` is the gpControl info if already fetched
+        """
+        if info is None:
+            info = (await self._client.getJSON('http://' + self.ip_addr + '/gp/gpControl', timeout=5))["info"]
+        if "HX" in info["firmware_version"]:  # Only session cameras.
+            await self.wait_for(lambda snapshot: (snapshot.status.IsConnected or 0) >= 1)
 
         # print("Camera successfully connected!")
 
-    def __init__(self, ip_address="10.5.5.9", mac_address="AA:BB:CC:DD:EE:FF", working_path='./'):
+    def __init__(self, ip_address="10.5.5.9", mac_address="AA:BB:CC:DD:EE:FF", working_path='./', pool=None,
+                 manifest=None, schema_cache=None, **client_options):
+        """`pool` is an optional goprocam.pool.ConnectionPool shared with other GoPro instances,
+        `manifest` a goprocam.manifest.Manifest or filename that downloadMedia records to,
+        `schema_cache` a goprocam.schema.SchemaCache, by default one shared in the process and kept on disk,
+        `client_options` are passed on to AsyncClient (limit_per_host, keepalive_timeout, digest, ...)
+        """
         if sys.version_info[0] < 3:
             raise Exception("Needs Python v3, run again on a virtualenv or install Python 3")
         self.ip_addr = ip_address
         self._camera = ""
+        self._schema = None
+        self._schema_key = None
+        self._schema_reply = None
+        self._schema_cache = schema_cache or default_cache
+        self._snapshot = None
+        self._poller = None
+        # the poller status_changes started, stopped with its last iterator
+        self._changes_poller = None
+        self._camera_cache = {'hits': 0, 'misses': 0}
         self._connect_handler = None  # type: Optional[Callable]
         self._control_set_handler = None
         self._control_command_handler = None
         self._send_camera_handler = None
-        self._log_handler = None
-        self._client = AsyncClient(working_path=working_path)
+        self._password = None
+        self._password_lock = None
+        self._log = CameraLog(__name__, {'ip_address': ip_address})
+        self._changes = ChangeFeed(self._log, self._changes_closed)
+        self._client = AsyncClient(working_path=working_path, pool=pool, **client_options)
+        if isinstance(manifest, str):
+            manifest = Manifest(manifest, algorithm=self._client.digest)
+        self.manifest = manifest
 
         try:
             from getmac import get_mac_address
@@ -99,11 +136,11 @@ class GoPro:
             self._mac_address = mac_address
 
     def __str__(self):
-        return str(self.infoCamera())
+        return str(self._camera)
 
     async def _sleep(self, period):
         if period > 2:
-            self._handle_log("sleeping for {0} seconds".format(period))
+            self._log.debug("sleeping for {0} seconds", period)
         return await asyncio.sleep(period)
 
     def KeepAlive(self):
@@ -112,67 +149,80 @@ class GoPro:
             sock.sendto("_GPHD_:0:0:2:0.000000\n".encode(), (self.ip_addr, 8554))
             time.sleep(2500 / 1000)
 
-    def getPassword(self):
+    async def getPassword(self, rejected=None):
+        """Return the password of the legacy /camera and /bacpac paths.
+        It is read from /bacpac/sd once and cached, `rejected` is a password
+        the camera refused and is read again unless that already happened.
+        """
+        if self._password is not None and self._password != rejected:
+            return self._password
+        if self._password_lock is None:
+            self._password_lock = asyncio.Lock()
+        async with self._password_lock:
+            if self._password is None or self._password == rejected:
+                password = await self._client.getText('http://' + self.ip_addr + '/bacpac/sd', timeout=5)
+                self._password = re.sub(r'\W+', '', password)
+            return self._password
+
+    async def _auth_request(self, path, query="", timeout=5, deadline=None):
+        """GET a legacy /camera or /bacpac path with the cached password,
+        which is read again once when the camera rejects it
+        """
+        password = await self.getPassword()
+        url = 'http://' + self.ip_addr + path + '?t='
         try:
-            PASSWORD = urllib.request.urlopen('http://' + self.ip_addr + '/bacpac/sd', timeout=5).read()
-            password = str(PASSWORD, 'utf-8')
-            password_parsed = re.sub(r'\W+', '', password)
-            return password_parsed
-        except (HTTPError, URLError) as error:
-            return ""
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
-            return ""
-            print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
-
-    async def gpControlSet(self, param, value):
+            return await self._client.getText(url + password + query, timeout=timeout, deadline=deadline)
+        except HttpError as err:
+            if err.status not in AUTH_REJECTED:
+                raise
+        password = await self.getPassword(rejected=password)
+        return await self._client.getText(url + password + query, timeout=timeout, deadline=deadline)
+
+    async def gpControlSet(self, param, value, deadline=None):
         # sends Parameter and value to gpControl/setting
+        # raises InvalidSettingError without a request when the camera's schema does not allow it
 
         if self._camera and self._camera.model_type in ['HD7']:
             # unsupported for above
             if param in [constants.Video.PROTUNE_VIDEO]:
                 return
+        schema = await self._load_schema()
+        if schema is not None:
+            schema.validate_setting(param, value)
         try:
             resp = await self._client.getText(
-                'http://' + self.ip_addr + '/gp/gpControl/setting/' + param + '/' + value, timeout=5
-            )
-            self._handle_log("gpControlSet({0},{1}) > {2}".format(param, value, resp))
+                'http://' + self.ip_addr + '/gp/gpControl/setting/' + param + '/' + value, timeout=5,
+                deadline=deadline)
+            self._log.debug("gpControlSet({0},{1}) > {2}", param, value, resp)
             return resp
-        except (HTTPError, URLError) as error:
+        except GoProConnectionError:
             return ""
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
+        except asyncio.TimeoutError:
             return ""
-            print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
-    async def gpControlCommand(self, param):
+    async def gpControlCommand(self, param, deadline=None):
         """Sends a gpControl/command to camera and returns JSON respons if parsable
         """
         try:
-            resp = await self._client.getText('http://' + self.ip_addr + '/gp/gpControl/command/' + param, timeout=5)
-
             # replace single backslash with forwardslash to fix bad json format
-            resp = json.loads(resp.replace("\\", "/"))
-            self._handle_log("gpControlCommand({0}) > {1}".format(param, resp))
+            resp = await self._client.getJSON('http://' + self.ip_addr + '/gp/gpControl/command/' + param,
+                                              timeout=5, repair=True, deadline=deadline)
+            self._log.debug("gpControlCommand({0}) > {1}", param, resp)
             return resp
-        except (HTTPError, URLError) as error:
+        except GoProConnectionError:
             return ""
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
+        except asyncio.TimeoutError:
             return ""
-            print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     async def gpControlExecute(self, param):
         try:
             resp = await self._client.getText('http://' + self.ip_addr + '/gp/gpControl/execute?' + param, timeout=5)
             # TODO: on_ handler
             return resp
-        except (HTTPError, URLError) as error:
+        except GoProConnectionError:
             return ""
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
+        except asyncio.TimeoutError:
             return ""
-            print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     async def sendCamera(self, param, value=""):
         value_notempty = ""
@@ -180,15 +230,12 @@ class GoPro:
             value_notempty = str('&p=%' + value)
         # sends parameter and value to /camera/
         try:
-            resp = await self._client.getText(
-                'http://' + self.ip_addr + '/camera/' + param + '?t=' +
-                self.getPassword() + value_notempty, timeout=5
-            )
-            self._handle_log("sendCamera({0}, {1}) > {2}".format(param, value, resp))
+            resp = await self._auth_request('/camera/' + param, value_notempty)
+            self._log.debug("sendCamera({0}, {1}) > {2}", param, value, resp)
             return resp
-        except (HTTPError, URLError) as error:
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
+        except GoProConnectionError as error:
+            print("Error:" + error.message + "\nMake sure the connection to the WiFi camera is still active.")
+        except asyncio.TimeoutError:
             print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     @deprecated
@@ -198,12 +245,10 @@ class GoPro:
         if value:
             value_notempty = str('&p=%' + value)
         try:
-            await self._client.getText(
-                'http://' + self.ip_addr + '/bacpac/' + param + '?t=' + self.getPassword() +
-                value_notempty, timeout=5)
-        except (HTTPError, URLError) as error:
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
-        except timeout:
+            await self._auth_request('/bacpac/' + param, value_notempty)
+        except GoProConnectionError as error:
+            print("Error:" + error.message + "\nMake sure the connection to the WiFi camera is still active.")
+        except asyncio.TimeoutError:
             print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     async def is_apitype(self, apitype):
@@ -214,6 +259,15 @@ class GoPro:
         # gpcontrol: HERO4 Black and Silver, HERO5 Black and Session,
         #   HERO Session (formally known as HERO4 Session), HERO+ LCD, HERO+.
         # auth: HERO2 with WiFi BacPac, HERO3 Black/Silver/White, HERO3+ Black and Silver.
+        if self._camera:
+            self._camera_cache['hits'] += 1
+            return self._camera
+        self._camera_cache['misses'] += 1
+        # concurrent callers (connect, is_apitype...) share one identification
+        return await self._client.single_flight.do(('whichCam',), 'http://' + self.ip_addr + '/gp/gpControl',
+                                                   self._identify_camera)
+
+    async def _identify_camera(self):
         if self._camera:
             return self._camera
         else:
@@ -239,10 +293,15 @@ class GoPro:
                 # Exceptions: HX (HeroSession), FS (Fusion), H18 (Hero 2018)
                 if int(response_parsed) > 3 or exception_found:
                     # print(jsondata["info"]["model_name"] + "\n" + jsondata["info"]["firmware_version"])
-                    await self.prepare_gpcontrol()
+                    await self.prepare_gpcontrol(jsondata["info"])
+                    self._schema_key = SchemaCache.key(model_type, jsondata["info"]["firmware_version"])
+                    self._schema = self._schema_cache.cached(self._schema_key)
+                    if self._schema is None:
+                        # built or read from disk when first needed
+                        self._schema_reply = jsondata
                     self._camera = CameraInfo(jsondata["info"]["model_name"], model_type, apitype,
                                               info=jsondata["info"])
-                    self._handle_log("detected camera ".format(self._camera.model), camera=self._camera)
+                    self._log.info("detected camera {0}", self._camera.model, camera=self._camera)
                 else:
                     raise CameraIdentificationError('Unsupported camera:' + response, 400)
 
@@ -250,50 +309,93 @@ class GoPro:
             except Exception as err:
                 raise CameraIdentificationError('Error identifying camera or no camera connected', 500, err)
 
-    async def getStatus(self, param=None, value=None):
+    async def getStatus(self, param=None, value=None, deadline=None, max_age=None):
+        """The StatusSnapshot of the camera, or with `param` and `value` one value of it.
+        A snapshot at most `max_age` seconds old is reused, with a status poller running
+        (start_status_poller) its latest snapshot is, instead of asking the camera again
+        """
         if (await self.is_apitype("gpcontrol")):
             try:
-                json_data = await self._client.getJSON("http://" + self.ip_addr + "/gp/gpControl/status", timeout=5)
-
+                snapshot = await self._status_snapshot(deadline, max_age)
                 if param and value:
-                    return json_data[param][value]
-                struct = reconstruct_status(json_data)
-                return struct
-            except (HTTPError, URLError) as error:
+                    values = getattr(snapshot, param)
+                    found = values.get(value)
+                    if found is None:
+                        raise KeyError(value)
+                    return found
+                return snapshot
+            except GoProConnectionError:
                 return ""
-                print("Error code:" + str(error.code) +
-                      "\nMake sure the connection to the WiFi camera is still active.")
-            except timeout:
+            except asyncio.TimeoutError:
                 return ""
-                print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
         else:
-            response = await self._client.getText("http://" + self.ip_addr + "/camera/sx?t=" + self.getPassword(),
-                                                  timeout=5)
+            response = await self._auth_request("/camera/sx", deadline=deadline)
             response_hex = str(bytes.decode(base64.b16encode(response), 'utf-8'))
             return str(response_hex[param[0]:param[1]])
 
+    async def _status_snapshot(self, deadline=None, max_age=None):
+        if self._poller is not None and self._poller.running:
+            return await self._poller.get(max_age, deadline)
+        if max_age is not None and self._snapshot is not None and self._snapshot.age <= max_age:
+            return self._snapshot
+        return await self._fetch_status(deadline)
+
+    async def _fetch_status(self, deadline=None):
+        json_data = await self._client.getJSON("http://" + self.ip_addr + "/gp/gpControl/status", timeout=5,
+                                               deadline=deadline)
+        snapshot = layout_for(await self._load_schema()).decode(json_data)
+        previous = self._snapshot
+        if previous is None or snapshot.timestamp >= previous.timestamp:
+            self._snapshot = snapshot
+            if self._changes.subscribed:
+                self._changes.publish(previous, snapshot)
+        return snapshot
+
+    async def wait_for(self, predicate, timeout=None, min_interval=0.1, max_interval=2.0):
+        """Wait until predicate(snapshot) holds and return that StatusSnapshot. The first
+        snapshot is a new one, then with a status poller running its snapshots are checked
+        (a failed poll raises its error), else the camera is asked again after min_interval
+        seconds, doubling up to max_interval. `timeout` (Deadline or seconds) raises
+        DeadlineExceeded when it passes
+        """
+        deadline = Deadline.of(timeout)
+        snapshot = await self._status_snapshot(deadline, max_age=0)
+        interval = min_interval
+        while not predicate(snapshot):
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded('Deadline for wait_for exceeded')
+            if self._poller is not None and self._poller.running:
+                try:
+                    polled = await self._poller.next(remaining)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded('Deadline for wait_for exceeded')
+                if polled is not None:
+                    snapshot = polled
+                    continue
+                # the poller stopped, ask the camera from here on
+            await asyncio.sleep(interval if remaining is None else min(interval, remaining))
+            interval = min(interval * 2, max_interval)
+            if deadline is not None:
+                deadline.check('wait_for')
+            snapshot = await self._fetch_status(deadline)
+        return snapshot
+
     async def getStatusRaw(self):
         if (await self.is_apitype("gpcontrol")):
             try:
-                return self._client.getText("http://" + self.ip_addr + "/gp/gpControl/status", timeout=5)
-            except (HTTPError, URLError) as error:
+                return await self._client.getText("http://" + self.ip_addr + "/gp/gpControl/status", timeout=5)
+            except GoProConnectionError:
                 return ""
-                print("Error code:" + str(error.code) +
-                      "\nMake sure the connection to the WiFi camera is still active.")
-            except timeout:
+            except asyncio.TimeoutError:
                 return ""
-                print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
         elif (await self.is_apitype("auth")):
             try:
-                return await self._client.getText("http://" + self.ip_addr + "/camera/sx?t=" + self.getPassword(),
-                                                  timeout=5)
-            except (HTTPError, URLError) as error:
+                return await self._auth_request("/camera/sx")
+            except GoProConnectionError:
                 return ""
-                print("Error code:" + str(error.code) +
-                      "\nMake sure the connection to the WiFi camera is still active.")
-            except timeout:
+            except asyncio.TimeoutError:
                 return ""
-                print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
         else:
             print("Error, camera not defined.")
 
@@ -303,22 +405,21 @@ class GoPro:
             return True
 
     async def infoCamera(self, option=""):
+        """Camera info, served from the CameraInfo cached by whichCam until the next connect
+        """
         if (await self.is_apitype("gpcontrol")):
             try:
-                parse_read = await self._client.getJSON('http://' + self.ip_addr + '/gp/gpControl', timeout=5)
+                info = (await self.whichCam()).info
                 parsed_info = ""
                 if option == "":
-                    parsed_info = parse_read["info"]
+                    parsed_info = info
                 else:
-                    parsed_info = parse_read["info"][option]
+                    parsed_info = info[option]
                 return parsed_info
-            except (HTTPError, URLError) as error:
+            except GoProConnectionError:
                 return ""
-                print("Error code:" + str(error.code) +
-                      "\nMake sure the connection to the WiFi camera is still active.")
-            except timeout:
+            except asyncio.TimeoutError:
                 return ""
-                print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
         elif (await self.is_apitype("auth")):
             if option == "model_name" or option == "firmware_version":
                 try:
@@ -326,48 +427,50 @@ class GoPro:
                     parsed = re.sub(r'\W+', '', str(data))
                     print(parsed)
                     return parsed  # an error is raised in take_photo if no value is returned
-                except (HTTPError, URLError) as error:
+                except GoProConnectionError:
                     return ""
-                    print("Error code:" + str(error.code) +
-                          "\nMake sure the connection to the WiFi camera is still active.")
-                except timeout:
+                except asyncio.TimeoutError:
                     return ""
-                    print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
             if option == "ssid":
                 try:
                     data = await self._client.getText('http://' + self.ip_addr + '/bacpac/cv', timeout=5)
                     parsed = re.sub(r'\W+', '', str(data))
                     print(parsed)
                     return parsed  # an error is raised in take_photo if no value is returned
-                except (HTTPError, URLError) as error:
+                except GoProConnectionError:
                     return ""
-                    print("Error code:" + str(error.code) +
-                          "\nMake sure the connection to the WiFi camera is still active.")
-                except timeout:
+                except asyncio.TimeoutError:
                     return ""
-                    print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
         else:
             print("Error, camera not defined.")
 
-    async def shutter(self, param):
+    async def shutter(self, param, deadline=None):
         if (await self.is_apitype("gpcontrol")):
-            return await self.gpControlCommand("shutter?p=" + param)
+            response = await self.gpControlCommand("shutter?p=" + param, deadline)
+            if self._poller is not None:
+                # the camera gets busy, follow it closely
+                self._poller.poke()
+            return response
         else:
             if len(param) == 1:
                 param = "0" + param
             return await self.sendBacpac("SH", param)
 
-    async def mode(self, mode, submode="0"):
-        """sets camera mode + optional submode
+    async def mode(self, mode, submode="0", deadline=None):
+        """sets camera mode + optional submode,
+        raises InvalidSettingError without a request when the camera's schema does not have it
         """
         result = None
         if (await self.is_apitype("gpcontrol")):
-            result = await self.gpControlCommand("sub_mode?mode=" + mode + "&sub_mode=" + submode)
+            schema = await self._load_schema()
+            if schema is not None:
+                schema.validate_mode(mode, submode)
+            result = await self.gpControlCommand("sub_mode?mode=" + mode + "&sub_mode=" + submode, deadline)
         else:
             if len(mode) == 1:
                 mode = "0" + mode
             result = await self.sendCamera("CM", mode)
-        self._handle_log("mode={0}, submode={1}: result={2}".format(mode, submode, result))
+        self._log.debug("mode={0}, submode={1}: result={2}", mode, submode, result)
         return result
 
     async def delete(self, option):
@@ -521,38 +624,106 @@ class GoPro:
                 videoFps = eval(x)
                 await self.sendCamera(constants.Hero3Commands.FRAME_RATE, videoFps)
 
-    async def take_photo(self, timer=1):
-        info = await self.infoCamera(constants.Camera.Name)
+    async def capabilities(self):
+        """Return the CapabilitySchema the camera published when it was identified
+        """
+        await self.whichCam()
+        return await self._load_schema()
+
+    async def _load_schema(self):
+        # the CapabilitySchema once the camera is identified, None before
+        if self._schema is None and self._schema_reply is not None:
+            self._schema = await asyncio.get_event_loop().run_in_executor(
+                None, self._schema_cache.get, self._schema_key, self._schema_reply)
+            self._schema_reply = None
+        return self._schema
+
+    async def apply_profile(self, profile, deadline=None):
+        """Apply {setting_id: value, ...}, sending only the settings that differ from the current ones.
+        Settings restricted by others (resolution limits the frame rates...) are sent after them,
+        independent ones together. Values the camera's schema rejects for the resulting
+        combination of settings fail without being sent. Returns {setting_id: {'result', 'previous', 'value', 'error'}}
+        with result one of 'unchanged', 'applied', 'skipped' or 'failed'
+        """
+        deadline = Deadline.of(deadline)
+        schema = await self.capabilities()
+        status = await self._client.getJSON("http://" + self.ip_addr + "/gp/gpControl/status", timeout=5,
+                                            deadline=deadline)
+        current = status["settings"]
+        report = {}
+        changed = {}
+        target = {int(setting): value for setting, value in current.items()}
+        for setting, value in profile.items():
+            previous = current.get(str(setting))
+            report[setting] = {'result': 'unchanged', 'previous': previous, 'value': value, 'error': None}
+            if previous is None or str(previous) != str(value):
+                changed[int(setting)] = setting
+            target[int(setting)] = value
+        for ident, setting in list(changed.items()):
+            try:
+                schema.validate_setting(ident, profile[setting], target, status["status"])
+            except InvalidSettingError as err:
+                report[setting]['result'], report[setting]['error'] = 'failed', err.message
+                del changed[ident]
+
+        async def apply(setting):
+            entry = report[setting]
+            try:
+                resp = await self.gpControlSet(str(setting), str(entry['value']), deadline=deadline)
+            except (HttpError, InvalidSettingError, DeadlineExceeded) as err:
+                entry['result'], entry['error'] = 'failed', err.message
+                return
+            if resp is None:
+                entry['result'] = 'skipped'
+            elif resp == "":
+                entry['result'], entry['error'] = 'failed', 'No reply from camera'
+            else:
+                entry['result'] = 'applied'
+
+        for stage in schema.apply_order(changed):
+            await asyncio.gather(*[apply(changed[setting]) for setting in stage])
+        return report
+
+    async def take_photo(self, timer=1, deadline=None):
+        """Take a photo and return its url. `deadline` (Deadline or seconds) bounds the whole
+        capture, the mode change gets at most a quarter of it
+        """
+        deadline = Deadline.of(deadline)
+        info = (await self.whichCam()).model
+        mode_deadline = deadline.split(0.25) if deadline else None
         if "HERO5 Black" in info or "HERO6" in info:
-            await self.mode(constants.Mode.PhotoMode, constants.Mode.SubMode.Photo.Single_H5)
+            await self.mode(constants.Mode.PhotoMode, constants.Mode.SubMode.Photo.Single_H5, mode_deadline)
         else:
-            await self.mode(constants.Mode.PhotoMode)
+            await self.mode(constants.Mode.PhotoMode, deadline=mode_deadline)
         if timer > 0:
-            self._sleep(timer)
+            await self._sleep(timer)
 
-        await self.shutter(constants.start)
+        await self.shutter(constants.start, deadline)
 
         if (await self.is_apitype("gpcontrol")):
-            ready = int(await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy))
-            while ready == 1:
-                    ready = int(await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy))
-            return await self.getMedia()
+            await self.wait_for(is_idle, deadline)
+            return await self.getMedia(deadline)
         elif (await self.is_apitype("auth")):
             raise UnsupportedCameraError()
 
-    async def shoot_video(self, duration=0):
-        await self.mode(constants.Mode.VideoMode)
+    async def shoot_video(self, duration=0, deadline=None):
+        """Record a video, for `duration` seconds if more than 2, and return its url.
+        `deadline` (Deadline or seconds) bounds the whole capture including the duration
+        """
+        deadline = Deadline.of(deadline)
+        if deadline is not None and duration > 2 and deadline.remaining() < duration + 1:
+            raise DeadlineExceeded('A {0}s video does not fit in {1!r}'.format(duration, deadline))
+        await self.mode(constants.Mode.VideoMode, deadline=deadline)
         await self._sleep(1)  # some time to change mode
-        await self.shutter(constants.start)
+        await self.shutter(constants.start, deadline)
 
         if duration != 0 and duration > 2:
             await self._sleep(duration)
+            # always stop what was started, the request timeouts still bound it
             await self.shutter(constants.stop)
             if (await self.is_apitype("gpcontrol")):
-                ready = int(await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy))
-                while ready == 1:
-                    ready = int(await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy))
-                return await self.getMedia()
+                await self.wait_for(is_idle, deadline)
+                return await self.getMedia(deadline)
             elif (await self.is_apitype("auth")):
                 raise UnsupportedCameraError
 
@@ -574,7 +745,7 @@ class GoPro:
             try:
                 res = await self.gpControlCommand('setup/date_time?p=' + datestr)
             except GoProError as err:
-                self._handle_log("Error {0} syncing time".format(err.error_code), err=err)
+                self._log.warning("Error {0} syncing time", err.error_code, err=err)
                 res = None
         else:
             res = await self.sendCamera("TM", datestr)
@@ -587,29 +758,27 @@ class GoPro:
         if zoomLevel >= 0 and zoomLevel <= 100:
             await self.gpControlCommand("digital_zoom?range_pcnt=" + zoomLevel)
 
-    async def getMedia(self):
+    async def getMedia(self, deadline=None):
         """Return url for media
         """
-        if "FS" in (await self.infoCamera(constants.Camera.Firmware)):
+        if (await self.whichCam()).is_fusion:
             await self.getMediaFusion()
         else:
             folder = ""
             file_lo = ""
             try:
-                json_parse = await self._client.getJSON('http://' + self.ip_addr + ':8080/gp/gpMediaList')
+                json_parse = await self._client.getJSON('http://' + self.ip_addr + ':8080/gp/gpMediaList',
+                                                        deadline=deadline)
                 for i in json_parse['media']:
                     folder = i['d']
                 for i in json_parse['media']:
                     for i2 in i['fs']:
                         file_lo = i2['n']
                 return "http://" + self.ip_addr + ":8080/videos/DCIM/" + folder + "/" + file_lo
-            except (HTTPError, URLError) as error:
+            except GoProConnectionError:
                 return ""
-                print("Error code:" + str(error.code) +
-                      "\nMake sure the connection to the WiFi camera is still active.")
-            except timeout:
+            except asyncio.TimeoutError:
                 return ""
-                print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     def getMediaFusion(self):
         folder_1 = ""
@@ -637,12 +806,10 @@ class GoPro:
             return [
                 "http://" + self.ip_addr + ":8080/videos/DCIM/" + folder_1 + "/" + file_1,
                 "http://" + self.ip_addr + ":8080/videos2/DCIM/" + folder_2 + "/" + file_2]
-        except (HTTPError, URLError) as error:
+        except (HTTPError, URLError):
             return ""
-            print("Error code:" + str(error.code) + "\nMake sure the connection to the WiFi camera is still active.")
         except timeout:
             return ""
-            print("HTTP Timeout\nMake sure the connection to the WiFi camera is still active.")
 
     async def getMediaInfo(self, option):
         """Return MediaInfo about last record in MediaList
@@ -652,7 +819,7 @@ class GoPro:
         size = "0"
         json_parse = await self._client.getJSON('http://' + self.ip_addr + ':8080/gp/gpMediaList')
 
-        if "FS" in (await self.infoCamera(constants.Camera.Firmware)):
+        if (await self.whichCam()).is_fusion:
             json_parse = json_parse[0]
         for i in json_parse['media']:
             folder = i['d']
@@ -663,13 +830,13 @@ class GoPro:
 
         return MediaInfo(file, folder, int(size))
 
-    async def listMedia(self, format=True, media_array=True):
+    async def listMedia(self, format=True, media_array=True, deadline=None):
         """Returns a list of media records
         If format is False you get the raw parsed JSON.
         If media_array is True you will get an array MediaInfo
         If media_array is False you will get a comma separated string of filenames
         """
-        parsed_resp = await self._client.getJSON('http://' + self.ip_addr + ':8080/gp/gpMediaList')
+        parsed_resp = await self._client.getJSON('http://' + self.ip_addr + ':8080/gp/gpMediaList', deadline=deadline)
         if not parsed_resp:
             return []
 
@@ -678,16 +845,16 @@ class GoPro:
 
         if media_array is True:
             media = []
-            if "FS" in await self.infoCamera(constants.Camera.Firmware):
+            if (await self.whichCam()).is_fusion:
                 medialength = len(parsed_resp)
                 for i in range(medialength):
                     for folder in parsed_resp[i]['media']:
                         for item in folder['fs']:
-                            media.append(MediaInfo(folder['d'], item['n'], item['s']))
+                            media.append(MediaInfo(folder['d'], item['n'], item['s'], item.get('mod')))
             else:
                 for i in parsed_resp['media']:
                     for i2 in i['fs']:
-                        media.append(MediaInfo(i['d'], i2['n'], i2['s']))
+                        media.append(MediaInfo(i['d'], i2['n'], i2['s'], i2.get('mod')))
             return media
         else:
             medialength = len(parsed_resp)
@@ -704,9 +871,9 @@ class GoPro:
     # Misc media utils
     #
 
-    async def IsBusy(self):
+    async def IsBusy(self, deadline=None, max_age=None):
         if (await self.is_apitype("gpcontrol")):
-            return (await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy))
+            return (await self.getStatus(constants.Status.Status, constants.Status.STATUS.IsBusy, deadline, max_age))
 
         raise UnsupportedCameraError()
 
@@ -762,12 +929,12 @@ class GoPro:
         if (await self.IsBusy()) == 0:
             if path == "":
                 media = await self.getMediaInfo()
-                self._handle_log("downloadLastMedia - filename:{0} size: {1}".format(media.name, media.size), media=media)
+                self._log.info("downloadLastMedia - filename:{0} size: {1}", media.name, media.size, media=media)
                 if custom_filename == "":
                     custom_filename = "{0}-{1}".format(media.folder, media.name)
 
                 media = await self.getMedia()
-                if "FS" in (await self.infoCamera(constants.Camera.Firmware)):
+                if (await self.whichCam()).is_fusion:
                     await asyncio.gather(
                         self._client.download(media[0].replace("JPG", "GPR"), "100GBACK-{0}".format(media.name)),
                         self._client.download(media[1].replace("JPG", "GPR"), "100GFRNT-{0}".format(media.name))
@@ -775,7 +942,7 @@ class GoPro:
                 else:
                     await self._client.download(media, custom_filename)
             else:
-                self._handle_log("filename: " + self.getInfoFromURL(path)[1])
+                self._log.info("filename: {0}", path)
                 filename = ""
                 if custom_filename == "":
                     filename = self.getInfoFromURL(path)[0] + "-" + self.getInfoFromURL(path)[1]
@@ -785,30 +952,65 @@ class GoPro:
         else:
             print("Not supported while recording or processing media.")
 
-    async def downloadMedia(self, media, custom_filename=""):
+    async def downloadMedia(self, media, custom_filename="", segments=None, hedge=None, deadline=None):
+        """Download media (a MediaInfo) to working_path.
+        `segments` > 1 fetches large files as that many concurrent byte ranges (unhashed, the
+        client needs digest None),
+        `hedge` is a goprocam.hedging.HedgePolicy or HedgeGroup for straggler mitigation,
+        `deadline` a Deadline or seconds.
+        The length is checked against media.size, returns a clients.DownloadResult
+        which is also recorded in the manifest when there is one
+        """
         if not isinstance(media, MediaInfo):
             raise Exception('Wrong parameter type for media')
 
-        if (await self.IsBusy()) == 0:
+        deadline = Deadline.of(deadline)
+        if (await self.IsBusy(deadline)) == 0:
             filename = ""
             if custom_filename == "":
                 filename = media.name
             else:
                 filename = custom_filename
 
-            self._handle_log("downloadMedia - Downloading {3} bytes {0}/{1} to {2}".format(
-                media.folder, media.name, filename, self.parse_value("media_size", media.size)))
-            await self._client.download("http://" + self.ip_addr + ":8080/videos/DCIM/" + media.folder + "/" + media.name, filename)
+            self._log.info("downloadMedia - Downloading {0.size_readable} {0.folder}/{0.name} to {1}", media, filename)
+            result = await self._client.download(self.media_url(media), filename,
+                                                 size=int(media.size), segments=segments, hedge=hedge,
+                                                 deadline=deadline)
+            if self.manifest is not None:
+                await self.manifest.record(media, result)
+            return result
         else:
             raise Exception("Not supported while recording or processing media.")
 
-    async def downloadAll(self, option=""):
+    def media_url(self, media):
+        """Return the download url for a MediaInfo, urls are returned as they are
+        """
+        if isinstance(media, MediaInfo):
+            return "http://" + self.ip_addr + ":8080/videos/DCIM/" + media.folder + "/" + media.name
+        return media
+
+    def open_media(self, media, chunk_size=None):
+        """Stream media (MediaInfo or url) without touching the disk.
+        Returns an async iterator of memoryview chunks, see clients.MediaStream
+        """
+        return self._client.stream(self.media_url(media), chunk_size)
+
+    async def fetch_media_bytes(self, media):
+        """Return the content of media (MediaInfo or url) as a bytearray
+        """
+        size = int(media.size) if isinstance(media, MediaInfo) else None
+        return await self._client.fetch_bytes(self.media_url(media), size)
+
+    async def downloadAll(self, option="", hedge=None, deadline=None):
         """Downloads all media with folder-filename naming
         option "video" only downloads MP4 and "photos" only JPG
+        hedge is an optional HedgePolicy, files lagging behind the others are re-issued
+        deadline (Deadline or seconds) bounds the listing and all downloads
         Returns list of downloaded files
         """
+        deadline = Deadline.of(deadline)
         media_stash = []
-        files = await self.listMedia()
+        files = await self.listMedia(deadline=deadline)
         filtered_files = files
 
         if option == "videos":
@@ -816,9 +1018,12 @@ class GoPro:
         elif option == "photos":
             filtered_files = [fil for fil in files if fil.name.endswith("JPG")]
 
+        if hedge is None:
+            hedge = self._client.hedge_policy
+        group = HedgeGroup(hedge) if hedge is not None else None
         tasks = []
         for fil in filtered_files:
-            tasks.append(self.downloadMedia(fil, "{0}-{1}".format(fil.folder, fil.name)))
+            tasks.append(self.downloadMedia(fil, "{0}-{1}".format(fil.folder, fil.name), hedge=group, deadline=deadline))
             media_stash.append(fil)
         await asyncio.gather(*tasks)
         return media_stash
@@ -907,7 +1112,7 @@ class GoPro:
                     'http://' + self.ip_addr + ':8080/gp/gpMediaMetadata?p=' + folder +
                     "/" + file + '&t=videoinfo')
             jsondata = json.loads(data)
-            self._log_handler("getVideoInfo({0}, {1}, {2}) > {3}".format(option, folder, file, data), result=jsondata[option])
+            self._log.debug("getVideoInfo({0}, {1}, {2}) > {3}", option, folder, file, data, result=jsondata[option])
             return jsondata[option]  # dur/tag_count/tags/profile/w/h
 
     def getPhotoInfo(self, option="", folder="", file=""):
@@ -969,7 +1174,7 @@ class GoPro:
 
     async def getClip(self, file, resolution, frame_rate, start_ms, stop_ms):
         out = ""
-        if "HERO4" in (await self.infoCamera("model_name")):
+        if (await self.whichCam()).is_hero4:
             out = await self.gpControlCommand(
                 "transcode/request?source=DCIM/" + file + "&res=" + resolution + "&fps_divisor=" +
                 frame_rate + "&in_ms=" + start_ms + "&out_ms=" + stop_ms)
@@ -1017,7 +1222,7 @@ class GoPro:
     def stream(self, addr, quality=""):
         self.livestream("start")
         if self.whichCam() == "gpcontrol":
-            if "HERO4" in self.infoCamera("model_name"):
+            if self._camera and self._camera.is_hero4:
                 if quality == "high":
                     self.streamSettings("2400000", "6")
                 elif quality == "medium":
@@ -1040,160 +1245,46 @@ class GoPro:
         self.gpControlSet("62", bitrate)
         self.gpControlSet("64", resolution)
 
-    def parse_value(self, param, value):
+    def parse_value(self, param, value, mode=None):
+        """The label of a status or setting value. A sub_mode is labelled in
+        `mode`, by default the Mode of the last getStatus(), nothing is requested.
+        """
         if param == "video_left":
-            return str(time.strftime("%H:%M:%S", time.gmtime(value)))
+            return Parsers.video_left(value)
         if param == "rem_space":
-            if value == 0:
-                return "No SD"
-            ammnt = 1000
-            if self.whichCam() == "gpcontrol" and self.infoCamera("model_name") == "HERO4 Session":
-                ammnt = 1
-            size_bytes = value * ammnt
-            size_name = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-            i = int(math.floor(math.log(size_bytes, 1024)))
-            p = math.pow(1024, i)
-            size = round(size_bytes / p, 2)
-            storage = "" + str(size) + str(size_name[i])
-            return str(storage)
+            return Parsers.rem_space(value, getattr(self._camera, 'model', None))
         if param == "media_size":
-            if isinstance(value, str):
-                value = float(value)
-            size_bytes = value
-            size_name = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-            i = int(math.floor(math.log(size_bytes, 1024)))
-            p = math.pow(1024, i)
-            size = round(size_bytes / p, 2)
-            storage = "" + str(size) + str(size_name[i])
-            return str(storage)
-        if self.whichCam() == "gpcontrol":
-            if param == "mode":
-                if value == 0:
-                    return "Video"
-                if value == 1:
-                    return "Photo"
-                if value == 2:
-                    return "Multi-Shot"
-            if param == "sub_mode":
-                if self.getStatus(constants.Status.Status, constants.Status.STATUS.Mode) == 0:
-                    if value == 0:
-                        return "Video"
-                    if value == 1:
-                        return "TimeLapse Video"
-                    if value == 2:
-                        return "Video+Photo"
-                    if value == 3:
-                        return "Looping"
-
-                if self.getStatus(constants.Status.Status, constants.Status.STATUS.Mode) == 1:
-                    if value == 0:
-                        return "Single Pic"
-                    if value == 1:
-                        return "Burst"
-                    if value == 2:
-                        return "NightPhoto"
-
-                if self.getStatus(constants.Status.Status, constants.Status.STATUS.Mode) == 2:
-                    if value == 0:
-                        return "Burst"
-                    if value == 1:
-                        return "TimeLapse"
-                    if value == 2:
-                        return "Night lapse"
-
-            if param == "recording":
-                if value == 0:
-                    return "Not recording - standby"
-                if value == 1:
-                    return "RECORDING!"
-
-            if param == "battery":
-                if value == 0:
-                    return "Nearly Empty"
-                if value == 1:
-                    return "LOW"
-                if value == 2:
-                    return "Halfway"
-                if value == 3:
-                    return "Full"
-                if value == 4:
-                    return "Charging"
-
-            if param == "video_res":
-                if value == 1:
-                    return "4k"
-                elif value == 2:
-                    return "4kSV"
-                elif value == 4:
-                    return "2k"
-                elif value == 5:
-                    return "2kSV"
-                elif value == 6:
-                    return "2k4by3"
-                elif value == 7:
-                    return "1440p"
-                elif value == 8:
-                    return "1080pSV"
-                elif value == 9:
-                    return "1080p"
-                elif value == 10:
-                    return "960p"
-                elif value == 11:
-                    return "720pSV"
-                elif value == 12:
-                    return "720p"
-                elif value == 13:
-                    return "480p"
-                elif value == 14:
-                    return "5.2K"
-                elif value == 15:
-                    return "3K"
-                else:
-                    return "out of scope"
-            if param == "video_fr":
-                if value == 0:
-                    return "240"
-                elif value == 1:
-                    return "120"
-                elif value == 2:
-                    return "100"
-                elif value == 5:
-                    return "60"
-                elif value == 6:
-                    return "50"
-                elif value == 7:
-                    return "48"
-                elif value == 8:
-                    return "30"
-                elif value == 9:
-                    return "25"
-                elif value == 10:
-                    return "24"
-                else:
-                    return "out of scope"
-        else:
+            return media_size(value)
+        if self._camera and getattr(self._camera, 'apitype', self._camera) != "gpcontrol":
             raise UnsupportedCameraError()
-
-    async def overview(self, mapped=False):
+        labels = labels_for(self._schema)
+        if param == "sub_mode":
+            if mode is None and self._snapshot is not None:
+                mode = self._snapshot.status.Mode
+            return labels.sub_mode(mode, value)
+        if param == "video_res":
+            return labels.video_res(value)
+        if param == "video_fr":
+            return labels.video_fr(value)
+        if param in ("mode", "recording", "battery"):
+            return getattr(labels, param)(value)
+        return None
+
+    async def overview(self, mapped=False, max_age=None):
+        """The StatusSnapshot of the camera, or with `mapped` the main values of it as labels.
+        `max_age` as in getStatus()
+        """
         if (await self.is_apitype("gpcontrol")):
-            overview = await self.getStatus()
+            overview = await self.getStatus(max_age=max_age)
             if mapped:
-                overview.status.SubMode = Parsers.sub_mode(overview.status.Mode, overview.status.SubMode)
-                overview.status.Mode = Parsers.mode(overview.status.Mode)
-
-                overview.status.RemVideoTime = Parsers.video_left(overview.status.RemVideoTime)
-                overview.status.BatteryLevel = Parsers.battery(overview.status.BatteryLevel)
-                overview.status.RemainingSpace = Parsers.rem_space(overview.status.RemainingSpace, self._camera.model)
-                overview.status.IsBusy = Parsers.recording(overview.status.IsBusy)
-
-                overview.settings.Resolution = Parsers.video_res(overview.settings.Resolution)
-                overview.settings.Framerate = Parsers.video_fr(overview.settings.Framerate)
+                return labels_for(self._schema).decode(overview, self._camera.model)
             return overview
         raise UnsupportedCameraError()
 
     async def connect(self, camera='detect'):
-        self._handle_log('#connect - ' + camera)
+        self._log.info('#connect - {0}', camera)
         if camera == "detect":
+            self.invalidate_camera()
             self._camera = await self.whichCam()
             self._handle_connect(self._camera)
         elif camera == "startpair":
@@ -1210,8 +1301,91 @@ class GoPro:
             print("Connected to " + self.ip_addr)
 
     async def quit(self):
+        await self.stop_status_poller()
         await self._client.quit()
 
+    def start_status_poller(self, busy_interval=0.25, idle_interval=2.0, **options):
+        """Keep the status of the camera up to date in the background, every busy_interval
+        seconds while it is busy and slowing down to idle_interval while idle. getStatus,
+        IsBusy and overview then read its snapshot. `options` are passed on to StatusPoller
+        """
+        # kept until stop_status_poller, also when status_changes started it
+        self._changes_poller = None
+        if self._poller is None or not self._poller.running:
+            self._poller = StatusPoller(self._fetch_status, busy_interval, idle_interval, log=self._log, **options)
+            self._poller.start()
+        return self._poller
+
+    async def stop_status_poller(self):
+        if self._poller is not None:
+            await self._poller.stop()
+            self._poller = None
+
+    def status_changes(self, status=None, settings=None, max_queued=64, **poller_options):
+        """Async iterator over the StatusDeltas of the camera, (id, old, new) of the
+        `status` and `settings` ids that changed (all without either). Starts the status
+        poller with `poller_options` if it is not running and stops it again when the
+        last iterator is closed, see StatusChanges
+        """
+        if self._poller is None or not self._poller.running:
+            self._changes_poller = self.start_status_poller(**poller_options)
+        return self._changes.subscribe(status, settings, max_queued)
+
+    def _changes_closed(self):
+        if self._changes_poller is not None and self._changes_poller is self._poller:
+            self._poller.cancel()
+            self._poller = None
+        self._changes_poller = None
+
+    def status_poller_stats(self):
+        """Polls, errors and cache hits of the status poller, None without one
+        """
+        return dict(self._poller.stats) if self._poller is not None else None
+
+    def set_download_rate(self, rate, burst=None):
+        """Limit downloads from this camera to rate bytes per second, None for no limit
+        """
+        self._client.throttle.set_rate(rate, burst)
+
+    def pool_stats(self):
+        """Connection pool statistics (reuse rate, wait time...) per pool
+        """
+        return self._client.pool_stats()
+
+    def scheduler_stats(self):
+        """Queue depth and wait time of interactive and bulk requests
+        """
+        return self._client.scheduler.snapshot()
+
+    def invalidate_camera(self):
+        """Forget the cached CameraInfo, schema and password, the next whichCam or infoCamera asks the camera again
+        """
+        self._camera = ""
+        self._schema = None
+        self._schema_reply = None
+        self._password = None
+
+    def camera_cache_stats(self):
+        """Hits and misses of the cached CameraInfo behind whichCam and infoCamera
+        """
+        return dict(self._camera_cache)
+
+    def request_metrics(self):
+        """Latency histograms (dns, connect, first byte, total), bytes and errors per
+        endpoint class, as a snapshot dict
+        """
+        return self._client.metrics.snapshot()
+
+    def retry_stats(self):
+        """Retry counters and circuit breaker state of this camera
+        """
+        return {'retry': self._client.retry.stats.as_dict(), 'breaker': self._client.breaker.as_dict()}
+
+    def coalesce_stats(self):
+        """Requests and coalesced requests per read-only endpoint
+        """
+        return self._client.single_flight.snapshot()
+
     def on_connect(self):
         def decorator(handler):
             self._connect_handler = handler
@@ -1222,12 +1396,21 @@ class GoPro:
         if self._connect_handler is not None:
             self._connect_handler(camera)
 
-    def on_log(self):
+    def on_status_change(self, status=None, settings=None):
+        """Decorator for a handler(delta) called with the StatusDelta of each new snapshot that
+        changes one of the `status` or `settings` ids (all without either), only their changes in it.
+        Snapshots come from getStatus and the like or the status poller
+        """
         def decorator(handler):
-            self._log_handler = handler
+            self._changes.add_handler(handler, status, settings)
             return handler
         return decorator
 
-    def _handle_log(self, message, **kwargs):
-        if self._log_handler is not None:
-            self._log_handler(message, **kwargs)
+    def on_log(self, level=logging.DEBUG):
+        """Decorator for a handler(message, **details) that gets the log messages of level and up.
+        Messages also go to the stdlib logger 'goprocam.GoProCamera'
+        """
+        def decorator(handler):
+            self._log.set_handler(handler, level)
+            return handler
+        return decorator
@@ -0,0 +1,198 @@
+import asyncio
+import collections
+
+__all__ = ['StatusDelta', 'StatusChanges', 'ChangeFeed', 'changes']
+
+
+def changes(old, new):
+    """(id, old value, new value) of the values that differ between two
+    StatusValues, by id, None for a value that is not reported
+    >>> from goprocam.status import layout_for
+    >>> layout = layout_for()
+    >>> before = layout.decode({'status': {'8': 0, '2': 3}}).status
+    >>> changes(before, layout.decode({'status': {'8': 1, '2': 3, '70': 50}}).status)
+    [(8, 0, 1), (70, None, 50)]
+    """
+    if len(old) == len(new):
+        if old == new and old.extra == new.extra:
+            return []
+        idents = [ident for ident, (before, after) in enumerate(zip(old, new)) if before != after]
+        if old.extra or new.extra:
+            idents = sorted(set(idents).union(old.extra or (), new.extra or ()))
+    else:
+        # decoded with different layouts, e.g. before and after the schema was loaded
+        idents = sorted(set(ident for ident, _ in old.items()).union(ident for ident, _ in new.items()))
+    delta = []
+    for ident in idents:
+        before, after = old.get(ident), new.get(ident)
+        if before != after:
+            delta.append((ident, before, after))
+    return delta
+
+
+def _filters(status, settings):
+    """The status and settings ids to subscribe to as frozensets, None for all of them
+    when neither is given, else none of the one not given
+    """
+    if status is None and settings is None:
+        return None, None
+    return frozenset(int(ident) for ident in status or ()), frozenset(int(ident) for ident in settings or ())
+
+
+def _only(delta, idents):
+    if idents is None:
+        return delta
+    return [change for change in delta if change[0] in idents]
+
+
+def _merged(first, second):
+    # first then second as one delta, dropping what changed back
+    merged = {ident: [before, after] for ident, before, after in first}
+    for ident, before, after in second:
+        if ident in merged:
+            merged[ident][1] = after
+        else:
+            merged[ident] = [before, after]
+    return [(ident, before, after) for ident, (before, after) in sorted(merged.items()) if before != after]
+
+
+class StatusDelta:
+    """What changed between two successive StatusSnapshots of a camera:
+    `status` and `settings` are lists of (id, old value, new value) and
+    `timestamp` is the one of the newer snapshot. It is false when nothing changed.
+    """
+    __slots__ = ('timestamp', 'status', 'settings')
+
+    def __init__(self, timestamp, status, settings):
+        self.timestamp = timestamp
+        self.status = status
+        self.settings = settings
+
+    def __bool__(self):
+        return bool(self.status or self.settings)
+
+    def only(self, status=None, settings=None):
+        """The changes of the `status` and `settings` ids (frozensets of ints, None for all)
+        """
+        return StatusDelta(self.timestamp, _only(self.status, status), _only(self.settings, settings))
+
+    def then(self, later):
+        """This delta followed by `later` as one, from the old values of this one
+        to the new values of `later`
+        >>> StatusDelta(1.0, [(8, 0, 1), (70, 50, 49)], []).then(StatusDelta(2.0, [(8, 1, 0)], [])).status
+        [(70, 50, 49)]
+        """
+        return StatusDelta(later.timestamp, _merged(self.status, later.status), _merged(self.settings, later.settings))
+
+    def __repr__(self):
+        return '<StatusDelta of {0:.3f} status {1} settings {2}>'.format(self.timestamp, self.status, self.settings)
+
+
+class StatusChanges:
+    """Async iterator over the StatusDeltas of a camera, only the changes of
+    the subscribed `status` and `settings` ids (all without either) and only
+    the deltas that have some. Deltas queue up until they are read, at most
+    `max_queued` of them: past that a new delta is merged into the last one
+    queued, so a slow reader gets fewer, larger deltas and ends with the
+    same values. close() or leaving `async with` unsubscribes:
+
+        async with cam.status_changes(status=[8]) as changes:
+            async for delta in changes:
+                for ident, old, new in delta.status:
+                    ...
+    """
+    def __init__(self, feed, status=None, settings=None, max_queued=64):
+        self.feed = feed
+        self.status, self.settings = _filters(status, settings)
+        self.max_queued = max_queued
+        self.merged = 0
+        self._deltas = collections.deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def deliver(self, delta):
+        if self.status is not None or self.settings is not None:
+            delta = delta.only(self.status, self.settings)
+            if not delta:
+                return
+        if len(self._deltas) >= self.max_queued:
+            self.merged += 1
+            delta = self._deltas.pop().then(delta)
+            if not delta:
+                return
+        self._deltas.append(delta)
+        self._ready.set()
+
+    def close(self):
+        self._closed = True
+        self.feed.unsubscribe(self)
+        self._ready.set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._deltas:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._deltas.popleft()
+
+
+class ChangeFeed:
+    """Hands the StatusDelta between the successive snapshots of one camera to
+    on_status_change handlers and StatusChanges iterators. Nothing is
+    compared while there are none. `closed` is called once the last
+    iterator is closed.
+    """
+    def __init__(self, log=None, closed=None):
+        # (status ids, settings ids, handler)
+        self.handlers = []
+        self.subscribers = []
+        self._log = log
+        self._closed = closed
+
+    @property
+    def subscribed(self):
+        return bool(self.handlers or self.subscribers)
+
+    def add_handler(self, handler, status=None, settings=None):
+        self.handlers.append(_filters(status, settings) + (handler,))
+
+    def subscribe(self, status=None, settings=None, max_queued=64):
+        subscriber = StatusChanges(self, status, settings, max_queued)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+            if not self.subscribers and self._closed is not None:
+                self._closed()
+
+    def publish(self, old, new):
+        """Hand on what changed from snapshot old (None for the first one) to new
+        """
+        if old is None:
+            return
+        delta = StatusDelta(new.timestamp, changes(old.status, new.status), changes(old.settings, new.settings))
+        if not delta:
+            return
+        for status, settings, handler in list(self.handlers):
+            handled = delta if status is None and settings is None else delta.only(status, settings)
+            if handled:
+                try:
+                    handler(handled)
+                except Exception as err:
+                    # a failing handler must not fail the status request that found the change
+                    if self._log is not None:
+                        self._log.warning('on_status_change handler {0!r} failed: {1!r}', handler, err)
+        for subscriber in list(self.subscribers):
+            subscriber.deliver(delta)
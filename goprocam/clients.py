@@ -1,7 +1,8 @@
 import asyncio
 import aiohttp
+import hashlib
 import os
-import json
+import time
 import posixpath
 from os import path
 try:
@@ -10,48 +11,310 @@ try:
 except ImportError:  # Python 3
     from urllib.parse import urlsplit, unquote
 
-from .errors import HttpError, GoProError, GoProConnectionError
+from .errors import HttpError, GoProError, GoProConnectionError, DownloadError, DeadlineExceeded
+from .pool import ConnectionPool
+from .hedging import HedgeGroup, HedgePolicy, Transfer
+from .sinks import BufferPool, FileSink, preallocate
+from .throttle import Throttle
+from .scheduler import RequestScheduler, INTERACTIVE, classify
+from .jsoncodec import JSONDecoder
+from .singleflight import SingleFlight, COALESCED_PATHS
+from .retry import RetryPolicy, CircuitBreaker, is_transport_error
+from .timeouts import Deadline, TimeoutPolicy, DOWNLOAD
+from .metrics import RequestMetrics
 
-__all__ = ['AsyncClient']
+__all__ = ['AsyncClient', 'MediaStream', 'DownloadResult']
+
+# a read timeout on an open transfer, as opposed to not getting a connection
+STALL_ERRORS = getattr(aiohttp, 'SocketTimeoutError', aiohttp.ServerTimeoutError)
+
+PART_SUFFIX = '.part'
+# segmented downloads leave holes, keep them apart from resumable .part files
+SEGMENTED_SUFFIX = '.seg' + PART_SUFFIX
 
 
 class AsyncClient:
-    def __init__(self, working_path=None, **kwargs):
-        self._session = None
-        self.download_semaphore = asyncio.Semaphore(kwargs.pop('download_semaphore', 4))
+    """HTTP client used by GoPro
+
+    Pass `pool` to share a ConnectionPool between several clients, otherwise
+    a private pool is created from `limit_per_host`, `keepalive_timeout`,
+    `media_limit_per_host` and `media_keepalive_timeout`. Its media limit
+    defaults to a connection for each of the `segments` ranges of
+    `download_semaphore` downloads, at least 4.
+
+    Downloads are written to disk by a goprocam.sinks.FileSink, tuned with
+    `write_executor`, `write_queue` (buffers in flight per file) and `fsync`.
+
+    Download bandwidth is limited by `self.throttle`, set up from
+    `download_rate` (bytes/s), `download_burst`, `shared_bucket` (a
+    TokenBucket shared between cameras) and `yield_to_control`.
+
+    Every request holds a slot of `self.scheduler` while it runs, at most
+    `max_requests` at a time of which `reserved_interactive` are kept free
+    for control and status calls. By default there are enough bulk slots for
+    `download_semaphore` downloads of `segments` ranges each, no more than
+    the media pool has connections.
+
+    Downloads are hashed with `digest` (a hashlib algorithm name, None to
+    skip) while they stream in. Segmented downloads can not be, they need
+    `digest` None.
+
+    JSON bodies are decoded from bytes by `self.decoder`, orjson when it is
+    installed or `json_loads` when given. Bodies over `json_offload` bytes
+    are decoded in a worker thread.
+
+    Concurrent identical getText/getJSON calls to the read-only endpoints in
+    `coalesce` (default singleflight.COALESCED_PATHS) share one request.
+
+    getText and getJSON are retried by `self.retry` (a goprocam.retry.RetryPolicy,
+    `retry` option) and go through `self.breaker`, a CircuitBreaker that fails
+    them fast with CircuitOpenError once the camera stopped answering.
+    Downloads check the breaker too and back off with the same policy.
+
+    Requests get the aiohttp.ClientTimeout of their class from `self.timeouts`
+    (a goprocam.timeouts.TimeoutPolicy, `timeouts` option). Downloads have no
+    total but give up a transfer that sends nothing for `stall_timeout`
+    seconds and resume it. Everything takes an optional Deadline.
+
+    `self.metrics` keeps latency histograms, bytes and errors per endpoint
+    class, see goprocam.metrics.
+    """
+    def __init__(self, working_path=None, pool=None, **kwargs):
+        self._owns_pool = pool is None
+        if pool is None:
+            pool_options = {}
+            for key in ('limit', 'limit_per_host', 'keepalive_timeout',
+                        'media_limit_per_host', 'media_keepalive_timeout'):
+                if key in kwargs:
+                    pool_options[key] = kwargs.pop(key)
+            if 'media_limit_per_host' not in pool_options:
+                # more segments than connections would only queue in the connector
+                pool_options['media_limit_per_host'] = max(
+                    4, kwargs.get('download_semaphore', 4) * kwargs.get('segments', 1))
+            pool = ConnectionPool(**pool_options)
+        self.pool = pool
+        downloads = kwargs.pop('download_semaphore', 4)
+        self.download_semaphore = asyncio.Semaphore(downloads)
         self.chunk_size = kwargs.pop('chunk_size', 64 * 1024)
+        self.download_retries = kwargs.pop('download_retries', 3)
+        self.retry_delay = kwargs.pop('retry_delay', 1.0)
+        self.segments = kwargs.pop('segments', 1)
+        self.min_segment_size = kwargs.pop('min_segment_size', 8 * 1024 * 1024)
+        self.hedge_policy = kwargs.pop('hedge', None)
+        self.write_executor = kwargs.pop('write_executor', None)
+        self.write_queue = kwargs.pop('write_queue', 4)
+        self.fsync = kwargs.pop('fsync', None)
+        self.buffer_pool = BufferPool(self.chunk_size)
+        self.throttle = Throttle(kwargs.pop('download_rate', None), kwargs.pop('download_burst', None),
+                                 kwargs.pop('shared_bucket', None), kwargs.pop('yield_to_control', True))
+        reserved = kwargs.pop('reserved_interactive', 1)
+        bulk = min(downloads * self.segments, self.pool.limit_per_host(ConnectionPool.MEDIA))
+        self.scheduler = RequestScheduler(kwargs.pop('max_requests', bulk + reserved), reserved)
+        self.digest = kwargs.pop('digest', 'sha256')
+        self._check_digest(self.segments)
+        self.decoder = JSONDecoder(kwargs.pop('json_loads', None), kwargs.pop('json_offload', 256 * 1024))
+        self.single_flight = SingleFlight(kwargs.pop('coalesce', COALESCED_PATHS))
+        self.retry = kwargs.pop('retry', None) or RetryPolicy()
+        self.breaker = kwargs.pop('breaker', None) or CircuitBreaker()
+        self.timeouts = TimeoutPolicy(kwargs.pop('timeouts', None))
+        stall_timeout = kwargs.pop('stall_timeout', None)
+        if stall_timeout is not None:
+            base = self.timeouts.timeouts[DOWNLOAD]
+            self.timeouts.timeouts[DOWNLOAD] = aiohttp.ClientTimeout(total=base.total, connect=base.connect,
+                                                                     sock_read=stall_timeout)
+        self.stalls = 0
+        self.metrics = RequestMetrics()
         self.working_path = working_path
 
-    def session(self):
-        if not self._session:
-            self._session = aiohttp.ClientSession()
-        return self._session
+    def session(self, url=None):
+        """Return the session for the pool serving url, control pool if no url
+        """
+        if url is None:
+            return self.pool.session(ConnectionPool.CONTROL)
+        return self.pool.session_for(url)
+
+    def pool_stats(self):
+        return self.pool.snapshot()
+
+    def request(self, url, priority=None, deadline=None, **kwargs):
+        """Return a ScheduledRequest for GET url, `priority` is INTERACTIVE
+        or BULK and derived from the url when not given. `timeout` is a total
+        in seconds overriding the one of the request class.
+        """
+        kwargs['timeout'] = self.timeouts.for_request(url, kwargs.pop('timeout', None), deadline)
+        return ScheduledRequest(self, url, priority or classify(url), kwargs, deadline)
+
+    def _sink(self, filename, offset=0, truncate=False):
+        return FileSink(filename, offset, truncate, buffer_pool=self.buffer_pool, executor=self.write_executor,
+                        queue_size=self.write_queue, fsync=self.fsync)
+
+    async def _read(self, resp, size):
+        """Read up to size bytes of a download, within the bandwidth budget
+        """
+        chunk = await resp.content.read(size)
+        await self.throttle.consume(len(chunk))
+        return chunk
 
     async def quit(self):
-        if self.session:
-            await self._session.close()
-            self._session = None
+        if self._owns_pool:
+            await self.pool.close()
+
+    def _request_deadline(self, url, deadline):
+        # a coalesced request serves callers with deadlines of their own, single_flight applies them
+        return None if self.single_flight.shares(url) else deadline
+
+    async def getText(self, url, timeout=None, deadline=None):
+        limit = self._request_deadline(url, deadline)
+        return await self.single_flight.do(
+            ('text', url), url, lambda: self._call(url, lambda: self._getText(url, timeout, limit), limit),
+            deadline)
 
-    async def getText(self, url, timeout=30):
+    async def _getText(self, url, timeout, deadline):
+        async with self.request(url, timeout=timeout, deadline=deadline) as resp:
+            if resp.status == 200:
+                return await resp.text()
+            await self._raise_for_status(resp)
+
+    async def getJSON(self, url, timeout=None, repair=False, deadline=None):
+        """GET url and decode the JSON body, `repair` replaces the bare
+        backslashes some gpControl commands reply with
+        """
+        limit = self._request_deadline(url, deadline)
+        return await self.single_flight.do(
+            ('json', url, repair), url,
+            lambda: self._call(url, lambda: self._getJSON(url, timeout, repair, limit), limit), deadline)
+
+    async def _getJSON(self, url, timeout, repair, deadline):
+        async with self.request(url, timeout=timeout, deadline=deadline) as resp:
+            if resp.status != 200:
+                await self._raise_for_status(resp)
+            body = await resp.read()
+        return await self.decoder.decode(body, repair)
+
+    async def _call(self, url, fetch, deadline=None):
+        """Run fetch() behind the circuit breaker, retrying as the policy and
+        `deadline` allow. Connection failures are raised as GoProConnectionError,
+        timeouts as asyncio.TimeoutError and DeadlineExceeded.
+        """
+        self.retry.stats.requests += 1
+        self.retry.budget.deposit()
+        attempt = 0
+        while True:
+            self.breaker.check()
+            attempt += 1
+            try:
+                result = await fetch()
+            except Exception as err:
+                if is_transport_error(err):
+                    self.breaker.record_failure()
+                elif isinstance(err, HttpError):
+                    self.breaker.record_success()
+                else:
+                    self.breaker.abandon()
+                if deadline is not None and isinstance(err, asyncio.TimeoutError) and deadline.expired:
+                    raise DeadlineExceeded('Deadline for {0} exceeded'.format(url)) from err
+                delay = self.retry.delay(attempt)
+                if not self.retry.should_retry(url, err, attempt) or (
+                        deadline is not None and delay >= deadline.remaining()):
+                    if isinstance(err, aiohttp.ClientConnectorError):
+                        raise GoProConnectionError('Can not connect', err)
+                    if isinstance(err, aiohttp.ClientConnectionError):
+                        raise GoProConnectionError('Connection lost', err)
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _raise_for_status(self, resp):
+        message = await resp.read()
         try:
-            async with self.session().get(url, timeout=timeout) as resp:
-                if resp.status == 200:
-                    return await resp.text()
-                message = await resp.text()
-                try:
-                    message = json.loads(message.replace("\r\n", "").replace("\n", ""))
-                    raise GoProError(resp.status, resp.reason, message)
-                except json.JSONDecodeError:
-                    print('error', message)
-                    raise HttpError(resp.status, resp.reason)
-        except aiohttp.client_exceptions.ClientConnectorError as err:
-            raise GoProConnectionError('Can not connect', err)
-
-    async def getJSON(self, url, timeout=30):
-        async with self.session().get(url, timeout=timeout) as resp:
-            return await resp.json()
-
-    async def download(self, url, filename=None):
+            message = self.decoder.loads(message.replace(b"\r\n", b"").replace(b"\n", b""))
+        except ValueError:
+            print('error', message.decode('utf-8', 'replace'))
+            raise HttpError(resp.status, resp.reason)
+        raise GoProError(resp.status, resp.reason, message)
+
+    def stream(self, url, chunk_size=None):
+        """Return a MediaStream yielding the body of url as memoryview chunks
+        """
+        return MediaStream(self, url, chunk_size or self.chunk_size)
+
+    async def fetch_bytes(self, url, size=None):
+        """Return the body of url as a bytearray, allocated once from
+        Content-Length (or `size`) and filled in place
+        """
+        async with self.request(url) as resp:
+            if resp.status != 200:
+                raise HttpError(resp.status, resp.reason)
+            length = resp.content_length if resp.content_length is not None else size
+            if length is None:
+                body = bytearray()
+                while True:
+                    chunk = await self._read(resp, self.chunk_size)
+                    if not chunk:
+                        return body
+                    body += chunk
+            body = bytearray(length)
+            view = memoryview(body)
+            received = 0
+            while received < length:
+                chunk = await self._read(resp, min(self.chunk_size, length - received))
+                if not chunk:
+                    break
+                view[received:received + len(chunk)] = chunk
+                received += len(chunk)
+            if received != length:
+                raise DownloadError('Got {0} of {1} bytes from {2}'.format(received, length, url))
+            return body
+
+    async def download(self, url, filename=None, size=None, segments=None, hedge=None, deadline=None):
+        """Download url to filename by way of a `.part` file
+
+        A `.part` file left by an earlier attempt is resumed with a Range
+        request. Broken transfers are retried `download_retries` times and the
+        file is only renamed into place once complete, checked against `size`
+        when given. Returns a DownloadResult.
+
+        With `segments` > 1 (default `self.segments`) and a known `size` the
+        file is fetched as that many concurrent byte ranges of at least
+        `min_segment_size` bytes, falling back to a single stream when the
+        server does not honor Range.
+
+        `hedge` (default `self.hedge_policy`) is a HedgePolicy, or a HedgeGroup
+        shared between several downloads, that re-issues ranges or files
+        falling far behind the others on a second connection. It needs `size`.
+
+        Single stream downloads, hedged or not, are hashed as the chunks
+        arrive, only a resumed prefix is read back from disk. Segmented
+        downloads write out of order and raise ValueError unless `self.digest`
+        is None.
+
+        With a `deadline` (Deadline or seconds) the download is cancelled,
+        keeping the `.part` file, and DeadlineExceeded raised when it passes.
+        """
+        self._check_digest(self.segments if segments is None else segments)
+        deadline = Deadline.of(deadline)
+        if deadline is None:
+            return await self._download(url, filename, size, segments, hedge)
+        deadline.check(url)
+        try:
+            return await asyncio.wait_for(self._download(url, filename, size, segments, hedge), deadline.remaining())
+        except asyncio.TimeoutError as err:
+            if not deadline.expired:
+                raise
+            raise DeadlineExceeded('Deadline for {0} exceeded'.format(url)) from err
+
+    async def _download(self, url, filename, size, segments, hedge):
+        if segments is None:
+            segments = self.segments
+        if hedge is None:
+            hedge = self.hedge_policy
+        if isinstance(hedge, HedgePolicy):
+            hedge = HedgeGroup(hedge)
         async with self.download_semaphore:
             if not filename:
                 filename = url2filename(url)
@@ -59,13 +322,473 @@ class AsyncClient:
             if self.working_path:
                 filename = path.join(self.working_path, filename)
 
-            async with self.session().get(url) as resp:
-                with open(filename, 'wb') as fd:
-                    while True:
-                        chunk = await resp.content.read(self.chunk_size)
+            started = time.monotonic()
+            partname = filename + PART_SUFFIX
+            if segments > 1 and size and size >= 2 * self.min_segment_size:
+                segmented_name = filename + SEGMENTED_SUFFIX
+                if await self._download_segmented(url, segmented_name, size, segments, hedge):
+                    os.replace(segmented_name, filename)
+                    return DownloadResult(filename, size, None, time.monotonic() - started)
+
+            if hedge is not None and size:
+                digest = await self._download_hedged(url, partname, size, hedge)
+                os.replace(partname, filename)
+                return DownloadResult(filename, size, digest, time.monotonic() - started)
+
+            attempt = 0
+            while True:
+                self.breaker.check()
+                try:
+                    digest = await self._download_part(url, partname, size)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, DownloadError) as err:
+                    self._download_failed(err)
+                    attempt += 1
+                    if attempt > self.download_retries:
+                        raise DownloadError('Download of {0} failed after {1} attempts'.format(url, attempt), err)
+                    await asyncio.sleep(self.retry.delay(attempt, self.retry_delay))
+                except BaseException:
+                    self.breaker.abandon()
+                    raise
+            self.breaker.record_success()
+            received = path.getsize(partname)
+            os.replace(partname, filename)
+            return DownloadResult(filename, received, digest, time.monotonic() - started)
+
+    def _check_digest(self, segments):
+        if segments > 1 and self.digest:
+            # a hash runs over the bytes in order, the ranges arrive at once
+            raise ValueError('Segmented downloads are not hashed, they need digest None')
+
+    def _download_failed(self, err):
+        # a dropped or stalled transfer says nothing about the camera, not getting through does
+        if isinstance(err, STALL_ERRORS):
+            self.stalls += 1
+        elif isinstance(err, (aiohttp.ClientConnectorError, asyncio.TimeoutError)):
+            self.breaker.record_failure()
+            return
+        self.breaker.abandon()
+
+    async def _hash_file(self, filename, hasher=None, length=None):
+        """Return the hex digest of the first length bytes of filename, read
+        in the writer executor. Continues `hasher` when given.
+        """
+        if not self.digest:
+            return None
+        if hasher is None:
+            hasher = hashlib.new(self.digest)
+        await asyncio.get_event_loop().run_in_executor(self.write_executor, hash_file, filename, hasher,
+                                                       length, self.chunk_size)
+        return hasher.hexdigest()
+
+    async def _download_part(self, url, partname, size=None):
+        """Fetch or resume url into partname, returns its hex digest
+        """
+        offset = path.getsize(partname) if path.exists(partname) else 0
+        if size is not None and offset > size:
+            offset = 0
+        if size is not None and offset == size:
+            return await self._hash_file(partname)
+
+        headers = {}
+        if offset:
+            headers['Range'] = 'bytes={0}-'.format(offset)
+        async with self.request(url, headers=headers) as resp:
+            if resp.status == 206:
+                total = parse_content_range(resp.headers.get('Content-Range'))[2]
+            elif resp.status == 200:
+                # no range support, or nothing to resume
+                offset = 0
+                total = resp.content_length
+            elif resp.status == 416 and offset:
+                # stale .part file, start over on next attempt
+                os.remove(partname)
+                raise DownloadError('Range not satisfiable for ' + url)
+            else:
+                raise HttpError(resp.status, resp.reason)
+
+            hasher = hashlib.new(self.digest) if self.digest else None
+            if hasher is not None and offset:
+                await self._hash_file(partname, hasher, offset)
+
+            received = offset
+            async with self._sink(partname, offset, truncate=offset == 0) as sink:
+                while True:
+                    chunk = await self._read(resp, self.chunk_size)
+                    if not chunk:
+                        break
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    await sink.write(chunk)
+                    received += len(chunk)
+
+        if total is not None and received != total:
+            raise DownloadError('Got {0} of {1} bytes from {2}'.format(received, total, url))
+        if size is not None and received != size:
+            raise DownloadError('Got {0} bytes from {1}, media list says {2}'.format(received, url, size))
+        return hasher.hexdigest() if hasher is not None else None
+
+    async def _download_hedged(self, url, partname, size, group):
+        """Single stream download of url, resuming partname, watched by a HedgeGroup,
+        returns its hex digest
+        """
+        offset = path.getsize(partname) if path.exists(partname) else 0
+        if offset > size:
+            offset = 0
+        digest = None
+        if self.digest:
+            digest = OrderedDigest(hashlib.new(self.digest), offset)
+            if offset:
+                await self._hash_file(partname, digest.hasher, offset)
+        if offset < size:
+            # primary and hedge both write from the start of the missing tail,
+            # so partname never has holes and stays resumable
+            with open(partname, 'r+b' if offset else 'wb') as fd:
+                fd.truncate(offset)
+            await self._fetch_range(url, partname, offset, size - 1, group=group, digest=digest)
+        received = path.getsize(partname)
+        if received != size:
+            raise DownloadError('Got {0} bytes from {1}, media list says {2}'.format(received, url, size))
+        return digest.hexdigest() if digest is not None else None
+
+    async def _download_segmented(self, url, partname, size, segments, group=None):
+        """Fetch url as concurrent byte ranges into a preallocated partname
+
+        Returns False, without writing anything, if the server ignores Range.
+        """
+        bounds = segment_bounds(size, segments, self.min_segment_size)
+        first_start, first_end = bounds[0]
+
+        async def open_probe():
+            probe = self.request(url, headers={'Range': 'bytes={0}-{1}'.format(first_start, first_end)})
+            resp = await probe.open()
+            if resp.status not in (200, 206):
+                probe.close()
+                raise HttpError(resp.status, resp.reason)
+            return probe, resp
+        # retried and behind the breaker like the ranges
+        probe, resp = await self._call(url, open_probe)
+        try:
+            if resp.status == 200:
+                probe.close()
+                return False
+            total = parse_content_range(resp.headers.get('Content-Range'))[2]
+            if total != size:
+                raise DownloadError('{0} is {1} bytes, media list says {2}'.format(url, total, size))
+            await asyncio.get_event_loop().run_in_executor(self.write_executor, preallocate, partname, size)
+        except BaseException:
+            probe.close()
+            raise
+
+        tasks = [asyncio.ensure_future(self._fetch_range(url, partname, start, end, group=group))
+                 for start, end in bounds[1:]]
+        tasks.insert(0, asyncio.ensure_future(self._fetch_range(url, partname, first_start, first_end, probe, group)))
+        completed = False
+        try:
+            await asyncio.gather(*tasks)
+            completed = True
+        finally:
+            # no range may still be writing once this returns or raises
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if not completed and path.exists(partname):
+                os.remove(partname)
+        return True
+
+    def _fetch_range(self, url, partname, start, end, request=None, group=None, digest=None):
+        if group is None:
+            return self._download_range(url, partname, start, end, request, digest=digest)
+        first_request = [request]
+
+        def fetch(transfer):
+            # an already opened request can only be consumed by the primary
+            request, first_request[0] = first_request[0], None
+            return self._download_range(url, partname, transfer.start, end, request, transfer, digest)
+        return group.run(Transfer(start, end), fetch)
+
+    async def _download_range(self, url, partname, start, end, request=None, transfer=None, digest=None):
+        """Write bytes start-end (inclusive) of url at their offset in partname, with retries.
+        `request` is an already opened ScheduledRequest for the first attempt.
+        Progress is reported in `transfer.offset` and the bytes to `digest`
+        (an OrderedDigest) when given.
+        """
+        offset = start
+        attempt = 0
+        while True:
+            try:
+                if request is None:
+                    self.breaker.check()
+                    request = self.request(url, headers={'Range': 'bytes={0}-{1}'.format(offset, end)})
+                if transfer is not None:
+                    # time the transfer from when it has a connection, waiting for one is not being slow
+                    if request.resp is not None:
+                        transfer.begin()
+                    else:
+                        request.on_connection = transfer.begin
+                async with request as resp:
+                    if resp.status == 200:
+                        # Range ignored, skip what we already have
+                        skip = offset
+                    elif resp.status == 206:
+                        skip = 0
+                    else:
+                        raise HttpError(resp.status, resp.reason)
+                    while skip > 0:
+                        chunk = await self._read(resp, min(self.chunk_size, skip))
                         if not chunk:
                             break
-                        fd.write(chunk)
+                        skip -= len(chunk)
+                    async with self._sink(partname, offset) as sink:
+                        while offset <= end:
+                            chunk = await self._read(resp, min(self.chunk_size, end + 1 - offset))
+                            if not chunk:
+                                break
+                            if digest is not None:
+                                digest.update(offset, chunk)
+                            await sink.write(chunk)
+                            offset += len(chunk)
+                            if transfer is not None:
+                                transfer.offset = offset
+                if offset <= end:
+                    raise DownloadError('Range {0}-{1} of {2} ended at {3}'.format(start, end, url, offset))
+                self.breaker.record_success()
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, DownloadError) as err:
+                self._download_failed(err)
+                request = None
+                attempt += 1
+                if attempt > self.download_retries:
+                    raise DownloadError('Download of {0} failed after {1} attempts'.format(url, attempt), err)
+                await asyncio.sleep(self.retry.delay(attempt, self.retry_delay))
+            except BaseException:
+                self.breaker.abandon()
+                raise
+
+
+class OrderedDigest:
+    """Hash of a file written by streams that each write in order from at
+    most the hashed length on, like a transfer and its hedge. Every byte is
+    hashed once, by the first stream to reach it.
+    """
+    def __init__(self, hasher, offset=0):
+        self.hasher = hasher
+        # bytes hashed so far
+        self.offset = offset
+
+    def update(self, offset, chunk):
+        skip = self.offset - offset
+        if 0 <= skip < len(chunk):
+            self.hasher.update(chunk[skip:] if skip else chunk)
+            self.offset = offset + len(chunk)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+class DownloadResult:
+    """What download() fetched: final filename, size in bytes, hex digest
+    (None when hashing is off) and duration in seconds
+    """
+    def __init__(self, filename, size, digest=None, duration=None):
+        self.filename = filename
+        self.size = size
+        self.digest = digest
+        self.duration = duration
+
+    def __str__(self):
+        return "<DownloadResult filename:{0}, size:{1}, digest:{2}>".format(self.filename, self.size, self.digest)
+
+
+class MediaStream:
+    """Async iterator over the body of a GET request, as memoryview chunks.
+
+    Use it with `async with` to release the connection when stopping early:
+
+        async with client.stream(url) as chunks:
+            async for chunk in chunks:
+                hasher.update(chunk)
+    """
+    def __init__(self, client, url, chunk_size):
+        self.client = client
+        self.url = url
+        self.chunk_size = chunk_size
+        self.content_length = None
+        self._request = None
+        self._resp = None
+        self._closed = False
+
+    async def __aenter__(self):
+        await self._open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        if self._resp is None:
+            await self._open()
+        try:
+            chunk = await self.client._read(self._resp, self.chunk_size)
+        except BaseException:
+            self.close()
+            raise
+        if not chunk:
+            self.close()
+            raise StopAsyncIteration
+        return memoryview(chunk)
+
+    async def _open(self):
+        self._request = self.client.request(self.url)
+        resp = await self._request.open()
+        if resp.status != 200:
+            self.close()
+            raise HttpError(resp.status, resp.reason)
+        self._resp = resp
+        self.content_length = resp.content_length
+
+    def close(self):
+        self._closed = True
+        self._resp = None
+        if self._request is not None:
+            self._request.close()
+            self._request = None
+
+
+class ScheduledRequest:
+    """A GET request that holds a slot of the client's RequestScheduler from
+    before it is sent until its response is released.
+
+    Use it with `async with` or open() and close(). Interactive requests also
+    make downloads yield bandwidth while they are pending.
+    """
+    def __init__(self, client, url, priority, kwargs, deadline=None):
+        self.client = client
+        self.url = url
+        self.priority = priority
+        self.kwargs = kwargs
+        self.deadline = deadline
+        self.resp = None
+        self._slot = False
+        self._control = None
+        self._trace = None
+        # called once the request holds a connection
+        self.on_connection = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close(isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError)))
+
+    async def acquire(self):
+        """Wait for a slot of the scheduler, open() takes one if not done yet
+        """
+        if self._slot:
+            return
+        try:
+            if self.priority == INTERACTIVE:
+                self._control = self.client.throttle.control()
+                self._control.__enter__()
+            if self.deadline is None:
+                await self.client.scheduler.acquire(self.priority)
+            else:
+                try:
+                    await asyncio.wait_for(self.client.scheduler.acquire(self.priority), self.deadline.remaining())
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded('Deadline for {0} exceeded waiting for a slot'.format(self.url))
+            self._slot = True
+        except BaseException as err:
+            self.close(isinstance(err, Exception))
+            raise
+
+    async def open(self):
+        if self.resp is not None:
+            return self.resp
+        await self.acquire()
+        try:
+            self._trace = self.client.metrics.start(self.url)
+            self._trace.on_connection = self.on_connection
+            self.resp = await self.client.session(self.url).get(self.url, trace_request_ctx=self._trace,
+                                                                **self.kwargs)
+        except BaseException as err:
+            self.close(isinstance(err, Exception))
+            raise
+        return self.resp
+
+    def close(self, error=False):
+        """Release the response and the slot, `error` counts the request as
+        failed in the client's metrics
+        """
+        if self._trace is not None:
+            if self.resp is not None:
+                self._trace.finish(self.resp.status, getattr(self.resp.content, 'total_bytes', 0), error)
+            else:
+                self._trace.finish(error=error)
+            self._trace = None
+        if self.resp is not None:
+            self.resp.release()
+            self.resp = None
+        if self._slot:
+            self._slot = False
+            self.client.scheduler.release(self.priority)
+        if self._control is not None:
+            self._control.__exit__(None, None, None)
+            self._control = None
+
+    def __del__(self):
+        # dropped without close(), e.g. a MediaStream left before its end
+        if self._slot:
+            self.close()
+
+
+def hash_file(filename, hasher, length=None, chunk_size=64 * 1024):
+    """Feed the first length bytes (all if None) of filename to hasher, blocking
+    """
+    with open(filename, 'rb') as fd:
+        while length is None or length > 0:
+            chunk = fd.read(chunk_size if length is None else min(chunk_size, length))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            if length is not None:
+                length -= len(chunk)
+    return hasher
+
+
+def segment_bounds(size, segments, min_segment_size):
+    """Split size bytes into at most `segments` inclusive (start, end) ranges
+    of at least min_segment_size bytes
+    >>> segment_bounds(10, 3, 1)
+    [(0, 3), (4, 7), (8, 9)]
+    >>> segment_bounds(10, 3, 5)
+    [(0, 4), (5, 9)]
+    """
+    count = max(1, min(segments, size // max(min_segment_size, 1)))
+    step = -(-size // count)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def parse_content_range(value):
+    """Return (start, end, total) from a Content-Range header, None for unknown parts
+    >>> parse_content_range('bytes 100-199/1000')
+    (100, 199, 1000)
+    >>> parse_content_range('bytes */1000')
+    (None, None, 1000)
+    """
+    if not value or not value.startswith('bytes '):
+        return (None, None, None)
+    byte_range, _, total = value[6:].partition('/')
+    total = None if total in ('', '*') else int(total)
+    if byte_range == '*':
+        return (None, None, total)
+    start, _, end = byte_range.partition('-')
+    return (int(start), int(end), total)
 
 
 def url2filename(url):
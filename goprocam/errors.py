@@ -34,3 +34,38 @@ class CameraIdentificationError(Exception):
 class UnsupportedCameraError(CameraIdentificationError):
     def __init__(self):
         super().__init__('Unsupported Camera', 400)
+
+
+class DownloadError(Exception):
+    """When a download could not be completed, even after retrying
+    """
+    def __init__(self, message, inner_exception=None):
+        self.message = message
+        self.inner_exception = inner_exception
+        if inner_exception:
+            self.message += ': ' + str(inner_exception)
+        super().__init__(self.message)
+
+
+class CircuitOpenError(Exception):
+    """When requests to a camera are failed fast because it stopped answering
+    """
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class DeadlineExceeded(Exception):
+    """When an operation did not finish within the Deadline it was given
+    """
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class InvalidSettingError(Exception):
+    """When a setting value or mode is rejected by the camera's capability schema, before it is sent
+    """
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
@@ -0,0 +1,161 @@
+import asyncio
+import statistics
+import time
+
+__all__ = ['HedgePolicy', 'HedgeGroup', 'HedgeStats', 'Transfer']
+
+
+class HedgeStats:
+    def __init__(self):
+        self.transfers = 0
+        self.triggered = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.time_saved = 0.0
+
+    def as_dict(self):
+        return {
+            'transfers': self.transfers,
+            'triggered': self.triggered,
+            'hedge_wins': self.hedge_wins,
+            'primary_wins': self.primary_wins,
+            'time_saved': self.time_saved,
+        }
+
+    def __str__(self):
+        return "<HedgeStats triggered:{0}, hedge_wins:{1}, time_saved:{2:.2f}s>".format(
+            self.triggered, self.hedge_wins, self.time_saved)
+
+
+class Transfer:
+    """Progress of fetching the inclusive byte range start-end, timed from
+    begin(), once its request holds a slot
+    """
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.offset = start
+        self.started = None
+        self.finished = None
+        self.hedged = False
+        self.hedge_requested = asyncio.Event()
+
+    @property
+    def active(self):
+        return self.finished is None
+
+    def begin(self):
+        if self.started is None:
+            self.started = time.monotonic()
+
+    def elapsed(self, now):
+        if self.started is None:
+            return 0.0
+        return (self.finished or now) - self.started
+
+    def rate(self, now):
+        elapsed = self.elapsed(now)
+        if elapsed <= 0:
+            return 0.0
+        return (self.offset - self.start) / elapsed
+
+    def remaining_time(self, now):
+        """Estimated seconds left at the current rate
+        """
+        rate = self.rate(now)
+        if rate <= 0:
+            return float('inf')
+        return (self.end + 1 - self.offset) / rate
+
+
+class HedgePolicy:
+    """Decides when a transfer lags so far behind its peers that it is worth
+    re-issuing the rest of it on a second connection.
+
+    A transfer is a straggler when it has run for at least `min_elapsed`
+    seconds and its throughput is below the median of its group divided by
+    `slowdown`. Every transfer is hedged at most once.
+    """
+    def __init__(self, slowdown=3.0, min_elapsed=2.0, check_interval=0.5, min_peers=2):
+        self.slowdown = slowdown
+        self.min_elapsed = min_elapsed
+        self.check_interval = check_interval
+        self.min_peers = min_peers
+        self.stats = HedgeStats()
+
+    def stragglers(self, transfers, now):
+        measured = [t for t in transfers
+                    if t.started is not None and (t.elapsed(now) >= self.min_elapsed or not t.active)]
+        if len(measured) < self.min_peers:
+            return []
+        slow = statistics.median(t.rate(now) for t in measured) / self.slowdown
+        return [t for t in measured
+                if t.active and not t.hedged and t.elapsed(now) >= self.min_elapsed and t.rate(now) < slow]
+
+
+class HedgeGroup:
+    """Transfers that are compared with each other, the ranges of one file or
+    the files of one downloadAll
+    """
+    def __init__(self, policy):
+        self.policy = policy
+        self.transfers = []
+        self._monitor = None
+
+    async def run(self, transfer, fetch):
+        """Run fetch(transfer) and, if the policy asks for it, a hedge
+        fetch(Transfer(transfer.offset, transfer.end)). The first to succeed
+        wins and the other is cancelled.
+        """
+        stats = self.policy.stats
+        stats.transfers += 1
+        self.transfers.append(transfer)
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.ensure_future(self._watch())
+
+        primary = asyncio.ensure_future(fetch(transfer))
+        waiter = asyncio.ensure_future(transfer.hedge_requested.wait())
+        tasks = {primary}
+        try:
+            await asyncio.wait([primary, waiter], return_when=asyncio.FIRST_COMPLETED)
+            if primary.done():
+                return primary.result()
+
+            stats.triggered += 1
+            hedge_transfer = Transfer(transfer.offset, transfer.end)
+            hedge = asyncio.ensure_future(fetch(hedge_transfer))
+            tasks.add(hedge)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    now = time.monotonic()
+                    if task is hedge:
+                        stats.hedge_wins += 1
+                        remaining = transfer.remaining_time(now)
+                        if remaining != float('inf'):
+                            stats.time_saved += remaining
+                    else:
+                        stats.primary_wins += 1
+                    return task.result()
+            raise error
+        finally:
+            transfer.finished = time.monotonic()
+            waiter.cancel()
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                # let the loser flush what it already wrote before the file is used
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def _watch(self):
+        while any(t.active for t in self.transfers):
+            await asyncio.sleep(self.policy.check_interval)
+            for transfer in self.policy.stragglers(self.transfers, time.monotonic()):
+                transfer.hedged = True
+                transfer.hedge_requested.set()
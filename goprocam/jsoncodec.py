@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+__all__ = ['JSONDecoder', 'loads', 'repair_backslashes', 'BACKEND']
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data):
+    """Decode a JSON document from bytes (or str) with orjson when it is
+    installed and the standard library otherwise
+    >>> loads(b'{"status": {"8": 0}}')
+    {'status': {'8': 0}}
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_loads = loads
+
+
+def repair_backslashes(data):
+    """Some gpControl/command replies have bare backslashes in them which is
+    not valid JSON, turn them into forward slashes
+    >>> repair_backslashes(b'{"path": "DCIM\\\\100GOPRO"}')
+    b'{"path": "DCIM/100GOPRO"}'
+    """
+    return data.replace(b'\\', b'/')
+
+
+class JSONDecoder:
+    """Decodes response bodies for AsyncClient.
+
+    `loads` defaults to the module level loads(). Bodies larger than
+    `offload_size` bytes (None to never) are decoded in `executor` so a big
+    media list does not hold up the event loop.
+    """
+    def __init__(self, loads=None, offload_size=None, executor=None):
+        self.loads = loads or _loads
+        self.offload_size = offload_size
+        self.executor = executor
+        self.offloaded = 0
+
+    async def decode(self, data, repair=False):
+        if repair:
+            data = repair_backslashes(data)
+        if self.offload_size is not None and len(data) > self.offload_size:
+            self.offloaded += 1
+            return await asyncio.get_event_loop().run_in_executor(self.executor, self.loads, data)
+        return self.loads(data)
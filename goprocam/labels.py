@@ -0,0 +1,155 @@
+import weakref
+
+from goprocam import constants
+from goprocam.utils import Struct, Parsers, MODE_LABELS, SUB_MODE_LABELS, RECORDING_LABELS, BATTERY_LABELS, \
+    VIDEO_RES_LABELS, VIDEO_FR_LABELS, OUT_OF_SCOPE
+
+try:
+    import numpy
+except ImportError:  # optional, for batch() on arrays
+    numpy = None
+
+__all__ = ['LabelTable', 'SubModeTable', 'StatusLabels', 'labels_for']
+
+
+class LabelTable:
+    """Labels of the codes of one status or setting.
+
+    A single code is a dict lookup. batch() maps many at once, a NumPy
+    integer array with one indexing operation into a dense object array of
+    the labels.
+    """
+    def __init__(self, labels, default=None):
+        self.labels = dict(labels)
+        self.default = default
+        # labels by code, the last entry is the default for unknown codes
+        self.dense = [default] * (max(self.labels, default=-1) + 2)
+        for code, label in self.labels.items():
+            self.dense[code] = label
+        self._array = None
+
+    def __call__(self, code):
+        return self.labels.get(code, self.default)
+
+    def batch(self, codes):
+        """Labels of codes, an object array for a NumPy array and a list for other iterables
+        >>> LabelTable({0: 'Standby', 1: 'Recording'}, 'unknown').batch([1, 0, 7])
+        ['Recording', 'Standby', 'unknown']
+        """
+        if numpy is not None and isinstance(codes, numpy.ndarray):
+            if self._array is None:
+                self._array = numpy.array(self.dense, dtype=object)
+            unknown = len(self.dense) - 1
+            return self._array[numpy.where((codes >= 0) & (codes < unknown), codes, unknown)]
+        labels, default = self.labels, self.default
+        return [labels.get(code, default) for code in codes]
+
+
+class SubModeTable(LabelTable):
+    """Labels of (mode, sub mode) pairs, kept as codes mode * stride + sub mode
+    """
+    def __init__(self, labels, default=None):
+        self.stride = max([sub_mode for _, sub_mode in labels] + [-1]) + 1
+        super().__init__({mode * self.stride + sub_mode: label for (mode, sub_mode), label in labels.items()}, default)
+
+    def __call__(self, mode, sub_mode):
+        if mode is None or sub_mode is None or not 0 <= sub_mode < self.stride:
+            return self.default
+        return self.labels.get(mode * self.stride + sub_mode, self.default)
+
+    def batch(self, modes, sub_modes):
+        """Labels of the sub modes, each with the mode at the same position
+        >>> SubModeTable({(0, 3): 'Looping', (1, 1): 'Burst'}).batch([0, 1, 1], [3, 1, 3])
+        ['Looping', 'Burst', None]
+        """
+        if numpy is not None and isinstance(modes, numpy.ndarray):
+            codes = numpy.where((sub_modes >= 0) & (sub_modes < self.stride), modes * self.stride + sub_modes, -1)
+            return super().batch(codes)
+        labels, default, stride = self.labels, self.default, self.stride
+        return [labels.get(mode * stride + sub_mode, default) if 0 <= sub_mode < stride else default
+                for mode, sub_mode in zip(modes, sub_modes)]
+
+
+def _merged(*sources):
+    """One dict of several, the first source to label a code wins
+    """
+    merged = {}
+    for source in reversed(sources):
+        merged.update(source)
+    return merged
+
+
+def _constant_labels(group, prefix):
+    """{int code: name without prefix} of a constants class
+    """
+    return {int(code): name[len(prefix):] for name, code in vars(group).items()
+            if name.startswith(prefix) and isinstance(code, str) and code.isdigit()}
+
+
+class StatusLabels:
+    """The label tables of a camera: the labels this library always used,
+    then the ones derived from constants, then the display names of the
+    camera's schema. Built once per schema, see labels_for().
+    """
+    def __init__(self, schema=None):
+        setting_labels = schema.setting_labels if schema is not None else {}
+        sub_modes = {}
+        for name, group in (('Video', 0), ('Photo', 1), ('MultiShot', 2)):
+            labels = getattr(constants.Mode.SubMode, name)
+            for label, code in sorted(vars(labels).items()):
+                if not label.startswith('_') and isinstance(code, str):
+                    sub_modes.setdefault((group, int(code)), label)
+        self.mode = LabelTable(_merged(MODE_LABELS, schema.mode_labels if schema is not None else {}))
+        self.sub_mode = SubModeTable(_merged(SUB_MODE_LABELS, sub_modes,
+                                             schema.modes if schema is not None else {}))
+        self.recording = LabelTable(RECORDING_LABELS)
+        self.battery = LabelTable(BATTERY_LABELS)
+        self.video_res = LabelTable(_merged(
+            VIDEO_RES_LABELS, _constant_labels(constants.Video.Resolution, 'R'),
+            setting_labels.get(int(constants.Video.RESOLUTION), {})), OUT_OF_SCOPE)
+        self.video_fr = LabelTable(_merged(
+            VIDEO_FR_LABELS, _constant_labels(constants.Video.FrameRate, 'FR'),
+            setting_labels.get(int(constants.Video.FRAME_RATE), {})), OUT_OF_SCOPE)
+
+    def decode(self, snapshot, model=None):
+        """Every named value of a StatusSnapshot as a Struct, the main ones
+        as labels, the sub mode in the snapshot's mode. `model` is the camera
+        model, for the remaining space.
+        """
+        status, settings = snapshot.status, snapshot.settings
+        mode = status.Mode
+        remaining_video = status.RemVideoTime
+        remaining_space = status.RemainingSpace
+        labelled_status = status.named()
+        labelled_status.update(
+            Mode=self.mode(mode),
+            SubMode=self.sub_mode(mode, status.SubMode),
+            RemVideoTime=Parsers.video_left(remaining_video) if remaining_video is not None else None,
+            BatteryLevel=self.battery(status.BatteryLevel),
+            RemainingSpace=Parsers.rem_space(remaining_space, model) if remaining_space is not None else None,
+            IsBusy=self.recording(status.IsBusy),
+        )
+        labelled_settings = settings.named()
+        labelled_settings.update(
+            Resolution=self.video_res(settings.Resolution),
+            Framerate=self.video_fr(settings.Framerate),
+        )
+        return Struct(status=Struct(**labelled_status), settings=Struct(**labelled_settings))
+
+
+_default_labels = None
+_labels = weakref.WeakKeyDictionary()
+
+
+def labels_for(schema=None):
+    """The StatusLabels of a CapabilitySchema (or of none), built once per schema
+    """
+    global _default_labels
+    if schema is None:
+        if _default_labels is None:
+            _default_labels = StatusLabels()
+        return _default_labels
+    labels = _labels.get(schema)
+    if labels is None:
+        labels = _labels[schema] = StatusLabels(schema)
+    return labels
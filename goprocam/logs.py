@@ -0,0 +1,70 @@
+import logging
+
+__all__ = ['CameraLog', 'LazyMessage']
+
+logging.getLogger('goprocam').addHandler(logging.NullHandler())
+
+
+class LazyMessage:
+    """A str.format template and its arguments, rendered when first needed.
+    Attribute lookups in the template ("{0.size_readable}") run only then.
+    """
+    __slots__ = ('template', 'args', '_text')
+
+    def __init__(self, template, args):
+        self.template = template
+        self.args = args
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = self.template.format(*self.args) if self.args else self.template
+        return self._text
+
+
+class CameraLog:
+    """Log surface of one GoPro.
+
+    Messages go to the stdlib logger `name` and to an on_log style handler,
+    each only when enabled for the level. When neither is, a call costs a
+    level check and nothing is formatted.
+    """
+    def __init__(self, name='goprocam', extra=None):
+        self.logger = logging.getLogger(name)
+        self.extra = extra or {}
+        self.handler = None
+        self.handler_level = logging.DEBUG
+
+    def set_handler(self, handler, level=logging.DEBUG):
+        """handler(message, **details) gets the messages of level and up
+        """
+        self.handler = handler
+        self.handler_level = level
+
+    def enabled_for(self, level):
+        return (self.handler is not None and level >= self.handler_level) or self.logger.isEnabledFor(level)
+
+    def log(self, level, template, *args, **details):
+        """Log template.format(*args), `details` are passed to the handler
+        as keyword arguments and to logging as the record's `details`
+        """
+        to_handler = self.handler is not None and level >= self.handler_level
+        to_logger = self.logger.isEnabledFor(level)
+        if not (to_handler or to_logger):
+            return
+        message = LazyMessage(template, args)
+        if to_handler:
+            self.handler(str(message), **details)
+        if to_logger:
+            extra = dict(self.extra)
+            extra['details'] = details
+            self.logger.log(level, message, extra=extra)
+
+    def debug(self, template, *args, **details):
+        self.log(logging.DEBUG, template, *args, **details)
+
+    def info(self, template, *args, **details):
+        self.log(logging.INFO, template, *args, **details)
+
+    def warning(self, template, *args, **details):
+        self.log(logging.WARNING, template, *args, **details)
@@ -0,0 +1,56 @@
+import asyncio
+import datetime
+import json
+import os
+import threading
+
+__all__ = ['Manifest']
+
+
+class Manifest:
+    """JSON Lines record of the downloads of a session, one object per file
+    with folder, name, size, mod, hash, duration and the local filename.
+    Lines are appended in a worker thread as each download completes.
+    """
+    def __init__(self, filename, algorithm='sha256'):
+        self.filename = filename
+        self.algorithm = algorithm
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_session(cls, directory='./', **kwargs):
+        """A manifest named after the current time in directory
+        """
+        name = datetime.datetime.now().strftime('manifest-%Y%m%d-%H%M%S.jsonl')
+        return cls(os.path.join(directory, name), **kwargs)
+
+    async def record(self, media, result):
+        """Append the entry for media (a MediaInfo) downloaded as result
+        (a clients.DownloadResult)
+        """
+        entry = {
+            'folder': media.folder,
+            'name': media.name,
+            'size': result.size,
+            'mod': getattr(media, 'mod', None),
+            'hash': '{0}:{1}'.format(self.algorithm, result.digest) if result.digest else None,
+            'duration': round(result.duration, 3) if result.duration is not None else None,
+            'file': result.filename,
+        }
+        line = json.dumps(entry, sort_keys=True) + '\n'
+        await asyncio.get_event_loop().run_in_executor(None, self._append, line)
+        self.entries += 1
+
+    def _append(self, line):
+        with self._lock:
+            with open(self.filename, 'a') as fd:
+                fd.write(line)
+
+    def read(self):
+        """Return the recorded entries as a list of dicts
+        """
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename) as fd:
+            return [json.loads(line) for line in fd if line.strip()]
@@ -0,0 +1,237 @@
+import bisect
+import time
+
+import aiohttp
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+__all__ = ['RequestMetrics', 'Histogram', 'endpoint_class', 'trace_config']
+
+SETTING = 'gpControl/setting'
+COMMAND = 'gpControl/command'
+STATUS = 'status'
+MEDIA_LIST = 'gpMediaList'
+MEDIA_METADATA = 'gpMediaMetadata'
+MEDIA = 'media'
+OTHER = 'other'
+
+
+def endpoint_class(url):
+    """Return the endpoint class a camera url is measured under
+    >>> endpoint_class('http://10.5.5.9/gp/gpControl/setting/2/1')
+    'gpControl/setting'
+    >>> endpoint_class('http://10.5.5.9:8080/videos/DCIM/100GOPRO/GOPR0001.MP4')
+    'media'
+    """
+    path = urlsplit(url).path
+    if path.startswith('/gp/gpControl/setting'):
+        return SETTING
+    if path.startswith(('/gp/gpControl/command', '/gp/gpControl/execute')):
+        return COMMAND
+    if path == '/gp/gpControl/status' or path == '/camera/sx':
+        return STATUS
+    if path.startswith('/gp/gpMediaList'):
+        return MEDIA_LIST
+    if path.startswith('/gp/gpMediaMetadata'):
+        return MEDIA_METADATA
+    if path.startswith('/videos'):
+        return MEDIA
+    return OTHER
+
+
+class Histogram:
+    """Fixed buckets doubling from `smallest` seconds, cheap enough to
+    update on every request. Quantiles are bucket upper bounds.
+    """
+    def __init__(self, smallest=0.0005, buckets=18):
+        self.bounds = [smallest * 2 ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.http_errors = 0
+        self.bytes = 0
+        self.dns = Histogram()
+        self.connect = Histogram()
+        self.first_byte = Histogram()
+        self.total = Histogram()
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'http_errors': self.http_errors,
+            'bytes': self.bytes,
+            'throughput': self.bytes / self.total.sum if self.total.sum else None,
+            'dns': self.dns.as_dict(),
+            'connect': self.connect.as_dict(),
+            'first_byte': self.first_byte.as_dict(),
+            'total': self.total.as_dict(),
+        }
+
+
+class RequestTrace:
+    """Timings of one request, filled in by the trace callbacks and recorded
+    once when the request is done
+    """
+    __slots__ = ('metrics', 'endpoint', 'started', 'dns_started', 'dns', 'connect_started', 'connect',
+                 'first_byte', 'error', 'on_connection')
+
+    def __init__(self, metrics, endpoint):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.started = time.monotonic()
+        self.dns_started = None
+        self.dns = None
+        self.connect_started = None
+        self.connect = None
+        self.first_byte = None
+        self.error = False
+        # called once a new or reused connection is held
+        self.on_connection = None
+
+    def finish(self, status=None, received=0, error=False):
+        endpoint = self.metrics.endpoint(self.endpoint)
+        endpoint.requests += 1
+        if error or self.error:
+            endpoint.errors += 1
+        elif status is not None and status >= 400:
+            endpoint.http_errors += 1
+        endpoint.bytes += received
+        if self.dns is not None:
+            endpoint.dns.observe(self.dns)
+        if self.connect is not None:
+            endpoint.connect.observe(self.connect)
+        if self.first_byte is not None:
+            endpoint.first_byte.observe(self.first_byte)
+        endpoint.total.observe(time.monotonic() - self.started)
+
+
+class RequestMetrics:
+    """Latency histograms, bytes and error counts per endpoint class of one
+    camera. Requests report to it through trace_config(), which the
+    ConnectionPool sessions carry, and the trace they are started with.
+    """
+    def __init__(self):
+        self.endpoints = {}
+
+    def endpoint(self, name):
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def start(self, url):
+        return RequestTrace(self, endpoint_class(url))
+
+    def snapshot(self):
+        return {name: metrics.as_dict() for name, metrics in self.endpoints.items()}
+
+
+def _trace(ctx):
+    trace = ctx.trace_request_ctx
+    return trace if isinstance(trace, RequestTrace) else None
+
+
+async def _on_request_start(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None:
+        trace.started = time.monotonic()
+
+
+async def _on_dns_resolvehost_start(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None:
+        trace.dns_started = time.monotonic()
+
+
+async def _on_dns_resolvehost_end(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None and trace.dns_started is not None:
+        trace.dns = time.monotonic() - trace.dns_started
+
+
+async def _on_connection_create_start(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None:
+        trace.connect_started = time.monotonic()
+
+
+async def _on_connection_create_end(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None and trace.connect_started is not None:
+        trace.connect = time.monotonic() - trace.connect_started
+    await _on_connection_held(session, ctx, params)
+
+
+async def _on_connection_held(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None and trace.on_connection is not None:
+        trace.on_connection()
+
+
+async def _on_request_end(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None:
+        trace.first_byte = time.monotonic() - trace.started
+
+
+async def _on_request_exception(session, ctx, params):
+    trace = _trace(ctx)
+    if trace is not None:
+        trace.error = True
+
+
+def trace_config():
+    """aiohttp.TraceConfig feeding the RequestTrace passed as trace_request_ctx
+    """
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    config.on_connection_create_start.append(_on_connection_create_start)
+    config.on_connection_create_end.append(_on_connection_create_end)
+    config.on_connection_reuseconn.append(_on_connection_held)
+    config.on_request_end.append(_on_request_end)
+    config.on_request_exception.append(_on_request_exception)
+    return config
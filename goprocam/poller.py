@@ -0,0 +1,165 @@
+import asyncio
+
+__all__ = ['StatusPoller', 'is_busy', 'is_idle']
+
+
+def is_busy(snapshot):
+    """The camera is capturing or processing (status IsBusy)
+    """
+    return snapshot.status.IsBusy == 1
+
+
+def is_idle(snapshot):
+    return not is_busy(snapshot)
+
+
+def _retrieved(future):
+    # the error of a poll nobody waits for anymore is not worth a warning
+    if not future.cancelled():
+        future.exception()
+
+
+class StatusPoller:
+    """Keeps the latest StatusSnapshot of one camera up to date from a background task.
+
+    `fetch(deadline)` is the coroutine that asks the camera for a snapshot
+    (GoPro._fetch_status). While `busy(snapshot)` holds it polls every
+    `busy_interval` seconds, once the camera is idle the interval grows by
+    `backoff` per poll up to `idle_interval`. poke() goes back to the busy
+    interval right away, e.g. after the shutter was pressed.
+
+    Readers call get() and share the cached snapshot instead of each
+    requesting their own, next() waits for the outcome of the following poll.
+    """
+    def __init__(self, fetch, busy_interval=0.25, idle_interval=2.0, backoff=2.0, max_age=None, busy=is_busy,
+                 log=None):
+        self.fetch = fetch
+        self.busy_interval = busy_interval
+        self.idle_interval = idle_interval
+        self.backoff = backoff
+        # snapshots older than this are not handed out, a poll overdue by as much has failed
+        self.max_age = max_age if max_age is not None else 2 * idle_interval
+        self.busy = busy
+        self.interval = busy_interval
+        self.latest = None
+        self.stats = {'polls': 0, 'errors': 0, 'hits': 0, 'misses': 0}
+        self._log = log
+        self._task = None
+        self._wake = None
+        self._updated = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+            # next() must not wait for a poll that will never come
+            self._task.add_done_callback(lambda task: self._settle())
+        return self
+
+    def cancel(self):
+        """Stop polling without waiting for the poll in flight, stop() waits
+        """
+        if self._task is not None:
+            self._task.cancel()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def poke(self):
+        """Poll now and at the busy interval until the camera is idle again
+        """
+        self.interval = self.busy_interval
+        if self._wake is not None:
+            self._wake.set()
+
+    async def get(self, max_age=None, deadline=None):
+        """The latest snapshot if it is at most max_age (default self.max_age)
+        seconds old, else a new one
+        """
+        max_age = self.max_age if max_age is None else max_age
+        snapshot = self.latest
+        if snapshot is not None and snapshot.age <= max_age:
+            self.stats['hits'] += 1
+            return snapshot
+        self.stats['misses'] += 1
+        return await self.refresh(deadline)
+
+    async def refresh(self, deadline=None):
+        """Ask the camera now, concurrent status requests are coalesced by the client
+        """
+        self.stats['polls'] += 1
+        try:
+            snapshot = await self.fetch(deadline)
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            raise
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        self._update(snapshot)
+        return snapshot
+
+    async def next(self, timeout=None):
+        """Wait for the snapshot after the current one and return it. Raises the error of
+        a failed poll, returns None at once when the poller is not running or as soon as it
+        stops, asyncio.TimeoutError after timeout seconds
+        """
+        if not self.running:
+            return None
+        if self._updated is None:
+            self._updated = asyncio.get_event_loop().create_future()
+            self._updated.add_done_callback(_retrieved)
+        return await asyncio.wait_for(asyncio.shield(self._updated), timeout)
+
+    def _update(self, snapshot):
+        if self.latest is not None and snapshot.timestamp < self.latest.timestamp:
+            return
+        self.latest = snapshot
+        self._settle(snapshot)
+
+    def _settle(self, snapshot=None, error=None):
+        # wakes everyone waiting in next(), the following ones wait for the next poll
+        updated, self._updated = self._updated, None
+        if updated is None or updated.done():
+            return
+        if error is not None:
+            # without the poller's frames, clearing them in a waiter would end the poll loop
+            updated.set_exception(error.with_traceback(None))
+        else:
+            updated.set_result(snapshot)
+
+    def _next_interval(self, snapshot):
+        if snapshot is not None and self.busy(snapshot):
+            return self.busy_interval
+        return min(self.interval * self.backoff, self.idle_interval)
+
+    async def _run(self):
+        while True:
+            snapshot = None
+            self._wake.clear()
+            try:
+                snapshot = await self.refresh()
+            except (asyncio.CancelledError, KeyboardInterrupt):
+                raise
+            except Exception as err:
+                if self._log is not None:
+                    self._log.debug('status poll failed: {0!r}', err)
+                self._settle(error=err)
+            self.interval = self._next_interval(snapshot)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def __repr__(self):
+        return '<StatusPoller every {0:.2f}s, {1}>'.format(self.interval, 'running' if self.running else 'stopped')
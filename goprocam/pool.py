@@ -0,0 +1,147 @@
+import time
+
+import aiohttp
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+from .metrics import trace_config
+
+__all__ = ['ConnectionPool', 'PoolStats']
+
+MEDIA_PORT = 8080
+
+
+class PoolStats:
+    """Counters for one connection pool, fed by aiohttp tracing
+    """
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued = 0
+        self.wait_time = 0.0
+
+    @property
+    def reuse_rate(self):
+        """Share of connections that came from the keep-alive pool
+        """
+        total = self.connections_created + self.connections_reused
+        if total == 0:
+            return 0.0
+        return self.connections_reused / total
+
+    @property
+    def average_wait(self):
+        """Average seconds a request waited for a free connection slot
+        """
+        if self.queued == 0:
+            return 0.0
+        return self.wait_time / self.queued
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'reuse_rate': self.reuse_rate,
+            'queued': self.queued,
+            'wait_time': self.wait_time,
+            'average_wait': self.average_wait,
+        }
+
+    def __str__(self):
+        return "<PoolStats requests:{0}, created:{1}, reused:{2}, wait:{3:.3f}s>".format(
+            self.requests, self.connections_created, self.connections_reused, self.wait_time)
+
+
+class ConnectionPool:
+    """Keep-alive connection pools for the camera control API (port 80)
+    and the media server (port 8080).
+
+    One pool can be handed to several GoPro/AsyncClient instances, they will
+    then share connections and statistics. The pool is closed by whoever
+    created it, or explicitly with close().
+    """
+    CONTROL = 'control'
+    MEDIA = 'media'
+
+    def __init__(self, limit=100, limit_per_host=2, keepalive_timeout=30,
+                 media_limit_per_host=4, media_keepalive_timeout=60):
+        self._options = {
+            self.CONTROL: {
+                'limit': limit,
+                'limit_per_host': limit_per_host,
+                'keepalive_timeout': keepalive_timeout,
+            },
+            self.MEDIA: {
+                'limit': limit,
+                'limit_per_host': media_limit_per_host,
+                'keepalive_timeout': media_keepalive_timeout,
+            },
+        }
+        self._sessions = {}
+        self.stats = {self.CONTROL: PoolStats(), self.MEDIA: PoolStats()}
+
+    @classmethod
+    def kind_for(cls, url):
+        """Return which pool a url belongs to
+        """
+        if urlsplit(url).port == MEDIA_PORT:
+            return cls.MEDIA
+        return cls.CONTROL
+
+    def session(self, kind=CONTROL):
+        session = self._sessions.get(kind)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(**self._options[kind])
+            session = aiohttp.ClientSession(connector=connector,
+                                            trace_configs=[self._trace_config(self.stats[kind]), trace_config()])
+            self._sessions[kind] = session
+        return session
+
+    def session_for(self, url):
+        return self.session(self.kind_for(url))
+
+    def limit_per_host(self, kind=CONTROL):
+        """Connections to one host the pool of kind opens at most
+        """
+        return self._options[kind]['limit_per_host']
+
+    def snapshot(self):
+        """Return the statistics of all pools as a dict
+        """
+        return {kind: stats.as_dict() for kind, stats in self.stats.items()}
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions = {}
+        for session in sessions:
+            await session.close()
+
+    @staticmethod
+    def _trace_config(stats):
+        async def on_request_start(session, ctx, params):
+            stats.requests += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            ctx.queued_at = time.monotonic()
+
+        async def on_connection_queued_end(session, ctx, params):
+            stats.queued += 1
+            stats.wait_time += time.monotonic() - ctx.queued_at
+
+        async def on_connection_create_end(session, ctx, params):
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats.connections_reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
@@ -0,0 +1,201 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+from .errors import HttpError, GoProError, CircuitOpenError
+
+__all__ = ['RetryPolicy', 'RetryBudget', 'CircuitBreaker', 'NON_IDEMPOTENT_PATHS']
+
+# requests that change the camera state in a way that is not safe to repeat,
+# they are only retried when they never reached the camera
+NON_IDEMPOTENT_PATHS = (
+    '/gp/gpControl/command/shutter',
+    '/gp/gpControl/command/storage/delete',
+    '/gp/gpControl/command/storage/tag_moment',
+    '/gp/gpControl/command/transcode/request',
+    '/gp/gpControl/command/transcode/video_to_video',
+    '/gp/gpControl/command/wireless',
+    '/gp/gpControl/command/system',
+    '/gp/gpControl/execute',
+    '/camera/SH',
+    '/camera/DL',
+    '/camera/DA',
+    '/bacpac/SH',
+    '/bacpac/PW',
+)
+
+# replies that mean the camera is up but could not serve the request right now
+RETRY_STATUSES = (502, 503, 504)
+
+
+def is_transport_error(err):
+    """True when err means the camera could not be reached or did not answer
+    """
+    return isinstance(err, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class RetryBudget:
+    """Caps retries to `ratio` of the requests made, with a reserve of
+    `reserve` retries for bursts. Every request deposits `ratio` tokens, every
+    retry takes one, so a dead link can not multiply the load.
+    """
+    def __init__(self, ratio=0.2, reserve=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = float(reserve)
+
+    def deposit(self):
+        self._tokens = min(self.reserve, self._tokens + self.ratio)
+
+    def withdraw(self):
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RetryStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.budget_exhausted = 0
+        self.not_idempotent = 0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'gave_up': self.gave_up,
+            'budget_exhausted': self.budget_exhausted,
+            'not_idempotent': self.not_idempotent,
+        }
+
+
+class RetryPolicy:
+    """When and how long to wait before a failed request is tried again.
+
+    Up to `attempts` tries in total, waiting a random time between 0 and
+    `base_delay` * 2 ** attempt (at most `max_delay`) in between. Only
+    transport errors and 502/503/504 replies are retried, requests to
+    `non_idempotent` paths only when they never got a connection, and all
+    retries are paid from `budget`.
+    """
+    def __init__(self, attempts=3, base_delay=0.2, max_delay=5.0, budget=None, non_idempotent=NON_IDEMPOTENT_PATHS):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.non_idempotent = tuple(non_idempotent)
+        self.stats = RetryStats()
+
+    def idempotent(self, url):
+        """
+        >>> RetryPolicy().idempotent('http://10.5.5.9/gp/gpControl/setting/2/1')
+        True
+        >>> RetryPolicy().idempotent('http://10.5.5.9/gp/gpControl/command/shutter?p=1')
+        False
+        """
+        return not urlsplit(url).path.startswith(self.non_idempotent)
+
+    def delay(self, attempt, base=None):
+        """Seconds to wait before retry number attempt (1 for the first retry)
+        """
+        ceiling = min(self.max_delay, (self.base_delay if base is None else base) * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def should_retry(self, url, err, attempt):
+        """Decide on a retry after attempt tries of url failed with err
+        """
+        if isinstance(err, GoProError) or not (
+                is_transport_error(err) or isinstance(err, HttpError) and err.status in RETRY_STATUSES):
+            return False
+        if attempt >= self.attempts:
+            self.stats.gave_up += 1
+            return False
+        if not self.idempotent(url) and not isinstance(err, aiohttp.ClientConnectorError):
+            self.stats.not_idempotent += 1
+            return False
+        if not self.budget.withdraw():
+            self.stats.budget_exhausted += 1
+            return False
+        self.stats.retries += 1
+        return True
+
+
+class CircuitBreaker:
+    """Fails requests to a camera fast once it stopped answering.
+
+    After `failure_threshold` transport failures in a row the circuit opens
+    and requests raise CircuitOpenError for `reset_timeout` seconds. Then a
+    single trial request is let through, its success closes the circuit and
+    its failure opens it again. When it ends neither way (cancelled, undecodable
+    reply) the next request is the trial.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.short_circuited = 0
+        self._opened_at = None
+        self._trial = False
+
+    def check(self):
+        """Raise CircuitOpenError unless a request may go out now
+        """
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial = False
+        if self.state == self.HALF_OPEN and not self._trial:
+            self._trial = True
+            return
+        self.short_circuited += 1
+        raise CircuitOpenError('Camera not answering, retry in {0:.1f}s'.format(self.retry_in()))
+
+    def retry_in(self):
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+        self._trial = False
+
+    def abandon(self):
+        """A request let through by check() ended without telling whether the
+        camera answers (cancelled, undecodable reply...): the next one is the trial
+        """
+        if self.state == self.HALF_OPEN:
+            self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial = False
+
+    def as_dict(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'short_circuited': self.short_circuited,
+        }
@@ -0,0 +1,128 @@
+import asyncio
+import collections
+import time
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+__all__ = ['RequestScheduler', 'INTERACTIVE', 'BULK', 'classify']
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+BULK_PATHS = ('/gp/gpMediaList', '/gp/gpMediaMetadata', '/videos')
+
+
+def classify(url):
+    """Return the priority class of a camera url
+    >>> classify('http://10.5.5.9/gp/gpControl/command/shutter?p=1')
+    'interactive'
+    >>> classify('http://10.5.5.9:8080/gp/gpMediaList')
+    'bulk'
+    """
+    if urlsplit(url).path.startswith(BULK_PATHS):
+        return BULK
+    return INTERACTIVE
+
+
+class ClassStats:
+    def __init__(self):
+        self.requests = 0
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.waited = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def average_wait(self):
+        if self.requests == 0:
+            return 0.0
+        return self.wait_time / self.requests
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'active': self.active,
+            'queued': self.queued,
+            'max_queued': self.max_queued,
+            'waited': self.waited,
+            'wait_time': self.wait_time,
+            'average_wait': self.average_wait,
+            'max_wait': self.max_wait,
+        }
+
+
+class RequestScheduler:
+    """Admits at most `slots` concurrent requests to one camera.
+
+    Interactive requests (control, status) go before queued bulk requests
+    (media lists, metadata, downloads), and bulk requests can never take the
+    last `reserved` slots, so a shutter never waits behind a download.
+    """
+    def __init__(self, slots=4, reserved=1):
+        if reserved >= slots:
+            raise ValueError('reserved must leave at least one slot for bulk requests')
+        self.slots = slots
+        self.reserved = reserved
+        self.stats = {INTERACTIVE: ClassStats(), BULK: ClassStats()}
+        self._waiters = {INTERACTIVE: collections.deque(), BULK: collections.deque()}
+
+    @property
+    def active(self):
+        return self.stats[INTERACTIVE].active + self.stats[BULK].active
+
+    def _can_run(self, klass):
+        if self.active >= self.slots:
+            return False
+        if klass == BULK:
+            return self.stats[BULK].active < self.slots - self.reserved
+        return True
+
+    async def acquire(self, klass):
+        stats = self.stats[klass]
+        stats.requests += 1
+        waiters = self._waiters[klass]
+        if not waiters and self._can_run(klass):
+            stats.active += 1
+            return
+        started = time.monotonic()
+        future = asyncio.get_event_loop().create_future()
+        waiters.append(future)
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in waiters:
+                waiters.remove(future)
+                stats.queued -= 1
+            elif future.done() and not future.cancelled():
+                # granted just as we were cancelled, pass the slot on
+                self.release(klass)
+            raise
+        finally:
+            waited = time.monotonic() - started
+            stats.waited += 1
+            stats.wait_time += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def release(self, klass):
+        self.stats[klass].active -= 1
+        self._wake()
+
+    def _wake(self):
+        for klass in (INTERACTIVE, BULK):
+            waiters = self._waiters[klass]
+            while waiters and self._can_run(klass):
+                future = waiters.popleft()
+                self.stats[klass].queued -= 1
+                if future.done():
+                    continue
+                self.stats[klass].active += 1
+                future.set_result(None)
+
+    def snapshot(self):
+        return {klass: stats.as_dict() for klass, stats in self.stats.items()}
@@ -0,0 +1,309 @@
+import marshal
+import os
+import re
+import tempfile
+import threading
+
+from . import jsoncodec
+from .errors import InvalidSettingError
+
+__all__ = ['CapabilitySchema', 'SchemaCache', 'default_cache']
+
+# version of the compiled form SchemaCache stores, files of another one are rebuilt
+COMPILED_FORMAT = (2, marshal.version)
+
+# the attributes of a CapabilitySchema that make up its compiled form
+_COMPILED = ('info', 'version', 'rules', 'settings', 'setting_names', 'setting_labels', 'modes', 'mode_labels',
+             'status_names', 'blacklist', 'dependencies')
+
+
+def _condition(condition):
+    """An activated_by entry as (kind, id, allowed values)
+    """
+    if 'status_id' in condition:
+        kind, ident = 'status', condition['status_id']
+    else:
+        kind, ident = 'setting', condition['setting_id']
+    values = condition['values'] if 'values' in condition else [condition['setting_value']]
+    return kind, ident, frozenset(values)
+
+
+class CapabilitySchema:
+    """The capability schema a gpControl camera publishes at /gp/gpControl
+    (doc/HD7_01_01_51_00.json is the one of a HERO7 Black): its modes,
+    settings, status fields and the `filters` that blacklist values of a
+    setting while other settings have certain values.
+
+    It is indexed once so settings and modes are checked in O(1) before
+    anything is sent. A schema without modes (older cameras) checks nothing.
+    Instances are shared between cameras (see SchemaCache), treat them as
+    read-only.
+    """
+    def __init__(self, schema):
+        self.info = schema.get('info', {})
+        self.version = schema.get('version')
+        # the filters as (blacklisted setting id, values, conditions)
+        self.rules = []
+        # setting id -> allowed values
+        self.settings = {}
+        # setting id -> name
+        self.setting_names = {}
+        # setting id -> {value: display name}
+        self.setting_labels = {}
+        # (mode, sub mode) -> name
+        self.modes = {}
+        # mode -> display name
+        self.mode_labels = {}
+        # status id -> name
+        self.status_names = {}
+        # (setting id, value) -> rules, each a tuple of conditions that all have to hold
+        self.blacklist = {}
+        # setting id -> ids of the settings that restrict its values
+        self.dependencies = {}
+
+        for mode in schema.get('modes', []):
+            self.mode_labels[mode['value']] = mode['display_name']
+            for setting in mode['settings']:
+                values = self.settings.setdefault(setting['id'], set())
+                values.update(option['value'] for option in setting['options'])
+                self.setting_names[setting['id']] = setting['path_segment']
+                self.setting_labels.setdefault(setting['id'], {}).update(
+                    (option['value'], option['display_name']) for option in setting['options'])
+                if setting['path_segment'] == 'default_sub_mode':
+                    for option in setting['options']:
+                        self.modes[(mode['value'], option['value'])] = option['display_name']
+        self.settings = {setting: frozenset(values) for setting, values in self.settings.items()}
+        for entry in schema.get('camera_mode_map', []):
+            self.modes[(entry['mode_value'], entry['sub_mode_value'])] = entry['wsdk_mode_key']
+        for group in schema.get('status', {}).get('groups', []):
+            for field in group['fields']:
+                self.status_names[field['id']] = field['name']
+
+        for rule in schema.get('filters', []):
+            self._add_rule(rule['blacklist']['setting_id'], rule['blacklist']['values'],
+                           tuple(_condition(condition) for condition in rule['activated_by']))
+
+    def _add_rule(self, target, values, conditions):
+        self.rules.append((target, values, conditions))
+        for value in values:
+            self.blacklist.setdefault((target, value), []).append(conditions)
+        for kind, source, _ in conditions:
+            if kind == 'setting' and source != target:
+                self.dependencies.setdefault(target, set()).add(source)
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'rb') as fd:
+            return cls(jsoncodec.loads(fd.read()))
+
+    def compiled(self):
+        """The indexes as plain containers marshal can store, from_compiled()
+        takes them back without decoding and walking the whole schema again
+        """
+        data = {name: getattr(self, name) for name in _COMPILED}
+        data['dependencies'] = {setting: frozenset(sources) for setting, sources in self.dependencies.items()}
+        data['format'] = COMPILED_FORMAT
+        return data
+
+    @classmethod
+    def from_compiled(cls, data):
+        """
+        >>> schema = CapabilitySchema.from_compiled(CapabilitySchema({'filters': [
+        ...     {'activated_by': [{'setting_id': 2, 'values': [1]}], 'blacklist': {'setting_id': 3, 'values': [0]}}]}).compiled())
+        >>> schema.blacklist
+        {(3, 0): [(('setting', 2, frozenset({1})),)]}
+        """
+        if data.get('format') != COMPILED_FORMAT:
+            raise ValueError('Unknown compiled schema format {0}'.format(data.get('format')))
+        schema = cls.__new__(cls)
+        for name in _COMPILED:
+            setattr(schema, name, data[name])
+        return schema
+
+    def status_name(self, status_id):
+        """
+        >>> CapabilitySchema({'status': {'groups': [{'fields': [{'id': 8, 'name': 'system_busy'}]}]}}).status_name(8)
+        'system_busy'
+        """
+        return self.status_names.get(int(status_id))
+
+    def blocked_by(self, setting, value, settings, status=None):
+        """Return the conditions of the first filter that blacklists setting=value
+        while the camera has `settings` and `status` ({id: value}), or None
+        """
+        for conditions in self.blacklist.get((int(setting), int(value)), ()):
+            for kind, ident, values in conditions:
+                source = (settings if kind == 'setting' else status) or {}
+                current = source.get(ident)
+                if current is None:
+                    current = source.get(str(ident))
+                if current is None or int(current) not in values:
+                    break
+            else:
+                return conditions
+        return None
+
+    def validate_setting(self, setting, value, settings=None, status=None):
+        """Raise InvalidSettingError when the camera does not have the setting or value,
+        or, given the other `settings` and `status` ({id: value}), a filter blacklists it
+        """
+        if not self.settings:
+            return
+        try:
+            setting, value = int(setting), int(value)
+        except (TypeError, ValueError) as err:
+            raise InvalidSettingError('Invalid value {0!r} for setting {1!r}'.format(value, setting)) from err
+        allowed = self.settings.get(setting)
+        if allowed is None:
+            raise InvalidSettingError('Unknown setting {0}'.format(setting))
+        if value not in allowed:
+            raise InvalidSettingError('Invalid value {0} for setting {1} ({2}), allowed: {3}'.format(
+                value, setting, self.setting_names[setting], sorted(allowed)))
+        if settings is not None:
+            conditions = self.blocked_by(setting, value, settings, status)
+            if conditions is not None:
+                raise InvalidSettingError('Value {0} for setting {1} ({2}) not allowed while {3}'.format(
+                    value, setting, self.setting_names[setting],
+                    ', '.join('{0} {1} in {2}'.format(kind, ident, sorted(values)) for kind, ident, values in conditions)))
+
+    def validate_mode(self, mode, submode):
+        """Raise InvalidSettingError when the camera does not have the mode and sub mode
+        """
+        if not self.modes:
+            return
+        try:
+            mode, submode = int(mode), int(submode)
+        except (TypeError, ValueError) as err:
+            raise InvalidSettingError('Invalid mode {0!r} sub mode {1!r}'.format(mode, submode)) from err
+        if (mode, submode) not in self.modes:
+            raise InvalidSettingError('Invalid mode {0} sub mode {1}'.format(mode, submode))
+
+    def apply_order(self, settings):
+        """Group setting ids into stages to send one after the other, a
+        setting comes after the settings that restrict its values. The
+        settings within a stage are independent of each other.
+        Settings that restrict each other are sent one by one, by id.
+        >>> schema = CapabilitySchema({'filters': [
+        ...     {'activated_by': [{'setting_id': 2, 'values': [1]}], 'blacklist': {'setting_id': 3, 'values': [0]}}]})
+        >>> schema.apply_order([3, 2, 4])
+        [[2, 4], [3]]
+        """
+        pending = {}
+        for setting in settings:
+            pending[setting] = self.dependencies.get(setting, set()).intersection(settings) - {setting}
+        stages = []
+        while pending:
+            stage = sorted(setting for setting, waits in pending.items() if not waits)
+            if not stage:
+                # a cycle, break it at the setting waiting for the fewest others
+                stage = [min(pending, key=lambda setting: (len(pending[setting]), setting))]
+            for setting in stage:
+                del pending[setting]
+            for waits in pending.values():
+                waits.difference_update(stage)
+            stages.append(stage)
+        return stages
+
+
+class SchemaCache:
+    """CapabilitySchemas by camera model and firmware, built once per process
+    and shared read-only by the GoPro instances in it.
+
+    With a `directory` the compiled form is also kept on disk, marshalled
+    and written atomically, so a schema is only built from the camera's reply the first
+    time that firmware is seen. Schemas without modes are cheap and not
+    cached at all.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.stats = {'memory': 0, 'disk': 0, 'built': 0}
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_type, firmware_version):
+        """
+        >>> SchemaCache.key('HD7', 'HD7.01.01.51.00')
+        'HD7-HD7.01.01.51.00'
+        """
+        return re.sub(r'[^\w.-]', '_', '{0}-{1}'.format(model_type, firmware_version))
+
+    def cached(self, key):
+        """The schema of key if it is in memory already, else None
+        """
+        schema = self._schemas.get(key)
+        if schema is not None:
+            self.stats['memory'] += 1
+        return schema
+
+    def get(self, key, reply=None):
+        """Return the schema of key from memory, disk or else built from reply,
+        the /gp/gpControl reply of a camera (None if there is none).
+        Blocks on file IO, GoPro runs it in an executor.
+        """
+        schema = self._schemas.get(key)
+        if schema is not None:
+            self.stats['memory'] += 1
+            return schema
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is not None:
+                self.stats['memory'] += 1
+                return schema
+            schema = self._read(key)
+            if schema is not None:
+                self.stats['disk'] += 1
+            elif reply is None:
+                return None
+            else:
+                schema = CapabilitySchema(reply)
+                self.stats['built'] += 1
+                if not schema.settings:
+                    return schema
+                self._write(key, schema)
+            self._schemas[key] = schema
+            return schema
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.schema')
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as fd:
+                return CapabilitySchema.from_compiled(marshal.loads(fd.read()))
+        except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError):
+            # missing, unreadable or from another version, built again
+            return None
+
+    def _write(self, key, schema):
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.directory, prefix='.' + key, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(marshal.dumps(schema.compiled()))
+                os.replace(temp, self._path(key))
+            except BaseException:
+                os.unlink(temp)
+                raise
+        except OSError:
+            # a read-only or full cache directory only costs the next process a rebuild
+            pass
+
+
+def default_directory():
+    """$GOPROCAM_CACHE, else goprocam in $XDG_CACHE_HOME or ~/.cache
+    """
+    directory = os.environ.get('GOPROCAM_CACHE')
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'goprocam')
+
+
+# shared by the GoPro instances that are not given a SchemaCache
+default_cache = SchemaCache(default_directory())
@@ -0,0 +1,85 @@
+import asyncio
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+from .errors import DeadlineExceeded
+
+__all__ = ['SingleFlight', 'COALESCED_PATHS']
+
+# read-only endpoints where concurrent identical GETs can share one reply,
+# commands and settings are never coalesced
+COALESCED_PATHS = ('/gp/gpControl', '/gp/gpControl/status', '/gp/gpMediaList', '/gp/gpMediaMetadata')
+
+
+class FlightStats:
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+
+    def as_dict(self):
+        return {'requests': self.requests, 'coalesced': self.coalesced}
+
+
+class SingleFlight:
+    """Lets concurrent identical GETs to the endpoints in `paths` share one
+    request. Callers that arrive while a request for the same key is in
+    flight wait for it and get the same result object, so results must be
+    treated as read-only.
+
+    The request runs in its own task, a cancelled caller does not cancel it
+    for the others, and should not be bound to the deadline of the caller
+    that started it: each caller stops waiting at its own.
+    """
+    def __init__(self, paths=COALESCED_PATHS):
+        self.paths = frozenset(paths or ())
+        self.stats = {}
+        self._flights = {}
+
+    def shares(self, url):
+        """Whether the requests to url are coalesced
+        """
+        return urlsplit(url).path in self.paths
+
+    async def do(self, key, url, factory, deadline=None):
+        """Return the result of factory(), shared with the callers of the
+        same key while it runs. url decides if it is coalesced at all, a
+        caller stops waiting at its own `deadline`.
+        """
+        path = urlsplit(url).path
+        if path not in self.paths:
+            return await factory()
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats[path] = FlightStats()
+        stats.requests += 1
+        flight = self._flights.get(key)
+        if flight is not None:
+            stats.coalesced += 1
+        else:
+            flight = asyncio.ensure_future(factory())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda future: self._landed(key, future))
+        if deadline is None:
+            return await asyncio.shield(flight)
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight), deadline.remaining())
+        except asyncio.TimeoutError:
+            if flight.done():
+                raise
+            raise DeadlineExceeded('Deadline for {0} exceeded'.format(url))
+
+    def _landed(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # retrieved here in case every caller was cancelled
+            flight.exception()
+
+    @property
+    def coalesced(self):
+        return sum(stats.coalesced for stats in self.stats.values())
+
+    def snapshot(self):
+        return {path: stats.as_dict() for path, stats in self.stats.items()}
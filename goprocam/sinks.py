@@ -0,0 +1,192 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = ['BufferPool', 'FileSink', 'FSYNC_CLOSE', 'preallocate']
+
+FSYNC_CLOSE = 'close'
+
+_default_executor = None
+
+
+def default_executor():
+    """Thread pool shared by all sinks that are not given their own
+    """
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='goprocam-writer')
+    return _default_executor
+
+
+def preallocate(filename, size):
+    """Create filename with size bytes reserved on disk, blocking.
+    Only for files that are not resumed by their length.
+    """
+    with open(filename, 'wb') as fd:
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd.fileno(), 0, size)
+                return
+            except OSError:
+                pass  # not supported by the file system
+        fd.truncate(size)
+
+
+class BufferPool:
+    """Free list of equally sized bytearrays
+    """
+    def __init__(self, buffer_size=64 * 1024, max_buffers=16):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free = []
+        self.allocated = 0
+
+    def acquire(self):
+        if self._free:
+            return self._free.pop()
+        self.allocated += 1
+        return bytearray(self.buffer_size)
+
+    def release(self, buf):
+        if len(self._free) < self.max_buffers and len(buf) == self.buffer_size:
+            self._free.append(buf)
+
+
+class FileSink:
+    """Writes a download to disk from a thread pool so the event loop never
+    blocks on the file system.
+
+    Incoming chunks are coalesced into pooled buffers of `buffer_pool.buffer_size`
+    bytes, each full buffer is written at its own offset by the executor, one
+    after the other so the file never has a hole below its size. At most
+    `queue_size` buffers are queued, write() waits when the disk falls behind.
+
+    `fsync` is None (leave it to the OS), FSYNC_CLOSE, or a number of bytes
+    between fsyncs.
+    """
+    def __init__(self, filename, offset=0, truncate=False, buffer_pool=None, executor=None,
+                 queue_size=4, fsync=None):
+        self.filename = filename
+        self.position = offset
+        self.truncate = truncate
+        self.buffer_pool = buffer_pool or BufferPool()
+        self.executor = executor or default_executor()
+        self.fsync = fsync
+        self._slots = asyncio.Semaphore(queue_size)
+        self._pending = set()
+        self._last = None
+        self._error = None
+        self._fd = None
+        self._buffer = None
+        self._filled = 0
+        self._since_sync = 0
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close(sync=exc_type is None)
+
+    async def open(self):
+        self._fd = await self._run(self._open)
+
+    def _open(self):
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        if self.truncate:
+            flags |= os.O_TRUNC
+        return os.open(self.filename, flags, 0o644)
+
+    async def write(self, data):
+        """Queue data for writing at the current position
+        """
+        if self._error is not None:
+            raise self._error
+        view = memoryview(data)
+        size = self.buffer_pool.buffer_size
+        while view:
+            if self._buffer is None:
+                self._buffer = self.buffer_pool.acquire()
+                self._filled = 0
+            count = min(len(view), size - self._filled)
+            self._buffer[self._filled:self._filled + count] = view[:count]
+            self._filled += count
+            view = view[count:]
+            if self._filled == size:
+                await self._submit()
+
+    async def flush(self):
+        """Write out the partly filled buffer and wait for everything queued
+        """
+        if self._buffer is not None and self._filled:
+            await self._submit()
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+        if self._error is not None:
+            raise self._error
+
+    async def close(self, sync=True):
+        if self._fd is None:
+            return
+        try:
+            await self.flush()
+            if sync and self.fsync is not None:
+                await self._run(os.fsync, self._fd)
+        finally:
+            if self._buffer is not None:
+                self.buffer_pool.release(self._buffer)
+                self._buffer = None
+            fd, self._fd = self._fd, None
+            if self._pending:
+                # cancelled while writes are queued, the fd goes once the last one is done
+                self._last.add_done_callback(lambda future: os.close(fd))
+            else:
+                os.close(fd)
+
+    async def _submit(self):
+        buf, filled, offset = self._buffer, self._filled, self.position
+        self._buffer = None
+        self.position += filled
+        await self._slots.acquire()
+        future = asyncio.ensure_future(self._write_after(self._last, self._fd, buf, filled, offset))
+        self._last = future
+        self._pending.add(future)
+        future.add_done_callback(lambda f: self._written(f, buf))
+
+    async def _write_after(self, previous, fd, buf, filled, offset):
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        if self._error is None:
+            await self._run(self._write, fd, buf, filled, offset)
+
+    def _written(self, future, buf):
+        self._pending.discard(future)
+        self._slots.release()
+        self.buffer_pool.release(buf)
+        if not future.cancelled() and future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def _write(self, fd, buf, filled, offset):
+        view = memoryview(buf)[:filled]
+        if hasattr(os, 'pwrite'):
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            with self._lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                while view:
+                    view = view[os.write(fd, view):]
+        if isinstance(self.fsync, int) and not isinstance(self.fsync, bool):
+            with self._lock:
+                self._since_sync += filled
+                if self._since_sync < self.fsync:
+                    return
+                self._since_sync = 0
+            os.fsync(fd)
+
+    def _run(self, func, *args):
+        return asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
@@ -0,0 +1,180 @@
+import array
+import time
+import weakref
+
+from goprocam import constants
+
+__all__ = ['StatusSnapshot', 'StatusValues', 'StatusLayout', 'layout_for', 'MISSING']
+
+# values are stored as C ints, larger ones go to StatusValues.extra
+TYPECODE = 'i'
+# marks the ids the camera did not report
+MISSING = -(2 ** 31)
+
+# ids with a slot without a schema, the camera reports about this many
+DEFAULT_SIZE = 128
+
+
+class StatusValues(array.array):
+    """Status or setting values of a snapshot as integers indexed by numeric id.
+
+    Values the camera did not report are MISSING, values that are not
+    integers, do not fit a C int or have ids beyond the array are in
+    `extra` ({id: value} or None). The named accessors of a layout are generated properties.
+    """
+    __slots__ = ('extra',)
+
+    def get(self, ident, default=None):
+        """The value of ident (int or numeric str), default if not reported
+        """
+        ident = int(ident)
+        if self.extra is not None and ident in self.extra:
+            return self.extra[ident]
+        if ident < len(self):
+            value = self[ident]
+            if value != MISSING:
+                return value
+        return default
+
+    def items(self):
+        """(id, value) of every reported value, by id
+        """
+        values = [(ident, value) for ident, value in enumerate(self) if value != MISSING]
+        if self.extra:
+            values.extend(self.extra.items())
+            values.sort(key=lambda item: item[0])
+        return values
+
+    def as_dict(self):
+        """{str id: value} as the camera reports them
+        """
+        return {str(ident): value for ident, value in self.items()}
+
+    def named(self):
+        """{name: value} of every reported value with a named accessor
+        """
+        values = {}
+        for name, accessor in vars(type(self)).items():
+            if isinstance(accessor, property):
+                value = getattr(self, name)
+                if value is not None:
+                    values[name] = value
+        return values
+
+
+def _accessor(ident):
+    return property(lambda self: self.get(ident), doc='value of id {0}'.format(ident))
+
+
+def _values_type(name, accessors):
+    """A StatusValues subclass with a property per (name, id) in accessors
+    """
+    namespace = {'__slots__': ()}
+    for accessor, ident in accessors:
+        if accessor.isidentifier() and not hasattr(StatusValues, accessor) and accessor not in namespace:
+            namespace[accessor] = _accessor(ident)
+    return type(name, (StatusValues,), namespace)
+
+
+class StatusSnapshot:
+    """Every status and setting of one /gp/gpControl/status reply and the
+    time.monotonic() it was decoded at, so `age` is not thrown off when the
+    clock is set. `status` and `settings` are StatusValues:
+    snapshot.status.IsBusy, snapshot.status.system_busy (from the schema),
+    snapshot.status[8] and snapshot.settings.get(2) all work.
+    """
+    __slots__ = ('timestamp', 'status', 'settings')
+
+    def __init__(self, timestamp, status, settings):
+        self.timestamp = timestamp
+        self.status = status
+        self.settings = settings
+
+    @property
+    def age(self):
+        return time.monotonic() - self.timestamp
+
+    def as_dict(self):
+        """The snapshot as the reply it was decoded from
+        """
+        return {'status': self.status.as_dict(), 'settings': self.settings.as_dict()}
+
+    def __repr__(self):
+        return '<StatusSnapshot of {0:.3f} with {1} status and {2} settings>'.format(
+            self.timestamp, len(self.status.items()), len(self.settings.items()))
+
+
+class StatusLayout:
+    """The StatusValues types and blank arrays snapshots are decoded into,
+    named after constants.Status.STATUS and, with a CapabilitySchema, its
+    status fields and the settings it names once. Built once per schema,
+    see layout_for().
+    """
+    def __init__(self, schema=None):
+        status = [(name, int(ident)) for name, ident in vars(constants.Status.STATUS).items()
+                  if not name.startswith('_')]
+        settings = [('Resolution', int(constants.Video.RESOLUTION)), ('Framerate', int(constants.Video.FRAME_RATE))]
+        if schema is not None:
+            status.extend((name, ident) for ident, name in sorted(schema.status_names.items()))
+            named = {}
+            for ident, name in schema.setting_names.items():
+                named.setdefault(name, []).append(ident)
+            settings.extend((name, idents[0]) for name, idents in sorted(named.items()) if len(idents) == 1)
+        if schema is not None and schema.settings:
+            # sized to what the camera reports, anything else goes to extra
+            status_size = max(ident + 1 for _, ident in status)
+            settings_size = max([ident + 1 for _, ident in settings] + [ident + 1 for ident in schema.settings])
+        else:
+            status_size = settings_size = DEFAULT_SIZE
+        self.status_type = _values_type('Status', status)
+        self.settings_type = _values_type('Settings', settings)
+        self._blank_status = array.array(TYPECODE, [MISSING]) * status_size
+        self._blank_settings = array.array(TYPECODE, [MISSING]) * settings_size
+        # reply key -> index, saves an int() per value
+        self._index = {str(ident): ident for ident in range(max(status_size, settings_size))}
+
+    def decode(self, data, timestamp=None):
+        """Decode a /gp/gpControl/status reply ({'status': {...}, 'settings': {...}})
+        into a StatusSnapshot in one pass over its values
+        >>> snapshot = StatusLayout().decode({'status': {'8': 1, '30': 'GP01'}, 'settings': {'2': 9}})
+        >>> snapshot.status.IsBusy, snapshot.status.CamName, snapshot.settings.Resolution, snapshot.settings.Framerate
+        (1, 'GP01', 9, None)
+        """
+        return StatusSnapshot(time.monotonic() if timestamp is None else timestamp,
+                              self._values(self.status_type, self._blank_status, data.get('status')),
+                              self._values(self.settings_type, self._blank_settings, data.get('settings')))
+
+    def _values(self, kind, blank, reported):
+        values = kind(TYPECODE, blank)
+        extra = None
+        if reported:
+            index = self._index
+            for key, value in reported.items():
+                try:
+                    values[index[key]] = value
+                except (KeyError, IndexError, TypeError, OverflowError):
+                    # beyond the array, not an int or too large for one
+                    if extra is None:
+                        extra = {}
+                    extra[int(key)] = value
+        values.extra = extra
+        return values
+
+
+_default_layout = None
+_layouts = weakref.WeakKeyDictionary()
+
+
+def layout_for(schema=None):
+    """The StatusLayout of a CapabilitySchema (or of none), built once per
+    schema and shared like the schema itself
+    """
+    global _default_layout
+    if schema is None:
+        if _default_layout is None:
+            _default_layout = StatusLayout()
+        return _default_layout
+    layout = _layouts.get(schema)
+    if layout is None:
+        layout = _layouts[schema] = StatusLayout(schema)
+    return layout
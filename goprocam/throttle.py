@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+__all__ = ['TokenBucket', 'Throttle']
+
+
+class TokenBucket:
+    """Token bucket rate limiter, `rate` bytes per second with bursts of up
+    to `burst` bytes. A rate of None means unlimited. The rate can be changed
+    at any time with set_rate(), also while downloads are waiting.
+    """
+    # how often waiting consumers look at the rate again
+    recheck = 0.25
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = None
+        self.burst = None
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        self._refill()
+        was_limited = self.rate is not None
+        self.rate = rate
+        if rate is None:
+            self.burst = None
+            self._tokens = 0.0
+            return
+        self.burst = burst or rate
+        # a new limit starts with a full bucket
+        self._tokens = min(self._tokens, self.burst) if was_limited else self.burst
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def consume(self, amount):
+        """Take amount tokens, waiting while the bucket is in debt
+        """
+        if self.rate is None:
+            return
+        self._refill()
+        self._tokens -= amount
+        while self.rate is not None and self._tokens < 0:
+            await asyncio.sleep(min(-self._tokens / self.rate, self.recheck))
+            self._refill()
+
+
+class Throttle:
+    """Download bandwidth control for one camera.
+
+    Downloads are limited by the camera's own bucket and, when given, a
+    `shared` TokenBucket for all cameras. With `yield_to_control` downloads
+    also pause, for at most `max_yield` seconds at a time, while control
+    requests are in flight so they get the WiFi link to themselves.
+    """
+    def __init__(self, rate=None, burst=None, shared=None, yield_to_control=True, max_yield=1.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.shared = shared
+        self.yield_to_control = yield_to_control
+        self.max_yield = max_yield
+        self.control_pending = 0
+        self.yielded = 0.0
+        self._control_idle = None
+
+    def set_rate(self, rate, burst=None):
+        self.bucket.set_rate(rate, burst)
+
+    def control(self, counted=True):
+        """Context manager wrapped around every control request,
+        does nothing unless counted
+        """
+        return _ControlRequest(self, counted)
+
+    async def consume(self, amount):
+        if self.yield_to_control and self.control_pending:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self._idle_event().wait(), self.max_yield)
+            except asyncio.TimeoutError:
+                pass
+            self.yielded += time.monotonic() - started
+        await self.bucket.consume(amount)
+        if self.shared is not None:
+            await self.shared.consume(amount)
+
+    def _idle_event(self):
+        if self._control_idle is None:
+            self._control_idle = asyncio.Event()
+            if not self.control_pending:
+                self._control_idle.set()
+        return self._control_idle
+
+    def _enter(self):
+        self.control_pending += 1
+        self._idle_event().clear()
+
+    def _exit(self):
+        self.control_pending -= 1
+        if not self.control_pending:
+            self._idle_event().set()
+
+
+class _ControlRequest:
+    def __init__(self, throttle, counted):
+        self.throttle = throttle
+        self.counted = counted
+
+    def __enter__(self):
+        if self.counted:
+            self.throttle._enter()
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.counted:
+            self.throttle._exit()
@@ -0,0 +1,106 @@
+import time
+
+import aiohttp
+try:
+    from urlparse import urlsplit
+except ImportError:  # Python 3
+    from urllib.parse import urlsplit
+
+from .errors import DeadlineExceeded
+
+__all__ = ['Deadline', 'TimeoutPolicy', 'request_class', 'CONTROL', 'STATUS', 'LISTING', 'DOWNLOAD']
+
+CONTROL = 'control'
+STATUS = 'status'
+LISTING = 'listing'
+DOWNLOAD = 'download'
+
+DEFAULT_TIMEOUTS = {
+    CONTROL: aiohttp.ClientTimeout(total=10, connect=3, sock_read=8),
+    STATUS: aiohttp.ClientTimeout(total=5, connect=3, sock_read=4),
+    LISTING: aiohttp.ClientTimeout(total=60, connect=5, sock_read=20),
+    # no total for downloads, sock_read is the stall detector
+    DOWNLOAD: aiohttp.ClientTimeout(total=None, connect=5, sock_read=20),
+}
+
+
+def request_class(url):
+    """Return the timeout class of a camera url
+    >>> request_class('http://10.5.5.9/gp/gpControl/status')
+    'status'
+    >>> request_class('http://10.5.5.9:8080/videos/DCIM/100GOPRO/GOPR0001.MP4')
+    'download'
+    """
+    path = urlsplit(url).path
+    if path == '/gp/gpControl/status' or path == '/camera/sx':
+        return STATUS
+    if path.startswith(('/gp/gpMediaList', '/gp/gpMediaMetadata')):
+        return LISTING
+    if path.startswith('/videos'):
+        return DOWNLOAD
+    return CONTROL
+
+
+class Deadline:
+    """A point in time an operation has to be done by.
+
+    High level GoPro methods take one and pass it on to their requests,
+    which never wait past it. split() hands a share of what is left to one
+    step so the following steps are not starved.
+    """
+    def __init__(self, seconds=None, at=None):
+        self.at = at if at is not None else time.monotonic() + seconds
+
+    @classmethod
+    def of(cls, value):
+        """None, a Deadline or seconds from now as a Deadline (or None)
+        """
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self):
+        return self.at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, what='operation'):
+        """Raise DeadlineExceeded when the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded('Deadline for {0} exceeded'.format(what))
+
+    def split(self, share):
+        """A Deadline for the next step, `share` (0-1) of the time left
+        """
+        return Deadline(at=time.monotonic() + max(0.0, self.remaining()) * share)
+
+    def __repr__(self):
+        return '<Deadline in {0:.3f}s>'.format(self.remaining())
+
+
+class TimeoutPolicy:
+    """aiohttp.ClientTimeout budgets per request class (CONTROL, STATUS,
+    LISTING, DOWNLOAD), overridable with `timeouts`
+    """
+    def __init__(self, timeouts=None):
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+
+    def for_request(self, url, total=None, deadline=None):
+        """ClientTimeout for url, `total` overrides the class total and
+        `deadline` caps it
+        """
+        base = self.timeouts[request_class(url)]
+        if total is None:
+            total = base.total
+        if deadline is not None:
+            deadline.check(url)
+            remaining = deadline.remaining()
+            total = remaining if total is None else min(total, remaining)
+        if total == base.total:
+            return base
+        return aiohttp.ClientTimeout(total=total, connect=base.connect, sock_read=base.sock_read,
+                                     sock_connect=base.sock_connect)
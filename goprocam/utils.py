@@ -4,16 +4,11 @@ import inspect
 import warnings
 import json
 import time
-
-from goprocam import constants
+import asyncio
 
 string_types = (type(b''), type(u''))
 
-__all__ = ['Struct', 'media_size', 'deprecated']
-
-STATUS_MAP = {}
-for key, value in vars(constants.Status.STATUS).items():
-    STATUS_MAP[value] = key
+__all__ = ['Struct', 'media_size', 'deprecated', 'LoopStallMonitor']
 
 
 class Struct:
@@ -21,119 +16,55 @@ class Struct:
         self.__dict__.update(entries)
 
 
+# the labels of status and setting codes, goprocam.labels extends them
+# from constants and the camera's schema
+MODE_LABELS = {0: "Video", 1: "Photo", 2: "Multi-Shot"}
+
+# (mode, sub mode) -> label
+SUB_MODE_LABELS = {
+    (0, 0): "Video", (0, 1): "TimeLapse Video", (0, 2): "Video+Photo", (0, 3): "Looping",
+    (1, 0): "Single Pic", (1, 1): "Burst", (1, 2): "NightPhoto",
+    (2, 0): "Burst", (2, 1): "TimeLapse", (2, 2): "Night lapse",
+}
+
+RECORDING_LABELS = {0: "Standby", 1: "Recording"}
+
+BATTERY_LABELS = {0: "Empty", 1: "Low", 2: "Halfway", 3: "Full", 4: "Charging"}
+
+VIDEO_RES_LABELS = {
+    1: "4k", 2: "4kSV", 4: "2k", 5: "2kSV", 6: "2k4by3", 7: "1440p", 8: "1080pSV", 9: "1080p", 10: "960p",
+    11: "720pSV", 12: "720p", 13: "480p", 14: "5.2K", 15: "3K",
+}
+
+VIDEO_FR_LABELS = {0: "240", 1: "120", 2: "100", 5: "60", 6: "50", 7: "48", 8: "30", 9: "25", 10: "24"}
+
+OUT_OF_SCOPE = "out of scope"
+
+
 class Parsers:
     @staticmethod
     def mode(value):
-        if value == 0:
-            return "Video"
-        if value == 1:
-            return "Photo"
-        if value == 2:
-            return "Multi-Shot"
+        return MODE_LABELS.get(value)
 
     @staticmethod
     def sub_mode(modevalue, value):
-        if modevalue == 0:
-            if value == 0:
-                return "Video"
-            if value == 1:
-                return "TimeLapse Video"
-            if value == 2:
-                return "Video+Photo"
-            if value == 3:
-                return "Looping"
-
-        if modevalue == 1:
-            if value == 0:
-                return "Single Pic"
-            if value == 1:
-                return "Burst"
-            if value == 2:
-                return "NightPhoto"
-
-        if modevalue == 2:
-            if value == 0:
-                return "Burst"
-            if value == 1:
-                return "TimeLapse"
-            if value == 2:
-                return "Night lapse"
+        return SUB_MODE_LABELS.get((modevalue, value))
 
     @staticmethod
     def recording(value):
-        if value == 0:
-            return "Standby"
-        if value == 1:
-            return "Recording"
+        return RECORDING_LABELS.get(value)
 
     @staticmethod
     def battery(value):
-        if value == 0:
-            return "Empty"
-        if value == 1:
-            return "Low"
-        if value == 2:
-            return "Halfway"
-        if value == 3:
-            return "Full"
-        if value == 4:
-            return "Charging"
+        return BATTERY_LABELS.get(value)
 
     @staticmethod
     def video_res(value):
-        if value == 1:
-            return "4k"
-        elif value == 2:
-            return "4kSV"
-        elif value == 4:
-            return "2k"
-        elif value == 5:
-            return "2kSV"
-        elif value == 6:
-            return "2k4by3"
-        elif value == 7:
-            return "1440p"
-        elif value == 8:
-            return "1080pSV"
-        elif value == 9:
-            return "1080p"
-        elif value == 10:
-            return "960p"
-        elif value == 11:
-            return "720pSV"
-        elif value == 12:
-            return "720p"
-        elif value == 13:
-            return "480p"
-        elif value == 14:
-            return "5.2K"
-        elif value == 15:
-            return "3K"
-        else:
-            return "out of scope"
+        return VIDEO_RES_LABELS.get(value, OUT_OF_SCOPE)
 
     @staticmethod
     def video_fr(value):
-        if value == 0:
-            return "240"
-        elif value == 1:
-            return "120"
-        elif value == 2:
-            return "100"
-        elif value == 5:
-            return "60"
-        elif value == 6:
-            return "50"
-        elif value == 7:
-            return "48"
-        elif value == 8:
-            return "30"
-        elif value == 9:
-            return "25"
-        elif value == 10:
-            return "24"
-        else:
-            return "out of scope"
+        return VIDEO_FR_LABELS.get(value, OUT_OF_SCOPE)
 
     @staticmethod
     def video_left(value):
@@ -160,19 +91,41 @@ def remap_key(data, map):
     return data_mapped
 
 
-def reconstruct_status(data):
-    status = data['status']
-    settings = data['settings']
-    status_mapped = {}
-    settings_mapped = {}
-    if status:
-        status_mapped = remap_key(status, STATUS_MAP)
+class LoopStallMonitor:
+    """Measures how late the event loop wakes up a task sleeping `interval`
+    seconds, i.e. how long other code blocked the loop.
 
-    if settings:
-        settings_mapped['Framerate'] = settings[constants.Video.FRAME_RATE]
-        settings_mapped['Resolution'] = settings[constants.Video.RESOLUTION]
+    monitor = LoopStallMonitor()
+    monitor.start()
+    ...
+    await monitor.stop()
+    print(monitor.max_stall, monitor.total_stall)
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = 0
+        self.max_stall = 0.0
+        self.total_stall = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
 
-    return Struct(**{'status': Struct(**status_mapped), 'settings': Struct(**settings_mapped)})
+    async def _run(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            stall = max(0.0, time.monotonic() - before - self.interval)
+            self.samples += 1
+            self.total_stall += stall
+            self.max_stall = max(self.max_stall, stall)
 
 
 def dump_json(data, filename):
@@ -18,5 +18,8 @@ setup(
     install_requires=[
         'aiohttp>=3.4.4'
     ],
+    extras_require={
+        'fast': ['orjson'],
+    },
     test_suite='tests',
     zip_safe=False)
@@ -0,0 +1,151 @@
+"""A small local stand-in for the camera HTTP server used by the tests
+"""
+import asyncio
+
+from aiohttp import web
+
+
+class FakeCamera:
+    def __init__(self, files=None):
+        self.files = files or {}
+        self.requests = []
+        self.range_headers = []
+        # (folder, name) -> number of bytes to send before dropping the connection, once
+        self.fail_after = {}
+        # (folder, name) -> seconds to stall after the first bytes, once
+        self.stall = {}
+        self.honor_range = True
+        # command path -> raw reply body
+        self.command_replies = {}
+        # request path -> number of 503 replies to give before serving it
+        self.unavailable = {}
+        # request path -> seconds to wait before answering
+        self.delay = {}
+        # password of the legacy /camera and /bacpac paths
+        self.password = 'goprohero'
+        self.runner = None
+        self.port = None
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get('/gp/gpControl', self.handle_info)
+        app.router.add_get('/gp/gpControl/status', self.handle_status)
+        app.router.add_get('/gp/gpControl/setting/{param}/{value}', self.handle_ok)
+        app.router.add_get('/gp/gpControl/command/{command:.*}', self.handle_command)
+        app.router.add_get('/gp/gpMediaList', self.handle_media_list)
+        app.router.add_get('/bacpac/sd', self.handle_password)
+        app.router.add_get('/camera/{command}', self.handle_legacy)
+        app.router.add_get('/bacpac/{command}', self.handle_legacy)
+        app.router.add_get('/videos/DCIM/{folder}/{name}', self.handle_media)
+        self.app = app
+        self.info = {
+            'model_name': 'HERO7 Black',
+            'firmware_version': 'HD7.01.01.51.00',
+        }
+        # the rest of the /gp/gpControl reply (filters, modes...), see doc/HD7_01_01_51_00.json
+        self.schema = {}
+        self.status = {'status': {'8': 0, '31': 1, '43': 0, '44': 0}, 'settings': {'2': 9, '3': 8}}
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}'.format(self.port)
+
+    def url(self, path):
+        return self.base_url + path
+
+    def media_url(self, folder, name):
+        return self.url('/videos/DCIM/{0}/{1}'.format(folder, name))
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if self.unavailable.get(request.path):
+            self.unavailable[request.path] -= 1
+            self.requests.append(request.path)
+            return web.Response(status=503, text='busy')
+        if request.path in self.delay:
+            await asyncio.sleep(self.delay[request.path])
+        return await handler(request)
+
+    async def handle_info(self, request):
+        self.requests.append(request.path)
+        reply = dict(self.schema)
+        reply['info'] = self.info
+        return web.json_response(reply)
+
+    async def handle_status(self, request):
+        self.requests.append(request.path)
+        return web.json_response(self.status)
+
+    async def handle_ok(self, request):
+        self.requests.append(request.path)
+        return web.Response(text='{}')
+
+    async def handle_command(self, request):
+        self.requests.append(request.path)
+        return web.Response(text=self.command_replies.get(request.match_info['command'], '{}'))
+
+    async def handle_password(self, request):
+        self.requests.append(request.path)
+        return web.Response(body=b'\x00\x09' + self.password.encode('utf-8'))
+
+    async def handle_legacy(self, request):
+        self.requests.append(request.path)
+        if request.query.get('t') != self.password:
+            return web.Response(status=403, text='Forbidden')
+        return web.Response(body=b'\x00')
+
+    async def handle_media_list(self, request):
+        self.requests.append(request.path)
+        media = {}
+        for (folder, name), data in sorted(self.files.items()):
+            media.setdefault(folder, []).append({'n': name, 's': str(len(data)), 'mod': '1490468532'})
+        return web.json_response({'id': '1', 'media': [{'d': d, 'fs': fs} for d, fs in media.items()]})
+
+    async def handle_media(self, request):
+        self.requests.append(request.path)
+        key = (request.match_info['folder'], request.match_info['name'])
+        if key not in self.files:
+            raise web.HTTPNotFound()
+        data = self.files[key]
+        range_header = request.headers.get('Range')
+        self.range_headers.append(range_header)
+        status = 200
+        headers = {'Accept-Ranges': 'bytes'} if self.honor_range else {}
+        start, end = 0, len(data) - 1
+        if range_header and self.honor_range:
+            first, _, last = range_header[6:].partition('-')
+            start = int(first)
+            if last:
+                end = min(int(last), end)
+            if start >= len(data):
+                return web.Response(status=416, headers={'Content-Range': 'bytes */{0}'.format(len(data))})
+            status = 206
+            headers['Content-Range'] = 'bytes {0}-{1}/{2}'.format(start, end, len(data))
+        body = data[start:end + 1]
+
+        fail_after = self.fail_after.pop(key, None)
+        stall = self.stall.pop(key, None)
+        if fail_after is None and stall is None:
+            return web.Response(status=status, body=body, headers=headers,
+                                content_type='application/octet-stream')
+        resp = web.StreamResponse(status=status, headers=headers)
+        resp.content_length = len(body)
+        await resp.prepare(request)
+        if stall is not None:
+            await resp.write(body[:1024])
+            await asyncio.sleep(stall)
+            await resp.write(body[1024:])
+            return resp
+        await resp.write(body[:fail_after])
+        # let the client consume what was sent before the link drops
+        await asyncio.sleep(0.05)
+        request.transport.close()
+        return resp
@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+
+from goprocam import GoProCamera
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestPasswordCache(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port))
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_fetched_once(self):
+        async def work():
+            for _ in range(3):
+                await self.gopro.sendCamera('PW', '01')
+        _run(work())
+        self.assertEqual(self.camera.requests.count('/bacpac/sd'), 1)
+        self.assertEqual(self.camera.requests.count('/camera/PW'), 3)
+
+    def test_concurrent_fetch_shared(self):
+        async def work():
+            await asyncio.gather(*[self.gopro.sendCamera('PW', '01') for _ in range(5)])
+        _run(work())
+        self.assertEqual(self.camera.requests.count('/bacpac/sd'), 1)
+
+    def test_refreshed_on_rejection(self):
+        async def work():
+            await self.gopro.sendCamera('PW', '01')
+            self.camera.password = 'changed'
+            await asyncio.gather(*[self.gopro.sendCamera('PW', '01') for _ in range(3)])
+        _run(work())
+        self.assertEqual(self.camera.requests.count('/bacpac/sd'), 2)
+        self.assertEqual(self.camera.requests.count('/camera/PW'), 7)
+        self.assertEqual(_run(self.gopro.getPassword()), 'changed')
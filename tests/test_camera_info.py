@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+from goprocam import GoProCamera
+from goprocam import constants
+from goprocam.GoProCamera import CameraInfo
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestCameraInfo(unittest.TestCase):
+    def test_model_checks(self):
+        fusion = CameraInfo('GoPro Fusion', 'FS', info={'model_name': 'GoPro Fusion', 'firmware_version': 'FS1.04.01.80.00'})
+        hero4 = CameraInfo('HERO4 Black', 'HD4', info={'model_name': 'HERO4 Black', 'firmware_version': 'HD4.02.05.00.00'})
+        self.assertTrue(fusion.is_fusion)
+        self.assertFalse(fusion.is_hero4)
+        self.assertTrue(hero4.is_hero4)
+        self.assertFalse(hero4.is_fusion)
+        self.assertEqual(hero4.info['firmware_version'], 'HD4.02.05.00.00')
+
+
+class TestCachedInfo(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port))
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_info_cached(self):
+        async def work():
+            await self.gopro.connect()
+            requests = len(self.camera.requests)
+            name = await self.gopro.infoCamera(constants.Camera.Name)
+            firmware = await self.gopro.infoCamera(constants.Camera.Firmware)
+            return requests, name, firmware
+        requests, name, firmware = _run(work())
+        self.assertEqual(name, 'HERO7 Black')
+        self.assertEqual(firmware, 'HD7.01.01.51.00')
+        self.assertEqual(len(self.camera.requests), requests)
+        self.assertEqual(self.gopro.camera_cache_stats()['misses'], 1)
+        self.assertGreaterEqual(self.gopro.camera_cache_stats()['hits'], 2)
+
+    def test_reconnect_invalidates(self):
+        _run(self.gopro.connect())
+        self.camera.info = {'model_name': 'HERO6 Black', 'firmware_version': 'HD6.01.02.01.00'}
+        _run(self.gopro.connect())
+        self.assertEqual(_run(self.gopro.infoCamera(constants.Camera.Name)), 'HERO6 Black')
+
+
+if __name__ == '__main__':
+    unittest.main()
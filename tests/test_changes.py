@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+
+from goprocam import GoProCamera
+from goprocam.changes import ChangeFeed, StatusDelta, changes
+from goprocam.schema import SchemaCache
+from goprocam.status import StatusLayout, layout_for
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def snapshot(status, settings=None, layout=None):
+    return (layout or layout_for()).decode({'status': status, 'settings': settings or {}})
+
+
+class TestChanges(unittest.TestCase):
+    def test_unchanged(self):
+        first = snapshot({'8': 0, '30': 'GP01'})
+        self.assertEqual(changes(first.status, snapshot({'8': 0, '30': 'GP01'}).status), [])
+
+    def test_extra(self):
+        first = snapshot({'8': 0, '30': 'GP01', '500': 1})
+        second = snapshot({'8': 0, '30': 'GP02', '54': 2 ** 40})
+        self.assertEqual(changes(first.status, second.status),
+                         [(30, 'GP01', 'GP02'), (54, None, 2 ** 40), (500, 1, None)])
+
+    def test_other_layout(self):
+        small = StatusLayout()
+        small._blank_status = small._blank_status[:10]
+        first = snapshot({'8': 1, '70': 50}, layout=small)
+        self.assertEqual(changes(first.status, snapshot({'8': 0, '70': 50}).status), [(8, 1, 0)])
+
+    def test_only(self):
+        delta = StatusDelta(1.0, [(8, 0, 1), (70, 50, 49)], [(2, 9, 1)])
+        self.assertEqual(delta.only(frozenset([70]), frozenset()).status, [(70, 50, 49)])
+        self.assertFalse(delta.only(frozenset([1]), frozenset()))
+        self.assertEqual(delta.only().settings, [(2, 9, 1)])
+
+    def test_then(self):
+        first = StatusDelta(1.0, [(8, 0, 1), (70, 50, 49)], [(2, 9, 1)])
+        merged = first.then(StatusDelta(2.0, [(8, 1, 0), (43, 0, 1)], [(2, 1, 4)]))
+        self.assertEqual((merged.timestamp, merged.status, merged.settings),
+                         (2.0, [(43, 0, 1), (70, 50, 49)], [(2, 9, 4)]))
+
+
+class TestChangeFeed(unittest.TestCase):
+    def test_handlers(self):
+        feed = ChangeFeed()
+        seen = {'all': [], 'busy': [], 'failing': 0}
+        feed.add_handler(seen['all'].append)
+        feed.add_handler(seen['busy'].append, status=['8'])
+
+        def failing(delta):
+            seen['failing'] += 1
+            raise ValueError(delta)
+        feed.add_handler(failing, settings=[2])
+
+        first = snapshot({'8': 0, '70': 50}, {'2': 9})
+        feed.publish(None, first)
+        second = snapshot({'8': 0, '70': 49}, {'2': 9})
+        feed.publish(first, second)
+        feed.publish(second, snapshot({'8': 1, '70': 49}, {'2': 1}))
+        self.assertEqual([delta.status for delta in seen['all']], [[(70, 50, 49)], [(8, 0, 1)]])
+        self.assertEqual([(delta.status, delta.settings) for delta in seen['busy']], [([(8, 0, 1)], [])])
+        self.assertEqual(seen['failing'], 1)
+
+    def test_queue_bounded(self):
+        feed = ChangeFeed()
+        changes = feed.subscribe(max_queued=2)
+        previous = snapshot({'70': 100})
+        for level in range(99, 89, -1):
+            current = snapshot({'70': level})
+            feed.publish(previous, current)
+            previous = current
+        self.assertEqual([delta.status for delta in changes._deltas], [[(70, 100, 99)], [(70, 99, 90)]])
+        self.assertEqual(changes.merged, 8)
+
+
+class TestStatusChanges(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_on_status_change(self):
+        deltas = []
+
+        @self.gopro.on_status_change(status=[8])
+        def busy(delta):
+            deltas.append(delta)
+        _run(self.gopro.getStatus())
+        self.camera.status['status']['43'] = 1
+        _run(self.gopro.getStatus())
+        self.camera.status['status']['8'] = 1
+        _run(self.gopro.getStatus())
+        self.assertEqual([delta.status for delta in deltas], [[(8, 0, 1)]])
+
+    def test_iterator(self):
+        async def follow():
+            received = []
+            async with self.gopro.status_changes(status=[8, 43], busy_interval=0.01, idle_interval=0.01) as changes:
+                await self.gopro._poller.next(1)
+                self.camera.status['status']['44'] = 2
+                await self.gopro._poller.next(1)
+                self.camera.status['status']['8'] = 1
+                self.camera.status['status']['43'] = 1
+                received.append(await asyncio.wait_for(changes.__anext__(), 1))
+            async for delta in changes:
+                received.append(delta)
+            return received
+        received = _run(follow())
+        self.assertEqual([delta.status for delta in received], [[(8, 0, 1), (43, 0, 1)]])
+        self.assertEqual(self.gopro._changes.subscribers, [])
+
+    def test_poller_stopped_with_the_last_iterator(self):
+        async def follow():
+            first = self.gopro.status_changes(busy_interval=0.01)
+            second = self.gopro.status_changes()
+            poller = self.gopro._poller
+            first.close()
+            running = self.gopro._poller is poller
+            second.close()
+            await asyncio.sleep(0.01)
+            return running, poller
+        running, poller = _run(follow())
+        self.assertTrue(running)
+        self.assertIsNone(self.gopro._poller)
+        self.assertFalse(poller.running)
+
+    def test_started_poller_kept(self):
+        async def follow():
+            poller = self.gopro.start_status_poller()
+            async with self.gopro.status_changes():
+                pass
+            return poller
+        poller = _run(follow())
+        self.assertIs(self.gopro._poller, poller)
+        self.assertTrue(poller.running)
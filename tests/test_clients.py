@@ -0,0 +1,243 @@
+import asyncio
+import gc
+import hashlib
+import os
+import tempfile
+import unittest
+
+from goprocam.clients import AsyncClient, PART_SUFFIX
+from goprocam.errors import DownloadError
+from goprocam.pool import ConnectionPool
+from goprocam.retry import RetryPolicy
+from goprocam.scheduler import BULK
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+
+    def tearDown(self):
+        _run(self.camera.stop())
+
+    def test_kind_for(self):
+        self.assertEqual(ConnectionPool.kind_for('http://10.5.5.9/gp/gpControl'), ConnectionPool.CONTROL)
+        self.assertEqual(ConnectionPool.kind_for('http://10.5.5.9:8080/gp/gpMediaList'), ConnectionPool.MEDIA)
+
+    def test_connections_are_reused(self):
+        client = AsyncClient(limit_per_host=1)
+
+        async def work():
+            for _ in range(3):
+                await client.getJSON(self.camera.url('/gp/gpControl/status'))
+            await client.quit()
+        _run(work())
+
+        stats = client.pool.stats[ConnectionPool.CONTROL]
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual(stats.connections_created, 1)
+        self.assertEqual(stats.connections_reused, 2)
+
+    def test_shared_pool(self):
+        pool = ConnectionPool()
+        first = AsyncClient(pool=pool)
+        second = AsyncClient(pool=pool)
+
+        async def work():
+            await first.getJSON(self.camera.url('/gp/gpControl'))
+            await first.quit()
+            await second.getJSON(self.camera.url('/gp/gpControl'))
+            await pool.close()
+        _run(work())
+
+        self.assertIs(first.pool, second.pool)
+        snapshot = pool.snapshot()[ConnectionPool.CONTROL]
+        self.assertEqual(snapshot['requests'], 2)
+        self.assertEqual(snapshot['connections_created'], 1)
+
+
+class DownloadTestCase(unittest.TestCase):
+    data = bytes(range(256)) * 1024
+
+    def setUp(self):
+        self.camera = FakeCamera({('100GOPRO', 'GOPR0001.MP4'): self.data})
+        _run(self.camera.start())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = AsyncClient(working_path=self.tmp.name, retry_delay=0)
+        self.url = self.camera.media_url('100GOPRO', 'GOPR0001.MP4')
+
+    def tearDown(self):
+        _run(self.client.quit())
+        _run(self.camera.stop())
+        self.tmp.cleanup()
+
+    def _read(self, name):
+        with open(os.path.join(self.tmp.name, name), 'rb') as fd:
+            return fd.read()
+
+    def _digest(self):
+        return hashlib.sha256(self.data).hexdigest()
+
+
+class TestDownload(DownloadTestCase):
+    def test_download(self):
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'out.MP4' + PART_SUFFIX)))
+
+    def test_resume_after_drop(self):
+        self.camera.fail_after[('100GOPRO', 'GOPR0001.MP4')] = 100000
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertIsNone(self.camera.range_headers[0])
+        self.assertTrue(self.camera.range_headers[1].startswith('bytes='))
+        self.assertNotEqual(self.camera.range_headers[1], 'bytes=0-')
+
+    def test_resume_existing_part(self):
+        with open(os.path.join(self.tmp.name, 'out.MP4' + PART_SUFFIX), 'wb') as fd:
+            fd.write(self.data[:5000])
+        result = _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertEqual(self.camera.range_headers, ['bytes=5000-'])
+        self.assertEqual(result.digest, self._digest())
+        self.assertEqual(result.size, len(self.data))
+
+    def test_digest(self):
+        self.camera.fail_after[('100GOPRO', 'GOPR0001.MP4')] = 100000
+        result = _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(result.digest, self._digest())
+        self.assertEqual(result.filename, os.path.join(self.tmp.name, 'out.MP4'))
+
+    def test_digest_disabled(self):
+        self.client.digest = None
+        result = _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertIsNone(result.digest)
+
+    def test_range_ignored(self):
+        self.camera.honor_range = False
+        with open(os.path.join(self.tmp.name, 'out.MP4' + PART_SUFFIX), 'wb') as fd:
+            fd.write(b'garbage')
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+
+    def test_size_mismatch_gives_up(self):
+        self.client.download_retries = 1
+        with self.assertRaises(DownloadError):
+            _run(self.client.download(self.url, 'out.MP4', size=len(self.data) + 1))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'out.MP4')))
+
+
+class TestStreaming(DownloadTestCase):
+    def test_stream(self):
+        async def work():
+            chunks = []
+            async for chunk in self.client.stream(self.url, 10000):
+                self.assertIsInstance(chunk, memoryview)
+                chunks.append(bytes(chunk))
+            return b''.join(chunks)
+        self.assertEqual(_run(work()), self.data)
+
+    def test_stream_stopped_early(self):
+        async def work():
+            async with self.client.stream(self.url) as chunks:
+                self.assertEqual(chunks.content_length, len(self.data))
+                async for chunk in chunks:
+                    return bytes(chunk)
+        self.assertEqual(_run(work()), self.data[:len(_run(work()))])
+
+    def test_dropped_stream_releases_slot(self):
+        async def work():
+            chunks = self.client.stream(self.url, 10000)
+            async for chunk in chunks:
+                break
+            held = self.client.scheduler.stats[BULK].active
+            del chunks
+            gc.collect()
+            return held, self.client.scheduler.stats[BULK].active
+        self.assertEqual(_run(work()), (1, 0))
+
+    def test_bulk_slots_for_every_download(self):
+        client = AsyncClient(download_semaphore=3, segments=2, digest=None)
+        self.assertGreaterEqual(client.scheduler.slots - client.scheduler.reserved, 6)
+        self.assertGreaterEqual(self.client.scheduler.slots - self.client.scheduler.reserved, 4)
+        # but no more than there are connections for
+        client = AsyncClient(segments=8, media_limit_per_host=4, digest=None)
+        self.assertEqual(client.scheduler.slots - client.scheduler.reserved, 4)
+
+    def test_fetch_bytes(self):
+        body = _run(self.client.fetch_bytes(self.url))
+        self.assertIsInstance(body, bytearray)
+        self.assertEqual(body, self.data)
+
+
+class TestSegmentedDownload(DownloadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.segments = 4
+        self.client.min_segment_size = 16 * 1024
+        self.client.digest = None
+
+    def test_segments_requested(self):
+        result = _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertIsNone(result.digest)
+        self.assertEqual(len(self.camera.range_headers), 4)
+        self.assertIn('bytes=0-65535', self.camera.range_headers)
+
+    def test_not_hashed(self):
+        # the ranges arrive at once, a hash runs over the bytes in order
+        with self.assertRaises(ValueError):
+            AsyncClient(segments=4)
+        self.client.digest = 'sha256'
+        with self.assertRaises(ValueError):
+            _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self.camera.requests, [])
+
+    def test_segment_retried_after_drop(self):
+        self.camera.fail_after[('100GOPRO', 'GOPR0001.MP4')] = 1000
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertIn('bytes=1000-65535', self.camera.range_headers)
+
+    def test_fallback_without_range(self):
+        self.camera.honor_range = False
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+
+    def test_size_mismatch(self):
+        with self.assertRaises(DownloadError):
+            _run(self.client.download(self.url, 'out.MP4', size=len(self.data) + 1))
+
+    def test_probe_retried(self):
+        self.client.retry = RetryPolicy(base_delay=0)
+        self.camera.unavailable['/videos/DCIM/100GOPRO/GOPR0001.MP4'] = 1
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertEqual(self.client.retry.stats.retries, 1)
+
+    def test_connection_per_segment(self):
+        self.assertEqual(self.client.pool.limit_per_host(ConnectionPool.MEDIA), 4)
+        client = AsyncClient(segments=8, download_semaphore=2, digest=None)
+        self.assertEqual(client.pool.limit_per_host(ConnectionPool.MEDIA), 16)
+        client = AsyncClient(segments=8, media_limit_per_host=6, digest=None)
+        self.assertEqual(client.pool.limit_per_host(ConnectionPool.MEDIA), 6)
+
+    def test_failed_run_not_resumed(self):
+        # a failed segmented run must not leave a full length .part with holes for the single stream path
+        self.client.download_retries = 0
+        self.camera.fail_after[('100GOPRO', 'GOPR0001.MP4')] = 1000
+        with self.assertRaises(DownloadError):
+            _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'out.MP4' + PART_SUFFIX)))
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data), segments=1))
+        self.assertEqual(self._read('out.MP4'), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
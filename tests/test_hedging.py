@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+
+from goprocam.clients import AsyncClient
+from goprocam.hedging import HedgeGroup, HedgePolicy, Transfer
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def _transfer(done, elapsed, now):
+    async def make():
+        transfer = Transfer(0, 999999)
+        transfer.started = now - elapsed
+        transfer.offset = done
+        return transfer
+    return _run(make())
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_stragglers(self):
+        now = time.monotonic()
+        policy = HedgePolicy(slowdown=2.0, min_elapsed=1.0)
+        fast = [_transfer(100000, 1.0, now) for _ in range(3)]
+        slow = _transfer(1000, 1.0, now)
+        young = _transfer(0, 0.1, now)
+        self.assertEqual(policy.stragglers(fast + [slow, young], now), [slow])
+
+    def test_queued_not_measured(self):
+        now = time.monotonic()
+        policy = HedgePolicy(slowdown=2.0, min_elapsed=1.0)
+        fast = [_transfer(100000, 1.0, now) for _ in range(3)]
+        queued = _transfer(0, 1.0, now)
+        queued.started = None
+        self.assertEqual(policy.stragglers(fast + [queued], now), [])
+
+    def test_needs_peers(self):
+        now = time.monotonic()
+        policy = HedgePolicy(min_peers=2, min_elapsed=1.0)
+        self.assertEqual(policy.stragglers([_transfer(0, 5.0, now)], now), [])
+
+
+class TestHedgedDownload(unittest.TestCase):
+    data = os.urandom(256 * 1024)
+
+    def setUp(self):
+        self.camera = FakeCamera({
+            ('100GOPRO', 'GOPR0001.MP4'): self.data,
+            ('100GOPRO', 'GOPR0002.MP4'): self.data[::-1],
+        })
+        _run(self.camera.start())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.policy = HedgePolicy(slowdown=2.0, min_elapsed=0.1, check_interval=0.05)
+        self.client = AsyncClient(working_path=self.tmp.name, segments=4, min_segment_size=16 * 1024,
+                                  hedge=self.policy, retry_delay=0, digest=None)
+
+    def tearDown(self):
+        _run(self.client.quit())
+        _run(self.camera.stop())
+        self.tmp.cleanup()
+
+    def test_straggling_range_is_hedged(self):
+        self.camera.stall[('100GOPRO', 'GOPR0001.MP4')] = 1.5
+        url = self.camera.media_url('100GOPRO', 'GOPR0001.MP4')
+        started = time.monotonic()
+        _run(self.client.download(url, 'out.MP4', size=len(self.data)))
+        self.assertLess(time.monotonic() - started, 1.5)
+        with open(os.path.join(self.tmp.name, 'out.MP4'), 'rb') as fd:
+            self.assertEqual(fd.read(), self.data)
+        self.assertEqual(self.policy.stats.triggered, 1)
+        self.assertEqual(self.policy.stats.hedge_wins, 1)
+        self.assertGreater(self.policy.stats.time_saved, 0)
+
+    def test_timed_from_the_connection(self):
+        # one connection (the fake camera is not on the media port): the second range waits
+        # for the first one's, untimed
+        client = AsyncClient(working_path=self.tmp.name, limit_per_host=1, max_requests=5)
+        self.camera.delay['/videos/DCIM/100GOPRO/GOPR0001.MP4'] = 0.2
+        url = self.camera.media_url('100GOPRO', 'GOPR0001.MP4')
+        partname = os.path.join(self.tmp.name, 'out.MP4.part')
+        transfers = [Transfer(0, 1023), Transfer(1024, 2047)]
+
+        async def work():
+            started = time.monotonic()
+            try:
+                await asyncio.gather(*[client._download_range(url, partname, t.start, t.end, transfer=t)
+                                       for t in transfers])
+            finally:
+                await client.quit()
+            return started
+        started = _run(work())
+        self.assertGreaterEqual(max(t.started for t in transfers) - started, 0.2)
+        self.assertLess(min(t.started for t in transfers) - started, 0.1)
+
+    def test_straggling_file_is_hedged(self):
+        self.camera.stall[('100GOPRO', 'GOPR0001.MP4')] = 1.5
+        group = HedgeGroup(self.policy)
+        # a single stream and its hedge are hashed as they arrive
+        self.client.digest = 'sha256'
+
+        async def work():
+            return await asyncio.gather(*[
+                self.client.download(self.camera.media_url('100GOPRO', name), name,
+                                     size=len(self.data), segments=1, hedge=group)
+                for name in ('GOPR0001.MP4', 'GOPR0002.MP4')])
+        results = _run(work())
+        with open(os.path.join(self.tmp.name, 'GOPR0001.MP4'), 'rb') as fd:
+            self.assertEqual(fd.read(), self.data)
+        with open(os.path.join(self.tmp.name, 'GOPR0002.MP4'), 'rb') as fd:
+            self.assertEqual(fd.read(), self.data[::-1])
+        self.assertEqual([result.digest for result in results],
+                         [hashlib.sha256(self.data).hexdigest(), hashlib.sha256(self.data[::-1]).hexdigest()])
+        self.assertEqual(self.policy.stats.transfers, 2)
+        self.assertEqual(self.policy.stats.hedge_wins, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
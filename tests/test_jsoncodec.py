@@ -0,0 +1,61 @@
+import asyncio
+import json
+import unittest
+
+from goprocam import jsoncodec
+from goprocam.clients import AsyncClient
+from goprocam.errors import HttpError
+from goprocam.jsoncodec import JSONDecoder
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestJSONDecoder(unittest.TestCase):
+    def test_decode_bytes(self):
+        decoder = JSONDecoder()
+        self.assertEqual(_run(decoder.decode(b'{"a": [1, 2]}')), {'a': [1, 2]})
+        self.assertEqual(decoder.offloaded, 0)
+
+    def test_stdlib_fallback(self):
+        decoder = JSONDecoder(json.loads)
+        self.assertEqual(_run(decoder.decode(b'{"p": "DCIM\\100GOPRO"}', repair=True)), {'p': 'DCIM/100GOPRO'})
+
+    def test_offload(self):
+        decoder = JSONDecoder(offload_size=10)
+        self.assertEqual(_run(decoder.decode(b'{"media": [1, 2, 3]}')), {'media': [1, 2, 3]})
+        self.assertEqual(decoder.offloaded, 1)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            _run(JSONDecoder().decode(b'{"p": "DCIM\\100GOPRO"}'))
+
+
+class TestGetJSON(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.client = AsyncClient()
+
+    def tearDown(self):
+        _run(self.client.quit())
+        _run(self.camera.stop())
+
+    def test_repair(self):
+        self.camera.command_replies['storage/delete'] = '{"path": "DCIM\\100GOPRO"}'
+        reply = _run(self.client.getJSON(self.camera.url('/gp/gpControl/command/storage/delete'), repair=True))
+        self.assertEqual(reply, {'path': 'DCIM/100GOPRO'})
+
+    def test_status_error(self):
+        with self.assertRaises(HttpError):
+            _run(self.client.getJSON(self.camera.url('/gp/unknown')))
+
+    def test_backend(self):
+        self.assertIn(jsoncodec.BACKEND, ('orjson', 'json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
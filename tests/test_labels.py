@@ -0,0 +1,110 @@
+import asyncio
+import os
+import unittest
+
+from goprocam import GoProCamera
+from goprocam.labels import LabelTable, SubModeTable, StatusLabels, labels_for
+from goprocam.schema import CapabilitySchema, SchemaCache
+from goprocam.status import layout_for
+from goprocam.utils import Parsers
+from tests.fakecamera import FakeCamera
+from tests.test_status import REPLY
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestLabelTable(unittest.TestCase):
+    def test_lookup(self):
+        table = LabelTable({0: 'Standby', 1: 'Recording'}, 'unknown')
+        self.assertEqual((table(0), table(1), table(5), table(None)), ('Standby', 'Recording', 'unknown', 'unknown'))
+        self.assertEqual(table.dense, ['Standby', 'Recording', 'unknown'])
+        self.assertEqual(table.batch([1, -1, 0]), ['Recording', 'unknown', 'Standby'])
+
+    def test_sub_mode(self):
+        table = SubModeTable({(0, 3): 'Looping', (2, 1): 'TimeLapse'})
+        self.assertEqual(table(0, 3), 'Looping')
+        self.assertEqual(table(2, 1), 'TimeLapse')
+        # would alias (1, 1) if sub modes beyond the stride were not rejected
+        self.assertIsNone(table(0, 5))
+        self.assertIsNone(table(None, 3))
+        self.assertEqual(table.batch([0, 2], [3, 1]), ['Looping', 'TimeLapse'])
+
+    @unittest.skipUnless(numpy, 'needs numpy')
+    def test_numpy(self):
+        table = LabelTable({0: 'Standby', 1: 'Recording'}, 'unknown')
+        self.assertEqual(list(table.batch(numpy.array([1, 0, 7, -3]))), ['Recording', 'Standby', 'unknown', 'unknown'])
+        table = SubModeTable({(0, 3): 'Looping', (2, 1): 'TimeLapse'})
+        self.assertEqual(list(table.batch(numpy.array([0, 2, 0]), numpy.array([3, 1, 9]))), ['Looping', 'TimeLapse', None])
+
+
+class TestStatusLabels(unittest.TestCase):
+    def test_parsers_labels_kept(self):
+        labels = labels_for()
+        self.assertIs(labels_for(), labels)
+        for code in range(-1, 20):
+            self.assertEqual(labels.battery(code), Parsers.battery(code))
+            for table, parser in ((labels.video_res, Parsers.video_res), (labels.video_fr, Parsers.video_fr)):
+                if parser(code) != 'out of scope':
+                    self.assertEqual(table(code), parser(code))
+            for mode in range(3):
+                if Parsers.sub_mode(mode, code) is not None:
+                    self.assertEqual(labels.sub_mode(mode, code), Parsers.sub_mode(mode, code))
+        # constants label what Parsers did not
+        self.assertEqual(labels.sub_mode(0, 4), 'TimeWarp')
+        self.assertEqual(labels.video_fr(13), '200')
+        self.assertEqual(labels.video_res(19), 'out of scope')
+
+    def test_schema_labels(self):
+        labels = StatusLabels(CapabilitySchema.from_file(HD7_SCHEMA))
+        self.assertEqual(labels.video_res(9), '1080p')
+        self.assertEqual(labels.video_res(18), '4K_4by3')
+        self.assertEqual(labels.video_fr(13), '200')
+        self.assertEqual(labels.sub_mode(3, 0), 'Record + Broadcast')
+        self.assertEqual(labels.mode(3), 'Broadcast')
+
+    def test_decode(self):
+        overview = labels_for().decode(layout_for().decode(REPLY), 'HERO7 Black')
+        self.assertEqual((overview.status.Mode, overview.status.SubMode), ('Video', 'Looping'))
+        self.assertEqual((overview.status.BatteryLevel, overview.status.IsBusy), ('Full', 'Standby'))
+        self.assertEqual(overview.status.RemVideoTime, '01:00:00')
+        self.assertEqual((overview.settings.Resolution, overview.settings.Framerate), ('1080p', '30'))
+        # the values without labels are kept as they are
+        self.assertEqual((overview.status.CamName, overview.status.BattPercent), ('GP24500456', 88))
+        self.assertFalse(hasattr(overview.status, 'IsConnected'))
+
+    def test_decode_missing(self):
+        overview = labels_for().decode(layout_for().decode({'status': {}, 'settings': {}}))
+        self.assertIsNone(overview.status.RemainingSpace)
+        self.assertEqual(overview.settings.Resolution, 'out of scope')
+
+
+class TestParseValue(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        self.camera.status = REPLY
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_sub_mode_of_last_status(self):
+        self.assertEqual(self.gopro.parse_value('sub_mode', 1, mode=1), 'Burst')
+        _run(self.gopro.getStatus())
+        requests = len(self.camera.requests)
+        self.assertEqual(self.gopro.parse_value('sub_mode', 1), 'TimeLapse Video')
+        self.assertEqual(self.gopro.parse_value('mode', 0), 'Video')
+        self.assertEqual(self.gopro.parse_value('video_res', 9), '1080p')
+        self.assertEqual(self.gopro.parse_value('video_left', 61), '00:01:01')
+        self.assertEqual(len(self.camera.requests), requests)
@@ -0,0 +1,49 @@
+import logging
+import unittest
+
+from goprocam.logs import CameraLog
+
+
+class Counted:
+    def __init__(self):
+        self.rendered = 0
+
+    def __format__(self, spec):
+        self.rendered += 1
+        return 'counted'
+
+
+class TestCameraLog(unittest.TestCase):
+    def setUp(self):
+        self.log = CameraLog('goprocam.test_logs', {'ip_address': '10.5.5.9'})
+        self.log.logger.setLevel(logging.WARNING)
+
+    def test_disabled_renders_nothing(self):
+        arg = Counted()
+        self.log.debug("value {0}", arg)
+        self.log.info("value {0}", arg)
+        self.assertEqual(arg.rendered, 0)
+
+    def test_handler_level(self):
+        messages = []
+        self.log.set_handler(lambda message, **details: messages.append((message, details)), logging.INFO)
+        arg = Counted()
+        self.log.debug("value {0}", arg)
+        self.log.info("value {0}", arg, result=1)
+        self.assertEqual(messages, [("value counted", {'result': 1})])
+        self.assertEqual(arg.rendered, 1)
+
+    def test_stdlib_logger(self):
+        arg = Counted()
+        with self.assertLogs('goprocam.test_logs', logging.DEBUG) as logs:
+            self.log.debug("value {0}", arg, result=2)
+        self.assertEqual(logs.output, ['DEBUG:goprocam.test_logs:value counted'])
+        self.assertEqual(logs.records[0].ip_address, '10.5.5.9')
+        self.assertEqual(logs.records[0].details, {'result': 2})
+
+    def test_rendered_once(self):
+        self.log.set_handler(lambda message, **details: None)
+        arg = Counted()
+        with self.assertLogs('goprocam.test_logs', logging.DEBUG):
+            self.log.debug("value {0}", arg)
+        self.assertEqual(arg.rendered, 1)
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from goprocam.clients import DownloadResult
+from goprocam.GoProCamera import MediaInfo
+from goprocam.manifest import Manifest
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_record(self):
+        manifest = Manifest(os.path.join(self.tmp.name, 'session.jsonl'))
+        media = MediaInfo('100GOPRO', 'GOPR0001.MP4', '1024', '1490468532')
+
+        async def work():
+            await manifest.record(media, DownloadResult('/tmp/GOPR0001.MP4', 1024, 'ab12', 1.23456))
+            await manifest.record(media, DownloadResult('/tmp/GOPR0002.MP4', 1024, None, 0.5))
+        _run(work())
+
+        entries = manifest.read()
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0], {
+            'folder': '100GOPRO', 'name': 'GOPR0001.MP4', 'size': 1024, 'mod': '1490468532',
+            'hash': 'sha256:ab12', 'duration': 1.235, 'file': '/tmp/GOPR0001.MP4',
+        })
+        self.assertIsNone(entries[1]['hash'])
+
+    def test_for_session(self):
+        manifest = Manifest.for_session(self.tmp.name)
+        self.assertEqual(os.path.dirname(manifest.filename), self.tmp.name)
+        self.assertTrue(manifest.filename.endswith('.jsonl'))
+        self.assertEqual(manifest.read(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+
+from goprocam.clients import AsyncClient
+from goprocam.errors import GoProConnectionError
+from goprocam.metrics import Histogram
+from goprocam.retry import RetryPolicy
+from tests.fakecamera import FakeCamera
+from tests.test_retry import _closed_port
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram(smallest=0.001, buckets=10)
+        for value in [0.0005] * 90 + [0.1] * 10:
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.quantile(0.5), 0.001)
+        self.assertEqual(histogram.quantile(0.99), 0.128)
+        self.assertEqual(histogram.max, 0.1)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestRequestMetrics(unittest.TestCase):
+    data = b'x' * 100000
+
+    def setUp(self):
+        self.camera = FakeCamera({('100GOPRO', 'GOPR0001.MP4'): self.data})
+        _run(self.camera.start())
+
+    def tearDown(self):
+        _run(self.camera.stop())
+
+    def test_endpoints(self):
+        client = AsyncClient()
+
+        async def work():
+            await client.getJSON(self.camera.url('/gp/gpControl/status'))
+            await client.getJSON(self.camera.url('/gp/gpControl/status'))
+            await client.getText(self.camera.url('/gp/gpControl/setting/2/1'))
+            await client.fetch_bytes(self.camera.media_url('100GOPRO', 'GOPR0001.MP4'))
+            await client.quit()
+        _run(work())
+
+        snapshot = client.metrics.snapshot()
+        status = snapshot['status']
+        self.assertEqual(status['requests'], 2)
+        self.assertEqual(status['errors'], 0)
+        self.assertEqual(status['total']['count'], 2)
+        self.assertEqual(status['first_byte']['count'], 2)
+        self.assertEqual(snapshot['gpControl/setting']['requests'], 1)
+        # everything after the first request reused its connection
+        connects = sum(endpoint['connect']['count'] for endpoint in snapshot.values())
+        self.assertEqual(connects, 1)
+        self.assertEqual(snapshot['media']['bytes'], len(self.data))
+
+    def test_errors(self):
+        client = AsyncClient(retry=RetryPolicy(attempts=1))
+        url = 'http://127.0.0.1:{0}/gp/gpControl/command/shutter?p=1'.format(_closed_port())
+
+        async def work():
+            with self.assertRaises(GoProConnectionError):
+                await client.getJSON(url)
+            await client.quit()
+        _run(work())
+        self.assertEqual(client.metrics.snapshot()['gpControl/command']['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import asyncio
+import unittest
+
+from goprocam import GoProCamera
+from goprocam import constants
+from goprocam.errors import DeadlineExceeded, GoProConnectionError
+from goprocam.poller import StatusPoller, is_idle
+from goprocam.schema import SchemaCache
+from goprocam.status import layout_for
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class FakeStatus:
+    """fetch() of a StatusPoller answering with `busy`, failing while `error` is set"""
+    def __init__(self):
+        self.busy = 0
+        self.error = None
+        self.fetches = 0
+
+    async def __call__(self, deadline=None):
+        self.fetches += 1
+        if self.error is not None:
+            raise self.error
+        return layout_for().decode({'status': {'8': self.busy}, 'settings': {}})
+
+
+class TestStatusPoller(unittest.TestCase):
+    def test_get_cached(self):
+        fetch = FakeStatus()
+        poller = StatusPoller(fetch, max_age=60)
+        first = _run(poller.get())
+        self.assertIs(_run(poller.get()), first)
+        self.assertIsNot(_run(poller.get(max_age=0)), first)
+        self.assertEqual(fetch.fetches, 2)
+        self.assertEqual(poller.stats, {'polls': 2, 'errors': 0, 'hits': 1, 'misses': 2})
+
+    def test_adaptive_interval(self):
+        fetch = FakeStatus()
+        poller = StatusPoller(fetch, busy_interval=0.1, idle_interval=1.0, backoff=2)
+        idle = _run(poller.refresh())
+        fetch.busy = 1
+        busy = _run(poller.refresh())
+        intervals = []
+        for _ in range(5):
+            poller.interval = poller._next_interval(idle)
+            intervals.append(poller.interval)
+        self.assertEqual(intervals, [0.2, 0.4, 0.8, 1.0, 1.0])
+        self.assertEqual(poller._next_interval(busy), 0.1)
+        poller.poke()
+        self.assertEqual(poller.interval, 0.1)
+
+    def test_background(self):
+        fetch = FakeStatus()
+        fetch.busy = 1
+        poller = StatusPoller(fetch, busy_interval=0.01, idle_interval=0.05)
+
+        async def follow():
+            poller.start()
+            first = await poller.next(1)
+            fetch.busy = 0
+            while (await poller.next(1)).status.IsBusy:
+                pass
+            await poller.stop()
+            return first
+        self.assertEqual(_run(follow()).status.IsBusy, 1)
+        self.assertFalse(poller.running)
+        self.assertEqual(poller.latest.status.IsBusy, 0)
+
+    def test_next_woken(self):
+        fetch = FakeStatus()
+        poller = StatusPoller(fetch, busy_interval=0.01, idle_interval=10)
+
+        async def follow():
+            poller.start()
+            await poller.next(1)
+            fetch.error = GoProConnectionError('unreachable')
+            with self.assertRaises(GoProConnectionError):
+                await poller.next(1)
+            waiting = asyncio.ensure_future(poller.next(1))
+            await asyncio.sleep(0)
+            await poller.stop()
+            return await waiting, await poller.next(1)
+        self.assertEqual(_run(follow()), (None, None))
+
+    def test_errors_keep_polling(self):
+        fetch = FakeStatus()
+        fetch.error = GoProConnectionError('unreachable')
+        poller = StatusPoller(fetch, busy_interval=0.01, idle_interval=0.01)
+        with self.assertRaises(GoProConnectionError):
+            _run(poller.refresh())
+
+        async def recover():
+            poller.start()
+            await asyncio.sleep(0.05)
+            fetch.error = None
+            snapshot = await poller.next(1)
+            await poller.stop()
+            return snapshot
+        self.assertIsNotNone(_run(recover()))
+        self.assertGreater(poller.stats['errors'], 1)
+
+
+class TestGoProPoller(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def status_requests(self):
+        return self.camera.requests.count('/gp/gpControl/status')
+
+    def test_max_age(self):
+        _run(self.gopro.getStatus())
+        self.assertEqual(_run(self.gopro.IsBusy(max_age=60)), 0)
+        _run(self.gopro.overview(max_age=60))
+        self.assertEqual(self.status_requests(), 1)
+        _run(self.gopro.IsBusy())
+        self.assertEqual(self.status_requests(), 2)
+
+    def test_readers_share_the_poller(self):
+        async def read():
+            self.gopro.start_status_poller(busy_interval=0.01, idle_interval=10)
+            await self.gopro._poller.next(1)
+            for _ in range(20):
+                await self.gopro.IsBusy()
+                await self.gopro.getStatus(constants.Status.Status, constants.Status.STATUS.Mode)
+                await self.gopro.overview()
+            stats = self.gopro.status_poller_stats()
+            await self.gopro.stop_status_poller()
+            return stats
+        stats = _run(read())
+        self.assertEqual(stats['hits'], 60)
+        self.assertEqual(self.status_requests(), stats['polls'])
+        self.assertLess(stats['polls'], 5)
+        self.assertIsNone(self.gopro.status_poller_stats())
+
+    def test_busy_wait_follows_the_poller(self):
+        self.camera.status = {'status': {'8': 1}, 'settings': {}}
+
+        async def wait():
+            self.gopro.start_status_poller(busy_interval=0.01)
+            asyncio.get_event_loop().call_later(0.1, self.camera.status.update, {'status': {'8': 0}})
+            snapshot = await self.gopro.wait_for(is_idle, 5)
+            await self.gopro.stop_status_poller()
+            return snapshot
+        self.assertEqual(_run(wait()).status.IsBusy, 0)
+        self.assertLess(self.status_requests(), 30)
+
+
+class TestWaitFor(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def status_requests(self):
+        return self.camera.requests.count('/gp/gpControl/status')
+
+    def test_match(self):
+        snapshot = _run(self.gopro.wait_for(lambda snapshot: snapshot.settings.Resolution == 9))
+        self.assertEqual(snapshot.settings.Resolution, 9)
+        self.assertEqual(self.status_requests(), 1)
+
+    def test_backoff(self):
+        self.camera.status = {'status': {'8': 1}, 'settings': {}}
+        asyncio.get_event_loop().call_later(0.5, self.camera.status.update, {'status': {'8': 0}})
+        snapshot = _run(self.gopro.wait_for(is_idle, 5, min_interval=0.05, max_interval=0.2))
+        self.assertEqual(snapshot.status.IsBusy, 0)
+        # 0.05, 0.1, 0.2, 0.2, ... instead of a request after the other
+        self.assertLess(self.status_requests(), 8)
+
+    def test_timeout(self):
+        self.camera.status = {'status': {'8': 1}, 'settings': {}}
+        with self.assertRaises(DeadlineExceeded):
+            _run(self.gopro.wait_for(is_idle, 0.2, min_interval=0.05))
+        self.gopro.start_status_poller(busy_interval=0.05)
+        with self.assertRaises(DeadlineExceeded):
+            _run(self.gopro.wait_for(is_idle, 0.2))
+
+    def test_poller_stopped_while_waiting(self):
+        self.camera.status = {'status': {'8': 1}, 'settings': {}}
+
+        async def wait():
+            changes = self.gopro.status_changes(busy_interval=0.01)
+            loop = asyncio.get_event_loop()
+            loop.call_later(0.1, changes.close)
+            loop.call_later(0.2, self.camera.status.update, {'status': {'8': 0}})
+            return await self.gopro.wait_for(is_idle, 2, min_interval=0.05)
+        self.assertEqual(_run(wait()).status.IsBusy, 0)
+        self.assertIsNone(self.gopro._poller)
+
+    def test_session_waits_for_a_client(self):
+        self.camera.status = {'status': {'31': 0}, 'settings': {}}
+        asyncio.get_event_loop().call_later(0.2, self.camera.status.update, {'status': {'31': 1}})
+        _run(self.gopro.prepare_gpcontrol({'firmware_version': 'HX1.01.01.00.00'}))
+        self.assertEqual(self.gopro._snapshot.status.IsConnected, 1)
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+
+from goprocam import GoProCamera
+from goprocam.clients import AsyncClient
+from goprocam.errors import CircuitOpenError, GoProConnectionError, HttpError
+from goprocam.retry import CircuitBreaker, RetryBudget, RetryPolicy
+from goprocam.schema import SchemaCache
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def _closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=3.0)
+        for attempt in range(1, 6):
+            self.assertLessEqual(policy.delay(attempt), min(3.0, 2 ** (attempt - 1)))
+        self.assertEqual(policy.delay(3, base=0), 0)
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+        _run(asyncio.sleep(0.06))
+        breaker.check()  # the trial request
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+        breaker.record_success()
+        breaker.check()
+        self.assertEqual(breaker.as_dict()['opened'], 1)
+        self.assertEqual(breaker.as_dict()['short_circuited'], 2)
+
+
+class TestClientRetries(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.client = AsyncClient(retry=RetryPolicy(base_delay=0))
+
+    def tearDown(self):
+        _run(self.client.quit())
+        _run(self.camera.stop())
+
+    def test_retried(self):
+        self.camera.unavailable['/gp/gpControl/status'] = 2
+        status = _run(self.client.getJSON(self.camera.url('/gp/gpControl/status')))
+        self.assertEqual(status['status']['8'], 0)
+        self.assertEqual(self.camera.requests.count('/gp/gpControl/status'), 3)
+        self.assertEqual(self.client.retry.stats.retries, 2)
+
+    def test_gives_up(self):
+        self.camera.unavailable['/gp/gpControl/status'] = 5
+        with self.assertRaises(HttpError):
+            _run(self.client.getJSON(self.camera.url('/gp/gpControl/status')))
+        self.assertEqual(self.camera.requests.count('/gp/gpControl/status'), 3)
+
+    def test_shutter_not_retried(self):
+        self.camera.unavailable['/gp/gpControl/command/shutter'] = 1
+        with self.assertRaises(HttpError):
+            _run(self.client.getJSON(self.camera.url('/gp/gpControl/command/shutter?p=1')))
+        self.assertEqual(self.camera.requests.count('/gp/gpControl/command/shutter'), 1)
+        self.assertEqual(self.client.retry.stats.not_idempotent, 1)
+
+    def test_circuit_opens(self):
+        client = AsyncClient(retry=RetryPolicy(base_delay=0), breaker=CircuitBreaker(failure_threshold=3))
+        url = 'http://127.0.0.1:{0}/gp/gpControl'.format(_closed_port())
+
+        async def work():
+            try:
+                with self.assertRaises(GoProConnectionError):
+                    await client.getJSON(url)
+                with self.assertRaises(CircuitOpenError):
+                    await client.getJSON(url)
+            finally:
+                await client.quit()
+        _run(work())
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_open_circuit_raised_by_camera_calls(self):
+        # the calls that answer "" when the camera is unreachable say so when the circuit is open
+        gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache(),
+                                  breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        gopro._client.breaker.record_failure()
+        try:
+            with self.assertRaises(CircuitOpenError):
+                _run(gopro.gpControlCommand('mode?p=0'))
+            with self.assertRaises(CircuitOpenError):
+                _run(gopro.gpControlSet('2', '9'))
+        finally:
+            _run(gopro.quit())
+
+
+class TestCircuitTrial(unittest.TestCase):
+    """Whatever way the trial request of a half-open circuit ends, it must not
+    leave the circuit open for good
+    """
+    def setUp(self):
+        self.camera = FakeCamera({('100GOPRO', 'GOPR0001.JPG'): b'x' * 1000})
+        _run(self.camera.start())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = AsyncClient(working_path=self.tmp.name, retry=RetryPolicy(base_delay=0),
+                                  breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        self.client.breaker.record_failure()
+
+    def tearDown(self):
+        _run(self.client.quit())
+        _run(self.camera.stop())
+        self.tmp.cleanup()
+
+    def test_download(self):
+        _run(self.client.download(self.camera.media_url('100GOPRO', 'GOPR0001.JPG'), size=1000))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'GOPR0001.JPG')))
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_undecodable_reply(self):
+        self.camera.command_replies['storage/delete'] = 'not json'
+        with self.assertRaises(ValueError):
+            _run(self.client.getJSON(self.camera.url('/gp/gpControl/command/storage/delete')))
+        _run(self.client.getJSON(self.camera.url('/gp/gpControl/status')))
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_cancelled(self):
+        self.camera.delay['/gp/gpControl/command/mode'] = 1
+
+        async def cancel():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.client.getJSON(self.camera.url('/gp/gpControl/command/mode')), 0.05)
+            await self.client.getJSON(self.camera.url('/gp/gpControl/status'))
+        _run(cancel())
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from goprocam.scheduler import RequestScheduler, INTERACTIVE, BULK, classify
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify('http://10.5.5.9/gp/gpControl/status'), INTERACTIVE)
+        self.assertEqual(classify('http://10.5.5.9/gp/gpControl/setting/2/9'), INTERACTIVE)
+        self.assertEqual(classify('http://10.5.5.9:8080/gp/gpMediaMetadata?p=100GOPRO/GOPR0001.MP4'), BULK)
+        self.assertEqual(classify('http://10.5.5.9:8080/videos/DCIM/100GOPRO/GOPR0001.MP4'), BULK)
+
+    def test_reserved_slot_and_priority(self):
+        scheduler = RequestScheduler(slots=2, reserved=1)
+        order = []
+
+        async def request(klass, name, hold):
+            await scheduler.acquire(klass)
+            order.append(name)
+            await asyncio.sleep(hold)
+            scheduler.release(klass)
+
+        async def work():
+            tasks = [asyncio.ensure_future(request(BULK, 'bulk1', 0.05))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(request(BULK, 'bulk2', 0)))
+            await asyncio.sleep(0)
+            # the reserved slot lets a shutter in even though bulk2 is waiting
+            tasks.append(asyncio.ensure_future(request(INTERACTIVE, 'shutter', 0.1)))
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(request(INTERACTIVE, 'status', 0)))
+            await asyncio.gather(*tasks)
+        _run(work())
+
+        self.assertEqual(order, ['bulk1', 'shutter', 'status', 'bulk2'])
+        stats = scheduler.snapshot()
+        self.assertEqual(stats[BULK]['max_queued'], 1)
+        self.assertEqual(stats[INTERACTIVE]['waited'], 1)
+        self.assertEqual(scheduler.active, 0)
+
+    def test_cancelled_waiter(self):
+        scheduler = RequestScheduler(slots=2, reserved=1)
+
+        async def work():
+            await scheduler.acquire(BULK)
+            waiter = asyncio.ensure_future(scheduler.acquire(BULK))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            scheduler.release(BULK)
+        _run(work())
+        self.assertEqual(scheduler.active, 0)
+        self.assertEqual(scheduler.stats[BULK].queued, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
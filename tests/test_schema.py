@@ -0,0 +1,225 @@
+import asyncio
+import json
+import marshal
+import os
+import shutil
+import tempfile
+import unittest
+
+from goprocam import GoProCamera
+from goprocam import constants
+from goprocam.errors import InvalidSettingError
+from goprocam.schema import CapabilitySchema, SchemaCache
+from tests.fakecamera import FakeCamera
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def _rule(source, target):
+    return {'activated_by': [{'setting_id': source, 'values': [1]}], 'blacklist': {'setting_id': target, 'values': [0]}}
+
+
+class TestCapabilitySchema(unittest.TestCase):
+    schema = CapabilitySchema.from_file(HD7_SCHEMA)
+
+    def test_indexes(self):
+        self.assertIn(9, self.schema.settings[2])
+        self.assertEqual(self.schema.setting_names[3], 'fps')
+        self.assertIn((0, 3), self.schema.modes)
+        self.assertEqual(self.schema.status_name('8'), 'system_busy')
+
+    def test_validate_setting(self):
+        self.schema.validate_setting('2', '1')
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_setting('2', '99')
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_setting('999', '0')
+        with self.assertRaisesRegex(InvalidSettingError, "'abc' for setting '2'"):
+            self.schema.validate_setting('2', 'abc')
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_setting(None, '1')
+
+    def test_blacklist(self):
+        # 4K NTSC (2=1, 57=0) has no 240 fps (3=0)
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_setting(3, 0, {2: 1, 57: 0})
+        self.schema.validate_setting(3, 0, {'2': '9', '57': '0'})
+        # conditions on unknown settings do not hold
+        self.schema.validate_setting(3, 0, {2: 1})
+
+    def test_validate_mode(self):
+        self.schema.validate_mode(constants.Mode.VideoMode, constants.Mode.SubMode.Video.Looping)
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_mode(constants.Mode.VideoMode, '9')
+        with self.assertRaises(InvalidSettingError):
+            self.schema.validate_mode('video', '0')
+
+    def test_no_modes(self):
+        schema = CapabilitySchema({})
+        schema.validate_setting('999', '0')
+        schema.validate_mode('9', '9')
+
+
+class TestApplyOrder(unittest.TestCase):
+    def test_hd7_schema(self):
+        schema = CapabilitySchema.from_file(HD7_SCHEMA)
+        # frame rate (3) is restricted by resolution (2), protune (10) by neither
+        self.assertEqual(schema.apply_order([3, 2, 10]), [[2, 10], [3]])
+        self.assertEqual(schema.apply_order([2, 13, 83]), [[2, 13, 83]])
+
+    def test_cycle(self):
+        schema = CapabilitySchema({'filters': [_rule(1, 2), _rule(2, 1), _rule(2, 3)]})
+        self.assertEqual(schema.apply_order([3, 2, 1]), [[1], [2], [3]])
+
+
+class TestApplyProfile(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        self.camera.schema = {'filters': [_rule(2, 3)]}
+        self.camera.delay = {'/gp/gpControl/setting/2/1': 0.05}
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_apply(self):
+        report = _run(self.gopro.apply_profile({'3': '5', '2': '1', '4': '0'}))
+        settings = [path for path in self.camera.requests if path.startswith('/gp/gpControl/setting')]
+        self.assertEqual(self.camera.requests.count('/gp/gpControl/status'), 1)
+        # 2 is slowed down and still sent before 3, which it restricts
+        self.assertLess(settings.index('/gp/gpControl/setting/2/1'), settings.index('/gp/gpControl/setting/3/5'))
+        self.assertEqual(len(settings), 3)
+        self.assertEqual(report['2'], {'result': 'applied', 'previous': 9, 'value': '1', 'error': None})
+        self.assertEqual(report['4']['result'], 'applied')
+        self.assertIsNone(report['4']['previous'])
+
+    def test_unchanged(self):
+        report = _run(self.gopro.apply_profile({'2': '9', '3': 8}))
+        self.assertEqual({setting: entry['result'] for setting, entry in report.items()},
+                         {'2': 'unchanged', '3': 'unchanged'})
+        self.assertFalse([path for path in self.camera.requests if path.startswith('/gp/gpControl/setting')])
+
+    def test_failed(self):
+        self.camera.unavailable['/gp/gpControl/setting/4/1'] = 10
+        report = _run(self.gopro.apply_profile({'4': '1', '5': '1'}))
+        self.assertEqual(report['4']['result'], 'failed')
+        self.assertEqual(report['4']['error'], 'HTTP: 503 - Service Unavailable')
+        self.assertEqual(report['5']['result'], 'applied')
+
+
+class TestLocalValidation(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        with open(HD7_SCHEMA) as fd:
+            self.camera.schema = json.load(fd)
+        del self.camera.schema['info']
+        self.camera.status['settings'] = {'2': 9, '3': 8, '57': 0}
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+        _run(self.gopro.connect())
+        self.requests = len(self.camera.requests)
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_gpcontrolset(self):
+        with self.assertRaises(InvalidSettingError):
+            _run(self.gopro.gpControlSet(constants.Video.RESOLUTION, '99'))
+        _run(self.gopro.gpControlSet(constants.Video.RESOLUTION, constants.Video.Resolution.R4k))
+        self.assertEqual(self.camera.requests[self.requests:], ['/gp/gpControl/setting/2/1'])
+
+    def test_mode(self):
+        with self.assertRaises(InvalidSettingError):
+            _run(self.gopro.mode(constants.Mode.VideoMode, '9'))
+        self.assertEqual(len(self.camera.requests), self.requests)
+
+    def test_apply_profile_combination(self):
+        # 240 fps (3=0) with 4K (2=1) in NTSC (57=0) is blacklisted
+        report = _run(self.gopro.apply_profile({'2': '1', '3': '0'}))
+        self.assertEqual(report['2']['result'], 'applied')
+        self.assertEqual(report['3']['result'], 'failed')
+        self.assertIn('not allowed', report['3']['error'])
+        self.assertNotIn('/gp/gpControl/setting/3/0', self.camera.requests)
+
+    def test_mode_without_schema(self):
+        # a camera known without its /gp/gpControl reply has no schema, it decides itself
+        self.gopro.invalidate_camera()
+        self.gopro._camera = GoProCamera.CameraInfo('HERO7 Black', 'HD7')
+        _run(self.gopro.mode(constants.Mode.VideoMode, '9'))
+        self.assertIsNone(self.gopro._schema)
+        self.assertEqual(self.camera.requests[self.requests:], ['/gp/gpControl/command/sub_mode'])
+
+
+def _indexes(schema):
+    return (schema.info, schema.settings, schema.setting_names, schema.modes, schema.status_names, schema.blacklist,
+            schema.dependencies)
+
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(HD7_SCHEMA) as fd:
+            self.reply = json.load(fd)
+        self.key = SchemaCache.key('HD7', self.reply['info']['firmware_version'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_compiled(self):
+        schema = CapabilitySchema(self.reply)
+        compiled = marshal.loads(marshal.dumps(schema.compiled()))
+        self.assertEqual(_indexes(CapabilitySchema.from_compiled(compiled)), _indexes(schema))
+
+    def test_disk(self):
+        cache = SchemaCache(self.directory)
+        schema = cache.get(self.key, self.reply)
+        self.assertIs(cache.get(self.key), schema)
+        self.assertEqual(os.listdir(self.directory), [self.key + '.schema'])
+        other = SchemaCache(self.directory)
+        self.assertEqual(_indexes(other.get(self.key)), _indexes(schema))
+        self.assertEqual((cache.stats, other.stats), ({'memory': 1, 'disk': 0, 'built': 1},
+                                                      {'memory': 0, 'disk': 1, 'built': 0}))
+
+    def test_corrupt_file_rebuilt(self):
+        with open(os.path.join(self.directory, self.key + '.schema'), 'wb') as fd:
+            fd.write(marshal.dumps(CapabilitySchema(self.reply).compiled())[:1000])
+        cache = SchemaCache(self.directory)
+        self.assertIsNone(cache.get(self.key))
+        self.assertTrue(cache.get(self.key, self.reply).settings)
+        self.assertEqual(cache.stats['built'], 1)
+        self.assertTrue(SchemaCache(self.directory).get(self.key).settings)
+
+    def test_without_modes_not_cached(self):
+        cache = SchemaCache(self.directory)
+        self.assertFalse(cache.get(self.key, {'info': {}}).settings)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_fleet_builds_once(self):
+        camera = FakeCamera()
+        camera.schema = dict(self.reply)
+        del camera.schema['info']
+        _run(camera.start())
+        cache = SchemaCache(self.directory)
+        fleet = [GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(camera.port), schema_cache=cache)
+                 for _ in range(30)]
+
+        async def work():
+            await asyncio.gather(*[gopro.connect() for gopro in fleet])
+            return await asyncio.gather(*[gopro.capabilities() for gopro in fleet])
+        try:
+            schemas = _run(work())
+        finally:
+            for gopro in fleet:
+                _run(gopro.quit())
+            _run(camera.stop())
+        self.assertEqual(cache.stats['built'], 1)
+        self.assertTrue(all(schema is schemas[0] for schema in schemas))
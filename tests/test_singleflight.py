@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+
+from goprocam import GoProCamera
+from goprocam.clients import AsyncClient
+from goprocam.errors import DeadlineExceeded
+from goprocam.singleflight import SingleFlight
+from goprocam.timeouts import Deadline
+from tests.fakecamera import FakeCamera
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_shared(self):
+        flight = SingleFlight(['/gp/gpMediaList'])
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'media': []}
+
+        async def work():
+            url = 'http://10.5.5.9:8080/gp/gpMediaList'
+            return await asyncio.gather(*[flight.do(url, url, fetch) for _ in range(3)])
+        results = _run(work())
+        self.assertEqual(len(calls), 1)
+        self.assertIs(results[0], results[2])
+        self.assertEqual(flight.snapshot(), {'/gp/gpMediaList': {'requests': 3, 'coalesced': 2}})
+
+    def test_not_coalesced(self):
+        flight = SingleFlight(['/gp/gpMediaList'])
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        async def work():
+            url = 'http://10.5.5.9/gp/gpControl/command/shutter?p=1'
+            await asyncio.gather(flight.do(url, url, fetch), flight.do(url, url, fetch))
+        _run(work())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flight.coalesced, 0)
+
+    def test_cancelled_caller(self):
+        flight = SingleFlight(['/gp/gpControl'])
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'info'
+
+        async def work():
+            url = 'http://10.5.5.9/gp/gpControl'
+            first = asyncio.ensure_future(flight.do(url, url, fetch))
+            second = asyncio.ensure_future(flight.do(url, url, fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+        self.assertEqual(_run(work()), 'info')
+
+
+class TestCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+
+    def tearDown(self):
+        _run(self.camera.stop())
+
+    def test_get_json(self):
+        client = AsyncClient()
+        url = self.camera.url('/gp/gpMediaList')
+
+        async def work():
+            results = await asyncio.gather(client.getJSON(url), client.getJSON(url))
+            await client.getJSON(url)
+            await client.quit()
+            return results
+        first, second = _run(work())
+        self.assertEqual(first, second)
+        self.assertEqual(self.camera.requests.count('/gp/gpMediaList'), 2)
+        self.assertEqual(client.single_flight.coalesced, 1)
+
+    def test_own_deadlines(self):
+        client = AsyncClient()
+        url = self.camera.url('/gp/gpControl/status')
+        self.camera.delay['/gp/gpControl/status'] = 0.2
+
+        async def work():
+            hurried = asyncio.ensure_future(client.getJSON(url, deadline=Deadline(0.05)))
+            await asyncio.sleep(0)
+            patient = asyncio.ensure_future(client.getJSON(url, deadline=Deadline(2)))
+            try:
+                with self.assertRaises(DeadlineExceeded):
+                    await hurried
+                return await patient
+            finally:
+                await client.quit()
+        self.assertEqual(_run(work())['status']['8'], 0)
+        self.assertEqual(client.single_flight.coalesced, 1)
+
+    def test_which_cam(self):
+        gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port))
+
+        async def work():
+            cameras = await asyncio.gather(gopro.whichCam(), gopro.whichCam())
+            await gopro.quit()
+            return cameras
+        first, second = _run(work())
+        self.assertIs(first, second)
+        self.assertEqual(first.model, 'HERO7 Black')
+        self.assertEqual(self.camera.requests.count('/gp/gpControl'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from goprocam.sinks import BufferPool, FileSink, FSYNC_CLOSE, preallocate
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class SlowFirstWrite(FileSink):
+    def _write(self, fd, buf, filled, offset):
+        if offset == 0:
+            time.sleep(0.2)
+        super()._write(fd, buf, filled, offset)
+
+
+class TestFileSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'out')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read(self):
+        with open(self.filename, 'rb') as fd:
+            return fd.read()
+
+    def test_coalesces_into_pooled_buffers(self):
+        pool = BufferPool(buffer_size=1024, max_buffers=4)
+        data = os.urandom(10000)
+
+        async def work():
+            async with FileSink(self.filename, truncate=True, buffer_pool=pool, queue_size=2,
+                                fsync=FSYNC_CLOSE) as sink:
+                for i in range(0, len(data), 300):
+                    await sink.write(data[i:i + 300])
+        _run(work())
+        self.assertEqual(self._read(), data)
+        self.assertLessEqual(pool.allocated, 3)
+
+    def test_writes_at_offset(self):
+        preallocate(self.filename, 10)
+
+        async def work():
+            async with FileSink(self.filename, offset=4) as sink:
+                await sink.write(b'abc')
+        _run(work())
+        self.assertEqual(self._read(), b'\0\0\0\0abc\0\0\0')
+
+    def test_flushes_on_error(self):
+        async def work():
+            async with FileSink(self.filename, truncate=True) as sink:
+                await sink.write(b'partial')
+                raise ValueError()
+        with self.assertRaises(ValueError):
+            _run(work())
+        self.assertEqual(self._read(), b'partial')
+
+    def test_no_hole_below_the_size(self):
+        data = os.urandom(2048)
+        executor = ThreadPoolExecutor(max_workers=2)
+
+        async def work():
+            sink = SlowFirstWrite(self.filename, truncate=True, buffer_pool=BufferPool(buffer_size=1024),
+                                  executor=executor)
+            await sink.open()
+            await sink.write(data)
+            await asyncio.sleep(0.1)
+            # the second buffer waits for the first instead of landing past a hole
+            size = os.path.getsize(self.filename)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(sink.close(), 0.01)
+            await asyncio.sleep(0.3)
+            return size
+        try:
+            self.assertEqual(_run(work()), 0)
+        finally:
+            executor.shutdown()
+        # the cancelled close left the fd open for the queued writes
+        self.assertEqual(self._read(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+import unittest
+
+from goprocam import GoProCamera
+from goprocam import constants
+from goprocam.schema import CapabilitySchema, SchemaCache
+from goprocam.status import StatusLayout, StatusSnapshot, layout_for, MISSING
+from tests.fakecamera import FakeCamera
+
+HD7_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'doc', 'HD7_01_01_51_00.json')
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+REPLY = {
+    'status': {'1': 1, '2': 3, '8': 0, '30': 'GP24500456', '35': 3600, '43': 0, '44': 3, '54': 1000000, '70': 88,
+               '300': 7},
+    'settings': {'2': 9, '3': 8, '57': 0, '112': 255},
+}
+
+
+class TestStatusLayout(unittest.TestCase):
+    def test_decode(self):
+        snapshot = StatusLayout().decode(REPLY, timestamp=1000.0)
+        self.assertIsInstance(snapshot, StatusSnapshot)
+        self.assertEqual(snapshot.timestamp, 1000.0)
+        self.assertEqual((snapshot.status.Mode, snapshot.status.SubMode, snapshot.status.BattPercent), (0, 3, 88))
+        self.assertEqual(snapshot.status.CamName, 'GP24500456')
+        self.assertIsNone(snapshot.status.GPS)
+        self.assertEqual(snapshot.status[8], 0)
+        self.assertEqual(snapshot.status[9], MISSING)
+        self.assertEqual(snapshot.status.get('300'), 7)
+        self.assertEqual((snapshot.settings.Resolution, snapshot.settings.Framerate), (9, 8))
+        self.assertEqual(snapshot.settings.get(112), 255)
+        self.assertEqual(snapshot.as_dict(), REPLY)
+        self.assertEqual(snapshot.settings.named(), {'Resolution': 9, 'Framerate': 8})
+
+    def test_age(self):
+        # taken from the monotonic clock, setting the wall clock does not age it
+        snapshot = layout_for().decode(REPLY)
+        self.assertLessEqual(snapshot.timestamp, time.monotonic())
+        self.assertTrue(0 <= snapshot.age < 1)
+
+    def test_schema_accessors(self):
+        schema = CapabilitySchema.from_file(HD7_SCHEMA)
+        layout = layout_for(schema)
+        self.assertIs(layout_for(schema), layout)
+        snapshot = layout.decode(REPLY)
+        self.assertEqual(snapshot.status.system_busy, 0)
+        self.assertEqual(snapshot.status.IsBusy, 0)
+        self.assertEqual(snapshot.settings.video_format, 0)
+
+    def test_no_attributes(self):
+        snapshot = layout_for().decode(REPLY)
+        with self.assertRaises(AttributeError):
+            snapshot.status.other = 1
+        with self.assertRaises(AttributeError):
+            snapshot.other = 1
+
+
+class TestGetStatus(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        self.camera.status = REPLY
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port), schema_cache=SchemaCache())
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_snapshot(self):
+        snapshot = _run(self.gopro.getStatus())
+        self.assertEqual(snapshot.status.IsBusy, 0)
+        self.assertEqual(snapshot.settings.get(57), 0)
+        self.assertEqual(_run(self.gopro.getStatus(constants.Status.Status, constants.Status.STATUS.SubMode)), 3)
+
+    def test_overview_mapped(self):
+        overview = _run(self.gopro.overview(mapped=True))
+        self.assertEqual((overview.status.Mode, overview.status.SubMode), ('Video', 'Looping'))
+        self.assertEqual(overview.settings.Resolution, '1080p')
+        self.assertEqual(overview.settings.Framerate, '30')
+        self.assertEqual(overview.status.CamName, 'GP24500456')
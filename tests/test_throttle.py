@@ -0,0 +1,74 @@
+import asyncio
+import time
+import unittest
+
+from goprocam.throttle import Throttle, TokenBucket
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_unlimited(self):
+        bucket = TokenBucket()
+        started = time.monotonic()
+        _run(bucket.consume(10 ** 9))
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=1000, burst=100)
+
+        async def work():
+            await asyncio.gather(*[bucket.consume(100) for _ in range(4)])
+        started = time.monotonic()
+        _run(work())
+        self.assertAlmostEqual(time.monotonic() - started, 0.3, delta=0.1)
+
+    def test_rate_lifted_while_waiting(self):
+        bucket = TokenBucket(rate=10, burst=10)
+
+        async def work():
+            waiter = asyncio.ensure_future(bucket.consume(1000))
+            await asyncio.sleep(0.05)
+            bucket.set_rate(None)
+            await waiter
+        started = time.monotonic()
+        _run(work())
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class TestThrottle(unittest.TestCase):
+    def test_yields_to_control(self):
+        throttle = Throttle(max_yield=5)
+        order = []
+
+        async def control():
+            with throttle.control():
+                await asyncio.sleep(0.1)
+                order.append('control')
+
+        async def download():
+            await asyncio.sleep(0.01)
+            await throttle.consume(100)
+            order.append('download')
+
+        _run(asyncio.gather(control(), download()))
+        self.assertEqual(order, ['control', 'download'])
+        self.assertGreater(throttle.yielded, 0.05)
+
+    def test_shared_bucket(self):
+        shared = TokenBucket(rate=1000, burst=100)
+        first = Throttle(shared=shared)
+        second = Throttle(shared=shared)
+
+        async def work():
+            await asyncio.gather(first.consume(100), second.consume(100), first.consume(100))
+        started = time.monotonic()
+        _run(work())
+        self.assertAlmostEqual(time.monotonic() - started, 0.2, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
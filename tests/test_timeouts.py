@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+import unittest
+
+from goprocam import GoProCamera
+from goprocam.clients import AsyncClient, PART_SUFFIX
+from goprocam.errors import DeadlineExceeded
+from goprocam.timeouts import Deadline, TimeoutPolicy, CONTROL, DOWNLOAD
+from tests.fakecamera import FakeCamera
+from tests.test_clients import DownloadTestCase
+
+
+def _run(coro):
+    """Run the given coroutine."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class TestDeadline(unittest.TestCase):
+    def test_split(self):
+        deadline = Deadline(10)
+        part = deadline.split(0.25)
+        self.assertAlmostEqual(part.remaining(), 2.5, places=1)
+        self.assertFalse(part.expired)
+        self.assertIs(Deadline.of(deadline), deadline)
+        self.assertIsNone(Deadline.of(None))
+
+    def test_check(self):
+        with self.assertRaises(DeadlineExceeded):
+            Deadline(-1).check()
+
+    def test_policy(self):
+        policy = TimeoutPolicy()
+        control = policy.for_request('http://10.5.5.9/gp/gpControl/command/shutter?p=1')
+        self.assertIs(control, policy.timeouts[CONTROL])
+        download = policy.for_request('http://10.5.5.9:8080/videos/DCIM/100GOPRO/GOPR0001.MP4', deadline=Deadline(3))
+        self.assertLessEqual(download.total, 3)
+        self.assertEqual(download.sock_read, policy.timeouts[DOWNLOAD].sock_read)
+        self.assertEqual(policy.for_request('http://10.5.5.9/gp/gpControl', total=5).total, 5)
+
+
+class TestRequestDeadline(unittest.TestCase):
+    def setUp(self):
+        self.camera = FakeCamera()
+        _run(self.camera.start())
+        self.gopro = GoProCamera.GoPro(ip_address='127.0.0.1:{0}'.format(self.camera.port))
+
+    def tearDown(self):
+        _run(self.gopro.quit())
+        _run(self.camera.stop())
+
+    def test_shoot_video(self):
+        _run(self.gopro.shoot_video(deadline=5))
+        self.assertIn('/gp/gpControl/command/shutter', self.camera.requests)
+
+    def test_shoot_video_too_long(self):
+        with self.assertRaises(DeadlineExceeded):
+            _run(self.gopro.shoot_video(10, deadline=5))
+        self.assertNotIn('/gp/gpControl/command/shutter', self.camera.requests)
+
+    def test_take_photo_deadline(self):
+        self.camera.delay['/gp/gpControl/command/shutter'] = 0.6
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            _run(self.gopro.take_photo(timer=0, deadline=0.2))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class TestDownloadTimeouts(DownloadTestCase):
+    def test_stall_resumed(self):
+        _run(self.client.quit())
+        self.client = AsyncClient(working_path=self.tmp.name, retry_delay=0, stall_timeout=0.2)
+        self.camera.stall[('100GOPRO', 'GOPR0001.MP4')] = 0.6
+        _run(self.client.download(self.url, 'out.MP4', size=len(self.data)))
+        self.assertEqual(self._read('out.MP4'), self.data)
+        self.assertEqual(self.client.stalls, 1)
+        self.assertEqual(self.camera.range_headers[1], 'bytes=1024-')
+
+    def test_deadline(self):
+        self.camera.stall[('100GOPRO', 'GOPR0001.MP4')] = 0.6
+        with self.assertRaises(DeadlineExceeded):
+            _run(self.client.download(self.url, 'out.MP4', size=len(self.data), deadline=0.2))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'out.MP4' + PART_SUFFIX)))
+
+
+if __name__ == '__main__':
+    unittest.main()